@@ -8,6 +8,16 @@ function sysCall_init()
     smartphone_camera = sim.getObject("./Smartphone_camera")
     pos_anterior = sim.getObjectPosition(smartphone, -1)
     pos_antant = sim.getObjectPosition(smartphone, -1)
+    -- Handles used by readAllSensors, to read the other parts of the Robobo from here
+    robobo = sim.getObject(":")
+    wheels_script =
+        sim.getScript(sim.scripttype_childscript, sim.getObject(":/Left_Motor"))
+    ir_script = sim.getScript(sim.scripttype_childscript, sim.getObject(":/IR_Back_C"))
+    pan_script = sim.getScript(sim.scripttype_childscript, sim.getObject(":/Pan_Motor"))
+    tilt_script = sim.getScript(
+        sim.scripttype_childscript,
+        sim.getObject(":/Pan_Motor/Pan_Respondable/Tilt_Motor")
+    )
 end
 
 readOrientationSensor = function(inIntegers, inFloats, inStrings, inBuffer)
@@ -29,3 +39,95 @@ readAccelerationSensor = function(inIntegers, inFloats, inStrings, inBuffer)
     pos_anterior = pos
     return {}, aceleracion, {}, ""
 end
+
+-- Read all sensors of the Robobo in one call, instead of one remote call per sensor.
+-- Returns, as floats, in order:
+-- IRs (8), acceleration (3), orientation (3), wheels (4), pan, tilt,
+-- position in the world (3), orientation in the world (3), simulation time
+readAllSensors = function(inIntegers, inFloats, inStrings, inBuffer)
+    local valores = {}
+    local irs = sim.callScriptFunction("readAllIRSensor", ir_script, {}, {}, {}, "")
+    local _i, acel = readAccelerationSensor({}, {}, {}, "")
+    local _j, orient = readOrientationSensor({}, {}, {}, "")
+    local ruedas = sim.callScriptFunction("readWheels", wheels_script, {}, {}, {}, "")
+    local pan = sim.callScriptFunction("readPanPosition", pan_script, {}, {}, {}, "")
+    local tilt = sim.callScriptFunction("readTiltPosition", tilt_script, {}, {}, {}, "")
+    local posicion = sim.getObjectPosition(robobo, sim.handle_world)
+    local orientacion_mundo = sim.getObjectOrientation(robobo, sim.handle_world)
+    for i = 1, 8, 1 do
+        table.insert(valores, irs[i])
+    end
+    for i = 1, 3, 1 do
+        table.insert(valores, acel[i])
+    end
+    for i = 1, 3, 1 do
+        table.insert(valores, orient[i])
+    end
+    for i = 1, 4, 1 do
+        table.insert(valores, ruedas[i])
+    end
+    table.insert(valores, pan[1])
+    table.insert(valores, tilt[1])
+    for i = 1, 3, 1 do
+        table.insert(valores, posicion[i])
+    end
+    for i = 1, 3, 1 do
+        table.insert(valores, orientacion_mundo[i])
+    end
+    table.insert(valores, sim.getSimulationTime())
+    return {}, valores, {}, ""
+end
+
+-- Registro de los blockids de las acciones que podrian estar en curso, y su senal
+bloqueos_activos = {}
+
+-- Return the blockids of all completed actions in one call, instead of one remote call
+-- to sim.getInt32Signal per action.
+-- "blockids" are added to the registry first, with "senales" being their signals.
+-- Completed blockids are removed from the registry.
+readCompletedBlocks = function(blockids, inFloats, senales, inBuffer)
+    for i = 1, #blockids, 1 do
+        bloqueos_activos[blockids[i]] = senales[i]
+    end
+    local completados = {}
+    for blockid, senal in pairs(bloqueos_activos) do
+        local valor = sim.getInt32Signal(senal)
+        if valor == nil or valor == 0 then
+            table.insert(completados, blockid)
+            bloqueos_activos[blockid] = nil
+        end
+    end
+    return completados, {}, {}, ""
+end
+
+-- Move the wheels of multiple robots in one call. Called on one robot, for all of them.
+-- "enteros" contains, for each robot: its wheels script, right speed and left speed
+-- "tiempos" contains the duration for each robot, and "senales" the signal of each robot
+moveWheelsByTimeOf = function(enteros, tiempos, senales, inBuffer)
+    for i = 1, #tiempos, 1 do
+        sim.callScriptFunction(
+            "moveWheelsByTime",
+            enteros[3 * i - 2],
+            { enteros[3 * i - 1], enteros[3 * i] },
+            { tiempos[i] },
+            { senales[i] },
+            ""
+        )
+    end
+    return {}, {}, {}, ""
+end
+
+-- readAllSensors for multiple robots in one call. Called on one robot, for all of them.
+-- "scripts" contains the handle of the smartphone script of each robot
+-- Returns the values of readAllSensors of each robot, one after the other
+readAllSensorsOf = function(scripts, inFloats, inStrings, inBuffer)
+    local valores = {}
+    for i = 1, #scripts, 1 do
+        local _ints, sensores =
+            sim.callScriptFunction("readAllSensors", scripts[i], {}, {}, {}, "")
+        for j = 1, #sensores, 1 do
+            table.insert(valores, sensores[j])
+        end
+    end
+    return {}, valores, {}, ""
+end
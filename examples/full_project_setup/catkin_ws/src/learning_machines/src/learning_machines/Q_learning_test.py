@@ -16,6 +16,8 @@ from robobo_interface import (
     SoundEmotion,
     SimulationRobobo,
     HardwareRobobo,
+    SimulationVectorEnv,
+    Sensor,
 )
 
 # GLOBAL VARIABLES
@@ -100,8 +102,9 @@ def simulate_robot_action(rob, action=None):
         rob.move_blocking(50, -10, 500)
     elif action == 'right':
         rob.move_blocking(-10, 50, 500)
-       
-    rob.sleep(0.1)
+
+    # Wait for IR readings taken after the move, instead of a fixed sleep
+    rob.wait_for_fresh(Sensor.IRS, timeout=0.1)
 
     ir_values = rob.read_irs()
     selected_values = [ir_values[7], ir_values[4], ir_values[5]]
@@ -180,4 +183,61 @@ def train_q_table(rob, q_table, num_episodes=200, max_steps=40, alpha=0.1, gamma
     print_q_table(q_table)
 
     # Save the final Q-table
-    save_q_table(q_table)
\ No newline at end of file
+    save_q_table(q_table)
+
+
+# Functions used by the workers of SimulationVectorEnv.
+# These need to be defined here at the top level, so they can be sent to the workers.
+def reset_episode(rob):
+    if rob.is_running():
+        rob.stop_simulation()
+    rob.play_simulation()
+    return (1,1,1)
+
+def step_episode(rob, action_index):
+    new_state, reward, done = simulate_robot_action(rob, ACTIONS[action_index])
+    # A collision ends the episode, same as in train_q_table
+    if reward == -50:
+        done = True
+    return new_state, reward, done
+
+# Training function using Q-learning, with one simulation per port running at the same time
+def train_q_table_vectorized(q_table, ports, num_steps=2000, max_steps=40, alpha=0.1, gamma=0.9, epsilon=0.1):
+    with SimulationVectorEnv(reset_episode, step_episode, ports, max_steps=max_steps) as env:
+        states = [tuple(int(value) for value in obs) for obs in env.reset()]
+
+        for step in range(num_steps // len(env)):
+            print("Step: ", step * len(env))
+
+            # Choose an action for every simulation, random by prob. epsilon, max, by prob 1-epsilon
+            action_indices = []
+            for state in states:
+                if random.uniform(0, 1) < epsilon:
+                    action_indices.append(random.randint(0, NUM_ACTIONS - 1))
+                else:
+                    action_indices.append(int(np.argmax(q_table[state])))
+
+            observations, rewards, dones, infos = env.step(action_indices)
+
+            for i, state in enumerate(states):
+                # When the episode ended, the observation is already the one of the next episode
+                if dones[i]:
+                    new_state = tuple(int(value) for value in infos[i]["final_observation"])
+                else:
+                    new_state = tuple(int(value) for value in observations[i])
+
+                # Update the Q-value
+                max_future_q = 0 if dones[i] and not infos[i].get("truncated") else max(q_table[new_state])
+                current_q = q_table[state][action_indices[i]]
+                q_table[state][action_indices[i]] = current_q + alpha * (float(rewards[i]) + gamma * max_future_q - current_q)
+
+            states = [tuple(int(value) for value in obs) for obs in observations]
+
+            # Optionally save Q-table periodically
+            if step % 50 == 0:
+                save_q_table(q_table)
+
+    print_q_table(q_table)
+
+    # Save the final Q-table
+    save_q_table(q_table)
@@ -4,4 +4,4 @@ from .Q_learning_test import *
 #__all__ = ("run_all_actions",)
 #__all__ = ("move_robot",)
 #__all__ = ("avoid_object",)
-__all__ = ("initialize_q_table", "print_q_table", "train_q_table" ,"load_q_table")
+__all__ = ("initialize_q_table", "print_q_table", "train_q_table", "train_q_table_vectorized", "load_q_table")
@@ -19,6 +19,7 @@ from robobo_interface import (
     SoundEmotion,
     SimulationRobobo,
     HardwareRobobo,
+    Sensor,
 )
 
 # Define the actions
@@ -129,7 +130,8 @@ def simulate_robot_action(rob, action=None):
     elif action == 'slight_left' or action == 'slight_right':
         rob.move_blocking(25, 50, 500) if action == 'slight_left' else rob.move_blocking(50, 25, 500)
         movement_cost = 1.5
-    rob.sleep(0.1)
+    # Wait for IR readings taken after the move, instead of a fixed sleep
+    rob.wait_for_fresh(Sensor.IRS, timeout=0.1)
 
     ir_values = rob.read_irs()
     selected_values = ir_values[4:6] + [ir_values[7]]
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Compare handing out blockids with the old set difference to the BlockidAllocator.
+
+Run from anywhere, without ROS:
+`python3 benchmarks/blockid_allocation.py`
+
+Every round acquires a blockid and releases it again,
+with a number of other blockids already in use (the occupancy),
+like a controller that starts a new move while others are still running.
+"""
+import sys
+import timeit
+from pathlib import Path
+
+# Import the utils straight from the source, so this runs without a catkin workspace.
+sys.path.insert(
+    0, str(Path(__file__).resolve().parents[1] / "src" / "robobo_interface")
+)
+
+from utils import BlockidAllocator, LockedSet  # noqa: E402
+
+ROUNDS = 20_000
+
+
+def set_difference_round(used: LockedSet) -> None:
+    blockid = min(set(range(1, 768)) - used)
+    used.add(blockid)
+    used.discard(blockid)
+
+
+def allocator_round(used: BlockidAllocator) -> None:
+    blockid = used.acquire()
+    used.discard(blockid)
+
+
+def main() -> None:
+    print(f"{'in use':>8} {'set difference':>16} {'allocator':>12} {'speedup':>8}")
+    for occupancy in (0, 64, 384, 760):
+        old = LockedSet(range(1, occupancy + 1))
+        new = BlockidAllocator()
+        for _ in range(occupancy):
+            new.acquire()
+
+        old_time = min(
+            timeit.repeat(lambda: set_difference_round(old), number=ROUNDS, repeat=3)
+        )
+        new_time = min(
+            timeit.repeat(lambda: allocator_round(new), number=ROUNDS, repeat=3)
+        )
+        print(
+            f"{occupancy:>8}"
+            f" {old_time / ROUNDS * 1e6:>13.2f} us"
+            f" {new_time / ROUNDS * 1e6:>9.2f} us"
+            f" {old_time / new_time:>7.0f}x"
+        )
+
+    exhausted = BlockidAllocator(range(1, 3))
+    exhausted.acquire()
+    exhausted.acquire()
+    try:
+        exhausted.acquire()
+    except RuntimeError as e:
+        print(f"\nWhen all blockids are in use, acquire raises:\n  {e}")
+
+
+if __name__ == "__main__":
+    main()
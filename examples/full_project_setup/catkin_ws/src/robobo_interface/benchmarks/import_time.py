@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Measure how long a fresh python process takes to import robobo_interface.
+
+Run inside the docker container, where ROS is installed:
+`python3 benchmarks/import_time.py`
+
+Every case is timed in new processes, like the workers of a SimulationVectorEnv.
+"everything" imports all robots, which is what `import robobo_interface` did
+before the robots were imported lazily.
+Outside of ROS, the cases that need it are reported as failing.
+"""
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROCESSES = 10
+
+CASES = {
+    "everything": (
+        "import robobo_interface.hardware, robobo_interface.simulation,"
+        " robobo_interface.fleet, robobo_interface.vectorized,"
+        " robobo_interface.async_robobo, robobo_interface.replay"
+    ),
+    "simulation only": "from robobo_interface import SimulationRobobo",
+    "hardware only": "from robobo_interface import HardwareRobobo",
+    "datatypes only": "from robobo_interface import IRobobo, Emotion",
+}
+
+HEAVY_MODULES = ("rospy", "cv2", "coppeliasim_zmqremoteapi_client", "asyncio")
+
+CHILD = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(elapsed, ",".join(loaded))
+"""
+
+
+def time_import(statement: str):
+    """Import in a new process.
+
+    returns:
+        The seconds the import took, and the heavy modules it loaded.
+    """
+    env = dict(os.environ)
+    src = str(Path(__file__).resolve().parents[1] / "src")
+    env["PYTHONPATH"] = os.pathsep.join(
+        [src] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(statement=statement, heavy=HEAVY_MODULES)],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    elapsed, _, loaded = result.stdout.strip().splitlines()[-1].partition(" ")
+    return float(elapsed), loaded or "-"
+
+
+def main() -> None:
+    print(f"{'case':>16} {'median':>10} {'min':>10}  heavy modules loaded")
+    for name, statement in CASES.items():
+        try:
+            runs = [time_import(statement) for _ in range(PROCESSES)]
+        except RuntimeError as e:
+            print(f"{name:>16}  fails here: {e}")
+            continue
+        times = [elapsed for elapsed, _ in runs]
+        print(
+            f"{name:>16}"
+            f" {statistics.median(times) * 1e3:>7.1f} ms"
+            f" {min(times) * 1e3:>7.1f} ms"
+            f"  {runs[0][1]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
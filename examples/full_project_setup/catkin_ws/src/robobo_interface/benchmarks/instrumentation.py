@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Measure what wrapping a robot in an InstrumentedRobobo costs per call.
+
+Run from anywhere, without CoppeliaSim:
+`python3 benchmarks/instrumentation.py`
+
+This uses the FakeRemoteAPIClient, which answers far quicker than CoppeliaSim,
+so the overhead is a larger part of every call here than it is with a real robot.
+"""
+import sys
+import timeit
+from pathlib import Path
+
+# Import straight from the source, so this runs without a catkin workspace.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from robobo_interface import (  # noqa: E402
+    FakeRemoteAPIClient,
+    InstrumentedRobobo,
+    SimulationRobobo,
+)
+
+ROUNDS = 20_000
+
+
+def new_robot() -> SimulationRobobo:
+    rob = SimulationRobobo(
+        client=FakeRemoteAPIClient(), stepping=True, logger=lambda _: None
+    )
+    rob.play_simulation()
+    return rob
+
+
+def measure(rob) -> float:
+    """The time one `read_irs` takes, in microseconds"""
+    return min(timeit.repeat(rob.read_irs, number=ROUNDS, repeat=3)) / ROUNDS * 1e6
+
+
+def main() -> None:
+    plain = measure(new_robot())
+    instrumented = InstrumentedRobobo(new_robot())
+    enabled = measure(instrumented)
+    instrumented.enabled = False
+    disabled = measure(instrumented)
+
+    print(f"{'read_irs':>26} {'per call':>10} {'overhead':>10}")
+    for name, time in (
+        ("plain robot", plain),
+        ("instrumented, disabled", disabled),
+        ("instrumented, enabled", enabled),
+    ):
+        print(f"{name:>26} {time:>7.2f} us {time - plain:>7.2f} us")
+
+    instrumented.enabled = True
+    read_irs = instrumented.metrics.to_dict()["methods"]["read_irs"]
+    print(
+        f"\n{read_irs['calls']} calls to read_irs were measured,"
+        f" with {read_irs['rpcs']} RPCs."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+import numpy
+
+from robobo_interface.base import IRobobo
+from robobo_interface.utils import LatestImage
+
+from typing import AsyncIterator, Callable, List, Optional, TypeVar
+from numpy.typing import NDArray
+
+T = TypeVar("T")
+
+
+class AsyncRobobo:
+    """An asyncio version of a robot, where actions can be awaited.
+
+    Awaiting an action (like `move`) sends the command, and only completes once
+    the robot is done performing it, without blocking the event loop while waiting.
+    This makes it possible to do multiple things at the same time, like:
+    ```
+    rob = AsyncRobobo(SimulationRobobo())
+    await asyncio.gather(
+        rob.move(50, 50, 1000),
+        rob.set_phone_tilt(100, 50),
+    )
+    ```
+    And to drive multiple robots from one event loop.
+
+    All calls to the robot are made from one worker thread per AsyncRobobo,
+    because the robots can't be used by multiple threads at the same time.
+    Robots that share a connection, like the robots of a SimulationRoboboFleet,
+    should share one executor as well, by passing the same one to all of them.
+
+    The hardware gets told by the Robobo when an action is done, so waiting for that
+    happens on a thread of its own, and other calls can be made in the mean time.
+    The simulation has to be asked, so there the wait is done by the worker thread,
+    and calls to the same robot that are made while waiting are made after the action.
+    Actions of different robots still run at the same time.
+
+    Arguments you should understand:
+    robot: IRobobo -> The robot to control, either hardware or simulation.
+
+    Arguments you only have to understand if you want to do advanced stuff:
+    executor: Optional[Executor] = None -> The executor to make the calls to the robot on.
+        If None, a new one with a single thread is made, which is shut down by `close`.
+    """
+
+    def __init__(self, robot: IRobobo, executor: Optional[Executor] = None):
+        self._robot = robot
+        self._owns_executor = executor is None
+        self._executor = (
+            executor if executor is not None else ThreadPoolExecutor(max_workers=1)
+        )
+
+    @property
+    def robot(self) -> IRobobo:
+        """The robot this controls"""
+        return self._robot
+
+    async def __aenter__(self) -> "AsyncRobobo":
+        return self
+
+    async def __aexit__(self, *_args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker thread, if it was made by this class"""
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    async def call(self, f: Callable[..., T], *args, **kwargs) -> T:
+        """Call any function of the robot on the worker thread, and await the result.
+        example:
+        `orientation = await rob.call(rob.robot.read_orientation)`
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(f, *args, **kwargs)
+        )
+
+    async def wait(self, blockid: int) -> None:
+        """Complete once the action with the given blockid is completed"""
+        if self._robot._thread_safe_wait:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._robot.wait, blockid)
+        else:
+            await self.call(self._robot.wait, blockid)
+
+    async def move(self, left_speed: int, right_speed: int, millis: int) -> int:
+        """Move the robot wheels for `millis` time, and complete once the move is done.
+        The arguments are the same as the ones of `IRobobo.move`.
+
+        returns:
+            the blockid of the move
+        """
+        blockid = await self.call(self._robot.move, left_speed, right_speed, millis)
+        await self.wait(blockid)
+        return blockid
+
+    async def set_phone_pan(self, pan_position: int, pan_speed: int) -> int:
+        """Move the phone in the horizontal (pan) axis, and complete once it is done.
+        The arguments are the same as the ones of `IRobobo.set_phone_pan`.
+
+        returns:
+            the blockid of the movement
+        """
+        blockid = await self.call(self._robot.set_phone_pan, pan_position, pan_speed)
+        await self.wait(blockid)
+        return blockid
+
+    async def set_phone_tilt(self, tilt_position: int, tilt_speed: int) -> int:
+        """Move the phone in the vertical (tilt) axis, and complete once it is done.
+        The arguments are the same as the ones of `IRobobo.set_phone_tilt`.
+
+        returns:
+            the blockid of the movement
+        """
+        blockid = await self.call(self._robot.set_phone_tilt, tilt_position, tilt_speed)
+        await self.wait(blockid)
+        return blockid
+
+    async def sleep(self, seconds: float) -> None:
+        """Sleep in the time of the robot.
+        For a simulation in stepping mode, this advances the simulation.
+        """
+        await self.call(self._robot.sleep, seconds)
+
+    async def read_irs(self) -> List[Optional[float]]:
+        """See `IRobobo.read_irs`"""
+        return await self.call(self._robot.read_irs)
+
+    async def get_image_front(self) -> NDArray[numpy.uint8]:
+        """See `IRobobo.get_image_front`"""
+        return await self.call(self._robot.get_image_front)
+
+    async def stream_irs(self, interval: float) -> AsyncIterator[List[Optional[float]]]:
+        """Iterate over the IR readings, one every `interval` seconds.
+        example:
+        ```
+        async for irs in rob.stream_irs(0.1):
+            if max(irs[2:6]) > 100:
+                break
+        ```
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            yield await self.read_irs()
+            await asyncio.sleep(max(started + interval - loop.time(), 0))
+
+    async def stream_images(
+        self, max_fps: Optional[float] = None, max_age: Optional[float] = None
+    ) -> AsyncIterator[NDArray[numpy.uint8]]:
+        """Iterate over the images of the front camera. See `IRobobo.stream_images`"""
+        loop = asyncio.get_running_loop()
+        latest = LatestImage()
+        # Starting the stream talks to the robot, so that happens on the worker thread.
+        # After that, the images arrive from a thread of their own.
+        stop = await self.call(self._robot._start_image_stream, latest, max_fps)
+        try:
+            while True:
+                yield await loop.run_in_executor(None, latest.get, max_age)
+        finally:
+            stop()
+            # Wake up a `get` that may still be waiting, if this was cancelled.
+            latest.fail(RuntimeError("The image stream is stopped"))
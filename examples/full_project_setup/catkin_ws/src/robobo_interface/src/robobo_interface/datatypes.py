@@ -1,5 +1,15 @@
+import math
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+
+import numpy
+
+from typing import Any, List, Optional, Sequence, Type, TypeVar
+from numpy.typing import NDArray
+
+C = TypeVar("C")
+V = TypeVar("V", bound="_FloatVector")
+F = TypeVar("F", bound="SensorFrame")
 
 
 class Emotion(Enum):
@@ -64,8 +74,97 @@ class LedColor(Enum):
     OFF = "off"
 
 
-@dataclass
-class Acceleration:
+class SensorFrequency(Enum):
+    """How often the hardware robobo sends out the values of its sensors
+    https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Services#robotsetsensorfrequency
+    """
+
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+    MAX = 3
+
+
+class BlobColor(Enum):
+    """The colors the blob detector of the hardware robobo can detect
+    https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Topics
+    """
+
+    RED = "red"
+    GREEN = "green"
+    BLUE = "blue"
+    CUSTOM = "custom"
+
+
+class Sensor(Enum):
+    """The sensors of which the readings can be waited for with `IRobobo.wait_for_fresh`"""
+
+    IRS = "irs"
+    ACCEL = "accel"
+    ORIENTATION = "orientation"
+    WHEELS = "wheels"
+    PHONE_PAN = "phone_pan"
+    PHONE_TILT = "phone_tilt"
+
+
+def _slotted_dataclass(cls: Type[C]) -> Type[C]:
+    """A dataclass that uses `__slots__` instead of a `__dict__` per instance,
+    which makes it smaller and its attributes faster to get.
+    The same as `@dataclass(slots=True)`, which sadly is a python 3.10 thing.
+    """
+    cls = dataclass(cls)
+    names = tuple(field.name for field in fields(cls))
+    namespace = dict(cls.__dict__)
+    # The defaults are already in __init__, and would clash with the slots.
+    for name in names:
+        namespace.pop(name, None)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+class _FloatVector:
+    """A datatype that is a fixed amount of floats,
+    which can be turned into a numpy array and back.
+    """
+
+    __slots__: Sequence[str] = ()
+
+    def to_array(self) -> NDArray[numpy.float64]:
+        """The values as a numpy array, in the order of the fields"""
+        return numpy.array(
+            [getattr(self, name) for name in self.__slots__], dtype=numpy.float64
+        )
+
+    @classmethod
+    def from_array(cls: Type[V], array: Sequence[float]) -> V:
+        """Create this from values in the order of the fields,
+        like the array returned by `to_array`.
+        """
+        if len(array) != len(cls.__slots__):
+            raise ValueError(
+                f"{cls.__name__} needs {len(cls.__slots__)} values, got {len(array)}"
+            )
+        return cls(*(float(value) for value in array))
+
+
+@_slotted_dataclass
+class SampleStamp:
+    """When the newest reading of a sensor was taken, as returned by `IRobobo.read_stamp`
+
+    timestamp is in the clock of the robot: `time.time()` for the hardware,
+    and simulation time for the simulation.
+    sequence goes up by one for every new reading, so two equal sequence numbers
+    mean the reading did not change in between.
+    """
+
+    timestamp: float = 0.0
+    sequence: int = 0
+
+
+@_slotted_dataclass
+class Acceleration(_FloatVector):
     """Acceleration of the robot"""
 
     x: float = 0.0
@@ -73,8 +172,8 @@ class Acceleration:
     z: float = 0.0
 
 
-@dataclass
-class Position:
+@_slotted_dataclass
+class Position(_FloatVector):
     """A basic 3d vector to represent a position"""
 
     x: float = 0.0
@@ -82,8 +181,8 @@ class Position:
     z: float = 0.0
 
 
-@dataclass
-class Orientation:
+@_slotted_dataclass
+class Orientation(_FloatVector):
     """Orientation in Yaw, Pitch, Roll"""
 
     yaw: float = 0.0
@@ -91,11 +190,188 @@ class Orientation:
     roll: float = 0.0
 
 
-@dataclass
-class WheelPosition:
+@_slotted_dataclass
+class WheelPosition(_FloatVector):
     """Wheel position of the robot."""
 
     wheel_pos_r: float = 0.0
     wheel_pos_l: float = 0.0
     wheel_speed_r: float = 0.0
     wheel_speed_l: float = 0.0
+
+
+@_slotted_dataclass
+class Blob:
+    """A blob of color detected by the phone, as returned by `HardwareRobobo.read_blobs()`
+
+    x and y are the center of the blob in the camera image, in pixels,
+    and timestamp is when it was received, like `time.time()`.
+    """
+
+    color: str = ""
+    size: int = 0
+    x: float = 0.0
+    y: float = 0.0
+    timestamp: float = 0.0
+
+
+@_slotted_dataclass
+class QrCode:
+    """A QR code detected by the phone, as returned by `HardwareRobobo.read_qr_codes()`
+
+    x and y are the center of the code in the camera image, in pixels,
+    and timestamp is when it was last seen, like `time.time()`.
+    """
+
+    text: str = ""
+    distance: float = 0.0
+    x: float = 0.0
+    y: float = 0.0
+    timestamp: float = 0.0
+
+
+# One SensorFrame as a numpy record: 21 float64 values, 168 bytes.
+# Missing IR readings are stored as NaN.
+SENSOR_FRAME_DTYPE = numpy.dtype(
+    [
+        ("irs", numpy.float64, (8,)),
+        ("accel", numpy.float64, (3,)),
+        ("orientation", numpy.float64, (3,)),
+        ("wheels", numpy.float64, (4,)),
+        ("phone_pan", numpy.float64),
+        ("phone_tilt", numpy.float64),
+        ("timestamp", numpy.float64),
+    ]
+)
+
+
+@_slotted_dataclass
+class SensorFrame:
+    """The readings of all sensors of the robot at one moment,
+    as returned by `IRobobo.read_frame()`
+
+    A frame can be stored as one record of a numpy array with dtype `SENSOR_FRAME_DTYPE`,
+    so a whole episode is a single contiguous array:
+    ```
+    episode = SensorFrame.allocate(steps)
+    for step in range(steps):
+        rob.move_blocking(50, 50, 200)
+        rob.read_frame().to_record(out=episode[step])
+    numpy.save("episode.npy", episode)
+    episode["irs"]  # (steps, 8)
+    ```
+
+    timestamp is in the clock of the robot, like the one of `SampleStamp`.
+    """
+
+    irs: List[Optional[float]]
+    accel: Acceleration
+    orientation: Orientation
+    wheels: WheelPosition
+    phone_pan: int
+    phone_tilt: int
+    timestamp: float
+
+    @staticmethod
+    def allocate(length: int) -> NDArray[Any]:
+        """An array of `length` zeroed records to store frames in"""
+        return numpy.zeros(length, dtype=SENSOR_FRAME_DTYPE)
+
+    def to_record(self, out: Optional[Any] = None) -> Any:
+        """Store this frame as a numpy record of dtype `SENSOR_FRAME_DTYPE`.
+
+        Arguments:
+        out: Optional[numpy.void] - The record to write into, like `episode[step]`
+            of an array made with `allocate`. If None, a new one is made.
+
+        returns:
+            The record written to.
+        """
+        record = numpy.zeros((), dtype=SENSOR_FRAME_DTYPE) if out is None else out
+        record["irs"] = [numpy.nan if value is None else value for value in self.irs]
+        record["accel"] = self.accel.to_array()
+        record["orientation"] = self.orientation.to_array()
+        record["wheels"] = self.wheels.to_array()
+        record["phone_pan"] = self.phone_pan
+        record["phone_tilt"] = self.phone_tilt
+        record["timestamp"] = self.timestamp
+        return record
+
+    @classmethod
+    def from_record(cls: Type[F], record: Any) -> F:
+        """Create a frame from a record of dtype `SENSOR_FRAME_DTYPE`,
+        like `episode[step]`. NaN IR readings become None.
+        """
+        return cls(
+            irs=[
+                None if math.isnan(value) else value for value in record["irs"].tolist()
+            ],
+            accel=Acceleration.from_array(record["accel"]),
+            orientation=Orientation.from_array(record["orientation"]),
+            wheels=WheelPosition.from_array(record["wheels"]),
+            phone_pan=int(record["phone_pan"]),
+            phone_tilt=int(record["phone_tilt"]),
+            timestamp=float(record["timestamp"]),
+        )
+
+
+@dataclass
+class SensorSnapshot:
+    """All readings of the robot at one moment in time,
+    as returned by `SimulationRobobo.read_all()`
+    """
+
+    irs: List[Optional[float]]
+    accel: Acceleration
+    orientation: Orientation
+    wheels: WheelPosition
+    phone_pan: int
+    phone_tilt: int
+    position: Position
+    world_orientation: Orientation
+    sim_time: float
+
+    def to_frame(self) -> SensorFrame:
+        """The readings of the sensors, without the position in the world"""
+        return SensorFrame(
+            irs=self.irs,
+            accel=self.accel,
+            orientation=self.orientation,
+            wheels=self.wheels,
+            phone_pan=self.phone_pan,
+            phone_tilt=self.phone_tilt,
+            timestamp=self.sim_time,
+        )
+
+
+@dataclass
+class FleetSnapshot:
+    """All readings of N robots at one moment in time,
+    as returned by `SimulationRoboboFleet.read_all()`
+
+    Every array has the robots as first axis, in the order of the fleet.
+    """
+
+    irs: NDArray[numpy.float64]  # (N, 8)
+    accel: NDArray[numpy.float64]  # (N, 3)
+    orientation: NDArray[numpy.float64]  # (N, 3)
+    wheels: NDArray[numpy.float64]  # (N, 4)
+    phone_pan: NDArray[numpy.float64]  # (N,)
+    phone_tilt: NDArray[numpy.float64]  # (N,)
+    position: NDArray[numpy.float64]  # (N, 3)
+    world_orientation: NDArray[numpy.float64]  # (N, 3)
+    sim_time: float
+
+    def to_frames(self) -> NDArray[Any]:
+        """The readings of the sensors as an array of N records of `SENSOR_FRAME_DTYPE`,
+        one per robot, without the positions in the world.
+        """
+        frames = SensorFrame.allocate(len(self.irs))
+        frames["irs"] = self.irs
+        frames["accel"] = self.accel
+        frames["orientation"] = self.orientation
+        frames["wheels"] = self.wheels
+        frames["phone_pan"] = self.phone_pan
+        frames["phone_tilt"] = self.phone_tilt
+        frames["timestamp"] = self.sim_time
+        return frames
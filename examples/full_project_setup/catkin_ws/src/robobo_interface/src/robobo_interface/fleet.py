@@ -0,0 +1,290 @@
+import numpy
+
+from robobo_interface.datatypes import FleetSnapshot
+from robobo_interface.simulation import (
+    RemoteAPIClient,
+    SimulationRobobo,
+    SNAPSHOT_IRS,
+    SNAPSHOT_ACCEL,
+    SNAPSHOT_ORIENTATION,
+    SNAPSHOT_WHEELS,
+    SNAPSHOT_PAN,
+    SNAPSHOT_TILT,
+    SNAPSHOT_POSITION,
+    SNAPSHOT_WORLD_ORIENTATION,
+    SNAPSHOT_SIM_TIME,
+    SNAPSHOT_SIZE,
+)
+
+from typing import Callable, List, Optional, Set
+from numpy.typing import ArrayLike, NDArray
+
+# Every robot gets its own block of ids in the registry of actions of the first robot:
+# (index + 1) * FLEET_BLOCKID_STRIDE + FLEET_BLOCKID_OFFSET + blockid.
+# Every 16-bit blockid fits in a block, so the ids of different robots never collide,
+# and the +1 keeps them apart from the plain blockids the first robot registers itself.
+FLEET_BLOCKID_OFFSET = 2**15
+FLEET_BLOCKID_STRIDE = 2**16
+
+
+class SimulationRoboboFleet:
+    """Multiple simulated Robobos in one scene, controlled over one connection.
+
+    The robots are expected to be called `/Robobo[0]` up to `/Robobo[N-1]` in the scene.
+    Commands and readings for all robots are sent in a single call to the simulation,
+    and readings are returned as numpy arrays, with the robots as first axis.
+
+    For everything that is not batched, you can still use the individual robots,
+    which can be found at `fleet.robots`, or by indexing the fleet: `fleet[i]`.
+
+    Arguments:
+    nr_robots: int -> The amount of robots in the scene to control.
+    client: Optional[RemoteAPIClient] = None -> An existing connection to CoppeliaSim to use,
+        for example a FakeRemoteAPIClient. If None, a new connection is made.
+
+    The other arguments are the same as the ones of SimulationRobobo, and are passed to it.
+    """
+
+    def __init__(
+        self,
+        nr_robots: int,
+        api_port: Optional[int] = None,
+        ip_adress: Optional[str] = None,
+        logger: Callable[[str], None] = print,
+        timeout_dur: int = 10,
+        stepping: bool = False,
+        state_cache_duration: float = 1.0,
+        client: Optional[RemoteAPIClient] = None,
+    ):
+        if nr_robots < 1:
+            raise ValueError(f"A fleet needs at least one robot, got {nr_robots}")
+
+        # The first robot sets up the connection, which all others then share.
+        # All batched calls go trough the scripts of this first robot.
+        self._leader = SimulationRobobo(
+            identifier=0,
+            api_port=api_port,
+            ip_adress=ip_adress,
+            logger=logger,
+            timeout_dur=timeout_dur,
+            stepping=stepping,
+            state_cache_duration=state_cache_duration,
+            client=client,
+        )
+        self._robots: List[SimulationRobobo] = [self._leader] + [
+            SimulationRobobo(
+                identifier=i,
+                api_port=api_port,
+                ip_adress=ip_adress,
+                logger=logger,
+                timeout_dur=timeout_dur,
+                stepping=stepping,
+                state_cache_duration=state_cache_duration,
+                client=self._leader._client,
+            )
+            for i in range(1, nr_robots)
+        ]
+
+    @property
+    def robots(self) -> List[SimulationRobobo]:
+        """The individual robots of the fleet"""
+        return self._robots
+
+    def __len__(self) -> int:
+        return len(self._robots)
+
+    def __getitem__(self, index: int) -> SimulationRobobo:
+        return self._robots[index]
+
+    def move(
+        self,
+        left_speeds: ArrayLike,
+        right_speeds: ArrayLike,
+        millis: ArrayLike,
+    ) -> List[int]:
+        """Move the wheels of all robots, in one call to the simulation.
+
+        Arguments
+        left_speeds: speed of the left wheel of each robot, shape (N,). Range: -100-0-100.
+            A single number means the same speed for all robots.
+        right_speeds: speed of the right wheel of each robot, shape (N,). Range: -100-0-100.
+            A single number means the same speed for all robots.
+        millis: how many millisecond to move each robot, shape (N,), or a single number.
+
+        returns:
+            the blockid of each robot
+        """
+        if not self._leader._is_running_cached():
+            raise RuntimeError("Cannot move wheels when simulation is not running")
+
+        left = self._per_robot(left_speeds, "left_speeds").astype(int).tolist()
+        right = self._per_robot(right_speeds, "right_speeds").astype(int).tolist()
+        seconds = (self._per_robot(millis, "millis") / 1000.0).tolist()
+
+        blockids: List[int] = []
+        ints: List[int] = []
+        strings: List[str] = []
+        try:
+            for robot, left_speed, right_speed in zip(self._robots, left, right):
+                blockid = robot._used_pids.acquire()
+                blockids.append(blockid)
+                ints.extend([robot._wheels_script, right_speed, left_speed])
+                strings.append(robot._block_string(blockid))
+
+            self._leader._sim.callScriptFunction(
+                "moveWheelsByTimeOf",
+                self._leader._smartphone_script,
+                ints,
+                seconds,
+                strings,
+                bytearray(),
+            )
+        except BaseException:
+            # No action was started, so the blockids can be handed out again.
+            for robot, blockid in zip(self._robots, blockids):
+                robot._used_pids.discard(blockid)
+            raise
+        return blockids
+
+    def move_blocking(
+        self,
+        left_speeds: ArrayLike,
+        right_speeds: ArrayLike,
+        millis: ArrayLike,
+    ) -> None:
+        """Move the wheels of all robots, and only return once all of them are done.
+        The arguments are the same as the ones of `move`.
+        """
+        self.move(left_speeds, right_speeds, millis)
+        self.block()
+
+    def is_blocked(self) -> bool:
+        """See if any robot is currently performing an action.
+        This checks all robots in one call to the simulation.
+        """
+        return bool(self._poll_blocks())
+
+    def block(self) -> None:
+        """Block untill (only return once) all blocking actions of all robots are completed"""
+        self._leader._wait_until(lambda: not self._poll_blocks())
+
+    def read_all(self) -> FleetSnapshot:
+        """Get all sensor readings of all robots, and their position and orientation
+        relative to the world, in a single call to the simulation.
+        """
+        _ints, floats, _strings, _buffer = self._leader._sim.callScriptFunction(
+            "readAllSensorsOf",
+            self._leader._smartphone_script,
+            [robot._smartphone_script for robot in self._robots],
+            [],
+            [],
+            bytearray(),
+        )
+        values = numpy.asarray(floats, dtype=numpy.float64).reshape(
+            len(self._robots), SNAPSHOT_SIZE
+        )
+        return FleetSnapshot(
+            irs=values[:, SNAPSHOT_IRS],
+            accel=values[:, SNAPSHOT_ACCEL],
+            orientation=values[:, SNAPSHOT_ORIENTATION],
+            wheels=values[:, SNAPSHOT_WHEELS],
+            phone_pan=values[:, SNAPSHOT_PAN],
+            phone_tilt=values[:, SNAPSHOT_TILT],
+            position=values[:, SNAPSHOT_POSITION],
+            world_orientation=values[:, SNAPSHOT_WORLD_ORIENTATION],
+            sim_time=float(values[0, SNAPSHOT_SIM_TIME]),
+        )
+
+    def read_irs(self) -> NDArray[numpy.float64]:
+        """The IR readings of all robots, shape (N, 8).
+        Per robot: [BackL, BackR, FrontL, FrontR, FrontC, FrontRR, BackC, FrontLL]
+        """
+        return self.read_all().irs
+
+    def read_wheels(self) -> NDArray[numpy.float64]:
+        """The wheel positions and speeds of all robots, shape (N, 4).
+        Per robot, in the order of the fields of WheelPosition.
+        """
+        return self.read_all().wheels
+
+    def read_poses(self) -> NDArray[numpy.float64]:
+        """The position and orientation of all robots relative to the world, shape (N, 6).
+        Per robot: [x, y, z, alpha, beta, gamma]
+        """
+        snapshot = self.read_all()
+        return numpy.hstack((snapshot.position, snapshot.world_orientation))
+
+    def sleep(self, seconds: float) -> None:
+        """Block for a an amount of seconds, in simulation time."""
+        self._leader.sleep(seconds)
+
+    def play_simulation(self) -> None:
+        """Start the simulation"""
+        self._leader.play_simulation()
+
+    def pause_simulation(self) -> None:
+        """Pause the simulation"""
+        self._leader.pause_simulation()
+
+    def stop_simulation(self) -> None:
+        """Stop the simulation"""
+        self._leader.stop_simulation()
+
+    def _per_robot(self, values: ArrayLike, name: str) -> NDArray[numpy.float64]:
+        """Broadcast `values` to one value per robot"""
+        try:
+            return numpy.broadcast_to(
+                numpy.asarray(values, dtype=numpy.float64), (len(self._robots),)
+            )
+        except ValueError:
+            raise ValueError(
+                f"{name} should have one value per robot ({len(self._robots)}),"
+                f" or be a single number. Got shape {numpy.shape(values)}"
+            )
+
+    def _poll_blocks(self) -> Set[int]:
+        """Ask the simulation which blockids of all robots are completed,
+        in one call to the registry of actions of the first robot.
+
+        returns:
+            The fleet-wide ids (see `_fleet_id`) of the actions that are still running.
+        """
+        ids: List[int] = []
+        strings: List[str] = []
+        for index, robot in enumerate(self._robots):
+            for blockid in robot._used_pids.snapshot():
+                ids.append(self._fleet_id(index, blockid))
+                strings.append(robot._block_string(blockid))
+        if not ids:
+            return set()
+
+        ints, _floats, _strings, _buffer = self._leader._sim.callScriptFunction(
+            "readCompletedBlocks",
+            self._leader._smartphone_script,
+            ids,
+            [],
+            strings,
+            bytearray(),
+        )
+        completed: List[List[int]] = [[] for _ in self._robots]
+        for fleet_id in ints:
+            block, offset_blockid = divmod(fleet_id, FLEET_BLOCKID_STRIDE)
+            if 0 < block <= len(self._robots):
+                completed[block - 1].append(offset_blockid - FLEET_BLOCKID_OFFSET)
+        for robot, blockids in zip(self._robots, completed):
+            if blockids:
+                robot._used_pids.discard_many(blockids)
+        return set(ids) - set(ints)
+
+    @staticmethod
+    def _fleet_id(index: int, blockid: int) -> int:
+        """The id of the blockid of the robot at `index` in the registry of the first robot
+
+        raises:
+            ValueError if the blockid does not fit in a 16-bit integer.
+        """
+        if not -FLEET_BLOCKID_OFFSET <= blockid < FLEET_BLOCKID_OFFSET:
+            raise ValueError(
+                f"Blockid {blockid} of robot {index} does not fit in a 16-bit integer"
+            )
+        return (index + 1) * FLEET_BLOCKID_STRIDE + FLEET_BLOCKID_OFFSET + blockid
@@ -1,4 +1,6 @@
 import os
+import time
+import threading
 
 import rospy
 import cv2
@@ -14,8 +16,17 @@ from robobo_msgs.srv import (
     Talk,
     SetLed,
     ResetWheels,
+    SetSensorFrequency,
+)
+from robobo_msgs.msg import (
+    IRs,
+    Wheels,
+    OrientationEuler,
+    Blob as BlobMessage,
+    QrCode as QrCodeMessage,
+    QrCodeChange,
+    SetBlobCommand,
 )
-from robobo_msgs.msg import IRs, Wheels, OrientationEuler
 
 from robobo_interface.base import IRobobo
 from robobo_interface.datatypes import (
@@ -26,12 +37,37 @@ from robobo_interface.datatypes import (
     Orientation,
     SoundEmotion,
     WheelPosition,
+    SensorFrequency,
+    Sensor,
+    SampleStamp,
+    BlobColor,
+    Blob,
+    QrCode,
+)
+from robobo_interface.recording import SessionRecorder, RecordKind, SENSOR_KINDS
+from robobo_interface.utils import (
+    BlockidAllocator,
+    DEFAULT_BLOCKIDS,
+    LatestImage,
+    SensorHistory,
+    write_image,
 )
-from robobo_interface.utils import LockedSet
 
-from typing import Callable, List, Optional
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 from numpy.typing import NDArray
 
+Detection = TypeVar("Detection", Blob, QrCode)
+
 # https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Services#robotmovewheels
 MOVE_WHEELS_SERVICE = "robot/moveWheels"
 
@@ -56,6 +92,13 @@ IMAGE_TOPIC = "robot/camera/image/compressed"
 # https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Services#robotsetcamera
 SET_CAMERA_SERVICE = "robot/setCamera"
 
+# https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Services#robotsetsensorfrequency
+SET_SENSOR_FREQUENCY_SERVICE = "robot/setSensorFrequency"
+
+# How many seconds the robot has to be idle before `adaptive_sensor_frequency`
+# drops back to LOW. This keeps a loop of blocking actions from switching twice per action.
+SENSOR_FREQUENCY_IDLE_DELAY = 1.0
+
 # https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Topics#robotirs
 IRS_TOPIC = "robot/irs"
 
@@ -86,6 +129,86 @@ ROBOT_BATTERY_TOPIC = "robot/battery/base"
 # https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Topics#robotbatteryphone
 PHONE_BATTERY_TOPIC = "robot/battery/phone"
 
+# The blobs and QR codes detected by the phone
+# https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Topics
+BLOB_TOPIC = "robot/blob"
+QR_CODE_TOPIC = "robot/qrcode"
+QR_CODE_APPEAR_TOPIC = "robot/qrcodeappear"
+QR_CODE_DISAPPEAR_TOPIC = "robot/qrcodedisappear"
+SET_BLOB_COMMAND_TOPIC = "robot/setBlobCommand"
+
+# How to decode camera images, for (grayscale, reduction)
+IMAGE_DECODE_FLAGS = {
+    (False, 1): cv2.IMREAD_COLOR,
+    (False, 2): cv2.IMREAD_REDUCED_COLOR_2,
+    (False, 4): cv2.IMREAD_REDUCED_COLOR_4,
+    (False, 8): cv2.IMREAD_REDUCED_COLOR_8,
+    (True, 1): cv2.IMREAD_GRAYSCALE,
+    (True, 2): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (True, 4): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (True, 8): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+class PersistentServiceProxy:
+    """A ROS service proxy that keeps its connection open between calls,
+    instead of setting up a new TCPROS connection for every call.
+
+    All services of the robot make it do something (move, talk, ...),
+    so a request is never sent twice: a call is only tried once more
+    if it failed before the request was sent, which is when the connection could not be set up.
+    Any other failure closes the connection, so the next call sets up a new one,
+    and is raised, as the robot may or may not have executed the request.
+    A connection that is known to be closed is set up again before sending.
+    Calls from multiple threads are sent one after the other over the same connection.
+
+    Arguments:
+    name: str -> The name of the service
+    service_class: type -> The type of the service, like MoveWheels
+    """
+
+    def __init__(self, name: str, service_class: type):
+        self._name = name
+        self._service_class = service_class
+        self._lock = threading.Lock()
+        self._proxy: Optional[rospy.ServiceProxy] = None
+
+    def __call__(self, *args):
+        with self._lock:
+            try:
+                return self._connection()(*args)
+            except rospy.ServiceException as e:
+                self.close()
+                if not _failed_to_connect(e):
+                    raise
+            return self._connection()(*args)
+
+    def close(self) -> None:
+        """Close the connection. The next call sets up a new one."""
+        if self._proxy is not None:
+            self._proxy.close()
+            self._proxy = None
+
+    def _connection(self) -> rospy.ServiceProxy:
+        if self._proxy is not None:
+            # The transport of a persistent proxy is marked as done once it is closed,
+            # for example because the robot restarted. Sending over it would fail.
+            transport = getattr(self._proxy, "transport", None)
+            if transport is not None and getattr(transport, "done", False):
+                self.close()
+        if self._proxy is None:
+            self._proxy = rospy.ServiceProxy(
+                self._name, self._service_class, persistent=True
+            )
+        return self._proxy
+
+
+def _failed_to_connect(error: Exception) -> bool:
+    """Wether a ServiceException was raised when setting up the connection,
+    which is before anything was sent to the robot.
+    """
+    return str(error).startswith("unable to connect to service")
+
 
 class HardwareRobobo(IRobobo):
     """The class to use to interact with the hardware Robobo
@@ -124,14 +247,54 @@ class HardwareRobobo(IRobobo):
         If None, it will try to see if ROS_XMLRPC_PORT is set, and use that.
         If that envoirement variable is not set, it will default to 45101
     logger: Callable[[str], None] = print -> The function to use for logging / printing.
+    history_size: int = 256 -> The amount of readings to remember per sensor,
+        for `read_irs_history`, `read_irs_since` and the likes.
+    image_grayscale: bool = False -> Wether to decode camera images as grayscale.
+        If True, images have shape (height, width) instead of (height, width, 3).
+    image_reduction: int = 1 -> Decode camera images at 1/2, 1/4 or 1/8 of their size,
+        by passing 2, 4 or 8. Decoding a smaller image is a lot faster.
+    adaptive_sensor_frequency: Optional[SensorFrequency] = None -> If passed (HIGH or MAX),
+        the sensor frequency is set to this while an action (like a move) is in progress,
+        and to LOW once the robot was idle for a second. This gives fresher readings
+        when they matter, while saving Wi-Fi bandwidth and battery otherwise.
+        The frequency is switched by a background thread, so actions don't wait for it.
+        If None, the sensor frequency is only changed by `set_sensor_frequency`.
+    coalesce_moves: bool = False -> Wether to send moves from a queue of one.
+        If True, `move` returns immediately, and the move is sent in the background.
+        A move that is replaced by a newer one before it was sent is dropped,
+        and counts as completed. This keeps controllers that send a lot of moves
+        from building up a backlog of moves that are already outdated.
+    recorder: Optional[SessionRecorder] = None -> If passed, every sensor message the robot
+        sends, and every completed action, is written to this recorder.
+        Wrap the robot in a `RecordingRobobo` to record the commands you send as well.
+    blob_colors: Sequence[BlobColor] = () -> The colors to let the phone detect blobs of,
+        which can be read with `read_blobs`. If empty, the blob detector is left alone.
+        Detecting blobs on the phone is a lot cheaper than sending camera images
+        and detecting them here, so you might not need the camera at all.
+    qr_codes: bool = False -> Wether to receive the QR codes the phone detects,
+        which can be read with `read_qr_codes`.
+    blockids: range = range(1, 768) -> The blockids this robot hands out for its actions.
+        Give robots ranges that don't overlap to tell their actions apart by blockid.
     """
 
+    # `wait` only waits for the message of the Robobo that the action is done.
+    _thread_safe_wait = True
+
     def __init__(
         self,
         camera=False,
         xmlrpc_port: Optional[int] = None,
         tcpros_port: Optional[int] = None,
         logger: Callable[[str], None] = rospy.loginfo,
+        history_size: int = 256,
+        image_grayscale: bool = False,
+        image_reduction: int = 1,
+        adaptive_sensor_frequency: Optional[SensorFrequency] = None,
+        coalesce_moves: bool = False,
+        recorder: Optional[SessionRecorder] = None,
+        blob_colors: Sequence[BlobColor] = (),
+        qr_codes: bool = False,
+        blockids: range = DEFAULT_BLOCKIDS,
     ) -> None:
         """This sets up the HardwareRobobo, and presumes everything is running
         So, it cannot be started up unless the Robobo is actually connected.
@@ -140,7 +303,13 @@ class HardwareRobobo(IRobobo):
         camera: bool - Whether or not to enable the camera
         """
         self._logger = logger
+        self._recorder = recorder
         self._enable_camera: bool = camera
+        if (image_grayscale, image_reduction) not in IMAGE_DECODE_FLAGS:
+            raise ValueError(
+                f"image_reduction should be 1, 2, 4 or 8, got {image_reduction}"
+            )
+        self._image_decode_flag = IMAGE_DECODE_FLAGS[(image_grayscale, image_reduction)]
 
         if xmlrpc_port is None:
             xmlrpc_port = int(os.getenv("ROS_XMLRPC_PORT", "45100"))
@@ -155,20 +324,56 @@ class HardwareRobobo(IRobobo):
         self._logger("Starting the Learning Machines robobo controller node")
 
         # Service Proxys
-        self._move_srv = rospy.ServiceProxy(MOVE_WHEELS_SERVICE, MoveWheels)
-        self._reset_wheels_src = rospy.ServiceProxy(WHEEL_RESET_SERVICE, ResetWheels)
-        self._pan_tilt_srv = rospy.ServiceProxy(PAN_TILT_SERVICE, MovePanTilt)
-        self._emotion_srv = rospy.ServiceProxy(SET_EMOTION_SERVICE, SetEmotion)
-        self._sound_emotion_srv = rospy.ServiceProxy(PLAY_EMOTION_SERVICE, PlaySound)
-        self._talk_srv = rospy.ServiceProxy(TALK_SERVICE, Talk)
-        self._leds_srv = rospy.ServiceProxy(SET_LED_SERVICE, SetLed)
+        # These keep their connections open, as setting one up takes longer than the call.
+        self._move_srv = PersistentServiceProxy(MOVE_WHEELS_SERVICE, MoveWheels)
+        self._reset_wheels_src = PersistentServiceProxy(
+            WHEEL_RESET_SERVICE, ResetWheels
+        )
+        self._pan_tilt_srv = PersistentServiceProxy(PAN_TILT_SERVICE, MovePanTilt)
+        self._emotion_srv = PersistentServiceProxy(SET_EMOTION_SERVICE, SetEmotion)
+        self._sound_emotion_srv = PersistentServiceProxy(
+            PLAY_EMOTION_SERVICE, PlaySound
+        )
+        self._talk_srv = PersistentServiceProxy(TALK_SERVICE, Talk)
+        self._leds_srv = PersistentServiceProxy(SET_LED_SERVICE, SetLed)
+        self._sensor_frequency_srv = PersistentServiceProxy(
+            SET_SENSOR_FREQUENCY_SERVICE, SetSensorFrequency
+        )
 
         # locking
-        self._used_pids: LockedSet[int] = LockedSet()
+        self._used_pids = BlockidAllocator(blockids)
+        # Set when the action with the blockid is completed, to wake up whoever waits for it
+        self._completed_events: Dict[int, threading.Event] = {}
+        # Notified whenever an action is completed, to wake up `wait_all`
+        self._completed_condition = threading.Condition()
         self._mvunlocksub = rospy.Subscriber(
             UNLOCK_MOVE_TOPIC, Int16, self._unlock_move_callback
         )
 
+        # The move waiting to be sent, as (arguments, blockid), if `coalesce_moves`
+        self._pending_move: Optional[Tuple[Tuple[Int8, Int8, Int32, Int16], int]] = None
+        self._pending_move_condition = threading.Condition()
+        if coalesce_moves:
+            self._move_sender: Optional[threading.Thread] = threading.Thread(
+                target=self._send_moves, daemon=True
+            )
+            self._move_sender.start()
+        else:
+            self._move_sender = None
+
+        # The frequency the sensors were last set to, None if they were never set.
+        self._sensor_frequency: Optional[SensorFrequency] = None
+        # Notified when actions start or complete, to wake up the thread switching the frequency
+        self._sensor_frequency_condition = threading.Condition()
+        self._adaptive_sensor_frequency = adaptive_sensor_frequency
+        if adaptive_sensor_frequency is not None:
+            self._sensor_frequency_switcher: Optional[
+                threading.Thread
+            ] = threading.Thread(target=self._switch_sensor_frequency, daemon=True)
+            self._sensor_frequency_switcher.start()
+        else:
+            self._sensor_frequency_switcher = None
+
         # Battery indicators are nice to have
         self._robot_battery_val = 100.0
         self._robot_battery_sub = rospy.Subscriber(
@@ -180,32 +385,83 @@ class HardwareRobobo(IRobobo):
         )
 
         # Sensor Receivers
-        self._irs_values = [0.0 for _ in range(8)]
+        # Every reading is kept in a history, together with the time it was received.
+        self._irs_history = SensorHistory(8, history_size)
         self._irsub = rospy.Subscriber(IRS_TOPIC, IRs, self._irs_callback)
 
-        self._pan = 0
+        self._pan_history = SensorHistory(1, history_size)
         self._pansub = rospy.Subscriber(PAN_TOPIC, Int16, self._pan_callback)
 
-        self._tilt = 0
+        self._tilt_history = SensorHistory(1, history_size)
         self._tiltsub = rospy.Subscriber(TILT_TOPIC, Int16, self._tilt_callback)
 
-        self._accel = Acceleration()
+        self._accel_history = SensorHistory(3, history_size)
         self._accelsub = rospy.Subscriber(ACCEL_TOPIC, Accel, self._accel_callback)
 
-        self._orient = Orientation()
+        self._orient_history = SensorHistory(3, history_size)
         self._orientsub = rospy.Subscriber(
             ORIENTATION_TOPIC, OrientationEuler, self._orient_callback
         )
 
-        self._wheelpos = WheelPosition()
+        self._wheelpos_history = SensorHistory(4, history_size)
         self._wheelsub = rospy.Subscriber(WHEEL_TOPIC, Wheels, self._wheelpos_callback)
 
+        self._histories: Dict[Sensor, SensorHistory] = {
+            Sensor.IRS: self._irs_history,
+            Sensor.ACCEL: self._accel_history,
+            Sensor.ORIENTATION: self._orient_history,
+            Sensor.WHEELS: self._wheelpos_history,
+            Sensor.PHONE_PAN: self._pan_history,
+            Sensor.PHONE_TILT: self._tilt_history,
+        }
+        # Notified whenever any reading arrives, to wake up `wait_for_fresh`
+        self._sample_condition = threading.Condition()
+        # When the last action was completed, in seconds since the epoch
+        self._last_completed_at = 0.0
+
         if self._enable_camera:
-            self._receiving_image_front = None
+            # The newest image decoded for `get_image_front`
+            self._image_front = LatestImage()
+            # When the image `get_image_front` returned last was decoded
+            self._image_front_returned_at = 0.0
+            # Set by `get_image_front` to ask the decoding thread for an image
+            self._image_front_wanted = False
+            # The streams started by `stream_images`, and the minimum time between images
+            self._image_streams: Dict[LatestImage, float] = {}
+            # Decoding images is slow, so it is done on a separate thread,
+            # to not hold up the other subscribers. The callback only keeps the newest
+            # compressed image, and the decoding thread decodes it when it is needed.
+            self._compressed_image_front: Optional[bytes] = None
+            self._compressed_image_condition = threading.Condition()
+            self._image_decoder = threading.Thread(
+                target=self._decode_images_front, daemon=True
+            )
+            self._image_decoder.start()
             self._image_subscribe_front = rospy.Subscriber(
                 IMAGE_TOPIC, CompressedImage, self._camera_callback_front, queue_size=1
             )
 
+        # Detections of the phone, by color and by text
+        self._blobs: Dict[str, Blob] = {}
+        self._blob_command_pub = rospy.Publisher(
+            SET_BLOB_COMMAND_TOPIC, SetBlobCommand, queue_size=1, latch=True
+        )
+        if blob_colors:
+            self.set_blob_detection(blob_colors)
+        self._blobsub = rospy.Subscriber(BLOB_TOPIC, BlobMessage, self._blob_callback)
+
+        self._qr_codes: Dict[str, QrCode] = {}
+        if qr_codes:
+            self._qr_code_sub = rospy.Subscriber(
+                QR_CODE_TOPIC, QrCodeMessage, self._qr_code_callback
+            )
+            self._qr_code_appear_sub = rospy.Subscriber(
+                QR_CODE_APPEAR_TOPIC, QrCodeChange, self._qr_code_appear_callback
+            )
+            self._qr_code_disappear_sub = rospy.Subscriber(
+                QR_CODE_DISAPPEAR_TOPIC, QrCodeChange, self._qr_code_disappear_callback
+            )
+
         self._logger("Succesfully initialised Learning Machines robobo controller node")
 
     def set_emotion(self, emotion: Emotion) -> None:
@@ -238,13 +494,24 @@ class HardwareRobobo(IRobobo):
         returns:
             the blockid
         """
-        if blockid in self._used_pids:
-            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
-        blockid = blockid if blockid is not None else self._first_unblocked()
-        self._used_pids.add(blockid)
-        self._move_srv(
-            Int8(left_speed), Int8(right_speed), Int32(millis), Int16(blockid)
-        )
+        blockid = self._used_pids.acquire(blockid)
+        self._completed_events[blockid] = threading.Event()
+        self._adapt_sensor_frequency()
+        arguments = (Int8(left_speed), Int8(right_speed), Int32(millis), Int16(blockid))
+        if self._move_sender is None:
+            try:
+                self._move_srv(*arguments)
+            except BaseException:
+                self._release_blockid(blockid)
+                raise
+            return blockid
+
+        with self._pending_move_condition:
+            replaced = self._pending_move
+            self._pending_move = (arguments, blockid)
+            self._pending_move_condition.notify()
+        if replaced is not None:
+            self._complete_action(replaced[1])
         return blockid
 
     def reset_wheels(self) -> None:
@@ -279,28 +546,95 @@ class HardwareRobobo(IRobobo):
         """
         self._leds_srv(String(selector.value), String(color.value))
 
-    def read_irs(self) -> List[Optional[float]]:
+    def set_sensor_frequency(self, frequency: SensorFrequency) -> None:
+        """Set how often the robot sends out the values of its sensors.
+        Higher frequencies give fresher readings, at the cost of bandwidth and battery.
+        If `adaptive_sensor_frequency` was passed, this is overwritten by the next action.
+
+        Arguments:
+        frequency: SensorFrequency
+        """
+        self._sensor_frequency_srv(Int8(frequency.value))
+        self._sensor_frequency = frequency
+
+    def read_irs(
+        self, out: Optional[NDArray[numpy.float64]] = None
+    ) -> Union[List[Optional[float]], NDArray[numpy.float64]]:
         """Returns sensor readings:
         [BackL, BackR, FrontL, FrontR, FrontC, FrontRR, BackC, FrontLL]
+
+        The readings are always from one message, even if a new one arrives while reading.
+
+        Arguments
+        out: An array of shape (8,) to write the readings into, see `IRobobo.read_irs`.
+            This does not allocate anything.
+        """
+        if out is not None:
+            return self._irs_history.latest_values(out)
+        return self._irs_history.latest_values().tolist()
+
+    def read_latest(
+        self, sensor: Sensor, out: Optional[NDArray[numpy.float64]] = None
+    ) -> NDArray[numpy.float64]:
+        """The newest reading of any sensor, as `[timestamp, value_0, value_1, ...]`.
+        The rows are the same as the ones of `read_irs_history` and the likes,
+        and, like `read_irs`, always from one message.
+
+        Arguments
+        sensor: the sensor to read.
+        out: An array of shape (1 + amount of values,) to write the reading into,
+            instead of allocating a new one.
         """
-        return self._irs_values
+        return self._histories[sensor].latest(out)
 
-    def get_image_front(self) -> NDArray[numpy.uint8]:
+    def read_irs_history(self, n: Optional[int] = None) -> NDArray[numpy.float64]:
+        """The last `n` IR readings that were received, oldest first, shape (n, 9).
+        Every row is `[timestamp, BackL, BackR, FrontL, FrontR, FrontC, FrontRR, BackC, FrontLL]`,
+        with the timestamp in seconds since the epoch, like `time.time()`.
+
+        Arguments
+        n: the amount of readings. If None, all remembered readings are returned.
+        """
+        return self._irs_history.last(n)
+
+    def read_irs_since(self, timestamp: float) -> NDArray[numpy.float64]:
+        """All remembered IR readings received after `timestamp` (like `time.time()`).
+        The rows are the same as the ones of `read_irs_history`.
+        """
+        return self._irs_history.since(timestamp)
+
+    def get_image_front(
+        self, out: Optional[NDArray[numpy.uint8]] = None, timeout: float = 5.0
+    ) -> NDArray[numpy.uint8]:
         """Get the image from the front camera as a numpy array in cv2 format.
 
         You can, for example, write this image to file with:
         https://docs.opencv.org/3.4/d4/da8/group__imgcodecs.html#gabbc7ef1aa2edfaa87772f1202d67e0ce
+
+        Arguments
+        out: An array of shape (height, width, 3) and dtype uint8 to write the image into.
+            (height, width) if `image_grayscale` was passed to the constructor.
+            If None, a new array is returned.
+        timeout: float = 5.0 - The maximum amount of seconds to wait for an image.
+
+        raises:
+            TimeoutError if the camera sent no new image in time.
         """
         if not self._enable_camera:
             raise ValueError("Camera is disabled")
 
-        # Retrieve last image from image topic
-        self._receiving_image_front = None
-        while self._receiving_image_front is None:
-            self.sleep(0.002)
-        image = self._receiving_image_front
-        self._receiving_image_front = None
-        return image
+        # Ask the decoding thread for an image newer than the one returned last.
+        with self._compressed_image_condition:
+            newer_than = self._image_front_returned_at
+            self._image_front_wanted = True
+        try:
+            image = self._image_front.get(newer_than=newer_than, timeout=timeout)
+        except TimeoutError:
+            raise TimeoutError(
+                f"The front camera sent no new image in {timeout} seconds"
+            ) from None
+        self._image_front_returned_at = self._image_front.received_at
+        return image if out is None else write_image(image, out)
 
     def set_phone_pan(
         self, pan_position: int, pan_speed: int, blockid: Optional[int] = None
@@ -321,18 +655,21 @@ class HardwareRobobo(IRobobo):
         returns:
             the blockid
         """
-        if blockid in self._used_pids:
-            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
-        blockid = blockid if blockid is not None else self._first_unblocked()
-        self._used_pids.add(blockid)
-        self._pan_tilt_srv(
-            Int16(pan_position),
-            Int8(pan_speed),
-            Int16(blockid),
-            Int16(0),
-            Int8(0),
-            Int16(0),
-        )
+        blockid = self._used_pids.acquire(blockid)
+        self._completed_events[blockid] = threading.Event()
+        self._adapt_sensor_frequency()
+        try:
+            self._pan_tilt_srv(
+                Int16(pan_position),
+                Int8(pan_speed),
+                Int16(blockid),
+                Int16(0),
+                Int8(0),
+                Int16(0),
+            )
+        except BaseException:
+            self._release_blockid(blockid)
+            raise
         return blockid
 
     def read_phone_pan(self) -> int:
@@ -341,7 +678,7 @@ class HardwareRobobo(IRobobo):
         For the hardware: This isn't guaranteed to be the same calibration as the movement,
         but unlikely to be more than one or two units off
         """
-        return self._pan
+        return int(self._pan_history.latest_values()[0])
 
     def set_phone_tilt(
         self, tilt_position: int, tilt_speed: int, blockid: Optional[int] = None
@@ -359,18 +696,21 @@ class HardwareRobobo(IRobobo):
         returns:
             the blockid
         """
-        if blockid in self._used_pids:
-            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
-        blockid = blockid if blockid is not None else self._first_unblocked()
-        self._used_pids.add(blockid)
-        self._pan_tilt_srv(
-            Int16(0),
-            Int8(0),
-            Int16(0),
-            Int16(tilt_position),
-            Int8(tilt_speed),
-            Int16(blockid),
-        )
+        blockid = self._used_pids.acquire(blockid)
+        self._completed_events[blockid] = threading.Event()
+        self._adapt_sensor_frequency()
+        try:
+            self._pan_tilt_srv(
+                Int16(0),
+                Int8(0),
+                Int16(0),
+                Int16(tilt_position),
+                Int8(tilt_speed),
+                Int16(blockid),
+            )
+        except BaseException:
+            self._release_blockid(blockid)
+            raise
         return blockid
 
     def read_phone_tilt(self) -> int:
@@ -379,19 +719,101 @@ class HardwareRobobo(IRobobo):
         For the hardware: This isn't guaranteed to be the same calibration as the movement,
         but unlikely to be more than one or two units off
         """
-        return self._tilt
+        return int(self._tilt_history.latest_values()[0])
 
     def read_accel(self) -> Acceleration:
         """Get the acceleration of the robot"""
-        return self._accel
+        x, y, z = self._accel_history.latest_values().tolist()
+        return Acceleration(x=x, y=y, z=z)
+
+    def read_accel_history(self, n: Optional[int] = None) -> NDArray[numpy.float64]:
+        """The last `n` acceleration readings, oldest first, shape (n, 4).
+        Every row is `[timestamp, x, y, z]`. See `read_irs_history`.
+        """
+        return self._accel_history.last(n)
+
+    def read_accel_since(self, timestamp: float) -> NDArray[numpy.float64]:
+        """All remembered acceleration readings received after `timestamp`.
+        See `read_accel_history`.
+        """
+        return self._accel_history.since(timestamp)
 
     def read_orientation(self) -> Orientation:
         """Get the orientation of the robot"""
-        return self._orient
+        yaw, pitch, roll = self._orient_history.latest_values().tolist()
+        return Orientation(yaw=yaw, pitch=pitch, roll=roll)
+
+    def read_orientation_history(
+        self, n: Optional[int] = None
+    ) -> NDArray[numpy.float64]:
+        """The last `n` orientation readings, oldest first, shape (n, 4).
+        Every row is `[timestamp, yaw, pitch, roll]`. See `read_irs_history`.
+        """
+        return self._orient_history.last(n)
+
+    def read_orientation_since(self, timestamp: float) -> NDArray[numpy.float64]:
+        """All remembered orientation readings received after `timestamp`.
+        See `read_orientation_history`.
+        """
+        return self._orient_history.since(timestamp)
 
     def read_wheels(self) -> WheelPosition:
         """Get the wheel orientation and speed of the robot"""
-        return self._wheelpos
+        pos_r, pos_l, speed_r, speed_l = self._wheelpos_history.latest_values().tolist()
+        return WheelPosition(
+            wheel_pos_r=pos_r,
+            wheel_pos_l=pos_l,
+            wheel_speed_r=speed_r,
+            wheel_speed_l=speed_l,
+        )
+
+    def read_wheels_history(self, n: Optional[int] = None) -> NDArray[numpy.float64]:
+        """The last `n` wheel readings, oldest first, shape (n, 5). Every row is
+        `[timestamp, wheel_pos_r, wheel_pos_l, wheel_speed_r, wheel_speed_l]`.
+        See `read_irs_history`.
+        """
+        return self._wheelpos_history.last(n)
+
+    def read_wheels_since(self, timestamp: float) -> NDArray[numpy.float64]:
+        """All remembered wheel readings received after `timestamp`.
+        See `read_wheels_history`.
+        """
+        return self._wheelpos_history.since(timestamp)
+
+    def set_blob_detection(self, colors: Sequence[BlobColor]) -> None:
+        """Set which colors the phone detects blobs of. Pass no colors to stop detecting.
+
+        Arguments:
+        colors: Sequence[BlobColor] - The colors to detect.
+        """
+        self._blob_command_pub.publish(
+            SetBlobCommand(
+                red=BlobColor.RED in colors,
+                green=BlobColor.GREEN in colors,
+                blue=BlobColor.BLUE in colors,
+                custom=BlobColor.CUSTOM in colors,
+            )
+        )
+
+    def read_blobs(self, max_age: Optional[float] = None) -> List[Blob]:
+        """Get the newest detected blob of every color.
+        The phone only detects the colors passed to `blob_colors` or `set_blob_detection`.
+
+        Arguments:
+        max_age: Optional[float] - Leave out blobs that were detected longer
+            than this many seconds ago. If None, all are returned.
+        """
+        return self._fresh(list(self._blobs.values()), max_age)
+
+    def read_qr_codes(self, max_age: Optional[float] = None) -> List[QrCode]:
+        """Get the QR codes the phone currently sees, if `qr_codes` was passed.
+        A code is forgotten as soon as the phone reports it has disappeared.
+
+        Arguments:
+        max_age: Optional[float] - Leave out codes that were last seen longer
+            than this many seconds ago. If None, all are returned.
+        """
+        return self._fresh(list(self._qr_codes.values()), max_age)
 
     def read_phone_battery(self) -> float:
         """Get the battety percentage of the phone
@@ -415,6 +837,58 @@ class HardwareRobobo(IRobobo):
         """
         return self._robot_battery_val
 
+    @property
+    def recorder(self) -> Optional[SessionRecorder]:
+        """The recorder this writes every sensor message and completed action to, if any"""
+        return self._recorder
+
+    @property
+    def recorded_kinds(self) -> FrozenSet[RecordKind]:
+        """The kinds of records this writes to its recorder itself.
+        A `RecordingRobobo` with the same recorder skips these, to not record them twice.
+        """
+        if self._recorder is None:
+            return frozenset()
+        return frozenset(SENSOR_KINDS.values()) | {RecordKind.COMPLETED}
+
+    def read_stamp(self, sensor: Sensor) -> SampleStamp:
+        """Get when the newest reading of a sensor was received.
+        The timestamp is in seconds since the epoch, like `time.time()`.
+        """
+        timestamp, sequence = self._histories[sensor].stamp()
+        return SampleStamp(timestamp, sequence)
+
+    def wait_for_fresh(
+        self,
+        sensor: Sensor,
+        after: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """Wait untill a reading of the sensor is received at or after `after`.
+        This returns as soon as the reading arrives, so it is both faster and more reliable
+        than sleeping for a fixed amount of time.
+
+        Keep in mind the robot only sends a reading when it changes,
+        so if the robot is not moving, no fresh reading might come at all.
+
+        Arguments:
+        sensor: Sensor - The sensor to wait for.
+        after: Optional[float] - A timestamp, like `time.time()`.
+            If None, the time the last action (like a move) was completed is used.
+        timeout: Optional[float] - the maximum amount of seconds to wait.
+            If None, wait indefinetly.
+
+        returns:
+            Whether there is a fresh reading. False if the timeout passed first.
+        """
+        if after is None:
+            after = self._last_completed_at
+        history = self._histories[sensor]
+        with self._sample_condition:
+            return self._sample_condition.wait_for(
+                lambda: history.stamp()[0] >= after, timeout
+            )
+
     def sleep(self, seconds: float) -> None:
         """Block for a an amount of seconds.
         How to do this depends on the kind of robot, and so is to be found here.
@@ -431,57 +905,274 @@ class HardwareRobobo(IRobobo):
 
     def block(self) -> None:
         """Block untill (e.g. only return once) all blocking actions are completed"""
-        while len(self._used_pids):
-            self.sleep(0.002)
+        self.wait_all()
+
+    def wait(self, blockid: int, timeout: Optional[float] = None) -> bool:
+        """Wait untill the action with the given blockid is completed.
+        This wakes up as soon as the Robobo reports that the action is done.
+
+        Arguments:
+        blockid: the id to wait for
+        timeout: the maximum amount of seconds to wait. If None, wait indefinetly.
+
+        returns:
+            Whether the action is completed. False if the timeout passed first.
+        """
+        event = self._completed_events.get(blockid)
+        if event is not None:
+            return event.wait(timeout)
+        with self._completed_condition:
+            return self._completed_condition.wait_for(
+                lambda: blockid not in self._used_pids, timeout
+            )
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """Wait untill all blocking actions are completed.
+        This wakes up as soon as the Robobo reports that the last action is done.
+
+        Arguments:
+        timeout: the maximum amount of seconds to wait. If None, wait indefinetly.
+
+        returns:
+            Whether all actions are completed. False if the timeout passed first.
+        """
+        with self._completed_condition:
+            return self._completed_condition.wait_for(
+                lambda: not self._used_pids, timeout
+            )
 
     def _irs_callback(self, ros_data: IRs) -> None:
-        self._irs_values = [
-            ros_data.BackL.range,
-            ros_data.BackR.range,
-            ros_data.FrontL.range,
-            ros_data.FrontR.range,
-            ros_data.FrontC.range,
-            ros_data.FrontRR.range,
-            ros_data.BackC.range,
-            ros_data.FrontLL.range,
-        ]
+        self._receive(
+            self._irs_history,
+            RecordKind.IRS,
+            (
+                ros_data.BackL.range,
+                ros_data.BackR.range,
+                ros_data.FrontL.range,
+                ros_data.FrontR.range,
+                ros_data.FrontC.range,
+                ros_data.FrontRR.range,
+                ros_data.BackC.range,
+                ros_data.FrontLL.range,
+            ),
+        )
 
     def _camera_callback_front(self, ros_data: CompressedImage):
-        if self._receiving_image_front is None:
-            np_arr = numpy.fromstring(ros_data.data, numpy.uint8)
-            image_np = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-            self._receiving_image_front = cv2.flip(image_np, 1)
+        with self._compressed_image_condition:
+            self._compressed_image_front = ros_data.data
+            self._compressed_image_condition.notify()
+
+    def _decode_images_front(self) -> None:
+        """The loop of the thread decoding the images of the front camera"""
+        while True:
+            with self._compressed_image_condition:
+                while self._compressed_image_front is None:
+                    self._compressed_image_condition.wait()
+                data = self._compressed_image_front
+                self._compressed_image_front = None
+                # Taken together with the image, so a request made after this
+                # is served by the next image.
+                wanted = self._image_front_wanted
+                self._image_front_wanted = False
+
+            now = time.monotonic()
+            streams = [
+                latest
+                for latest, interval in list(self._image_streams.items())
+                if now - latest.received_at >= interval
+            ]
+            if not wanted and not streams:
+                continue
+
+            np_arr = numpy.frombuffer(data, numpy.uint8)
+            image_np = cv2.imdecode(np_arr, self._image_decode_flag)
+            image = cv2.flip(image_np, 1)
+            # Also when not asked for, as `get_image_front` returns any image newer than its last.
+            self._image_front.put(image)
+            for latest in streams:
+                latest.put(image)
+
+    def _start_image_stream(
+        self, latest: LatestImage, max_fps: Optional[float]
+    ) -> Callable[[], None]:
+        if not self._enable_camera:
+            raise ValueError("Camera is disabled")
+
+        # The images are already decoded on a separate thread,
+        # so all there is to do is to make it hand them to this stream as well.
+        self._image_streams[latest] = 1 / max_fps if max_fps is not None else 0.0
+        return lambda: self._image_streams.pop(latest, None)
 
     def _pan_callback(self, ros_data: Int16) -> None:
-        self._pan = ros_data.data
+        self._receive(self._pan_history, RecordKind.PHONE_PAN, (ros_data.data,))
 
     def _tilt_callback(self, ros_data: Int16) -> None:
-        self._tilt = ros_data.data
+        self._receive(self._tilt_history, RecordKind.PHONE_TILT, (ros_data.data,))
 
     def _accel_callback(self, ros_data: Accel) -> None:
-        self._accel = Acceleration(
-            x=ros_data.linear.x,
-            y=ros_data.linear.y,
-            z=ros_data.linear.z,
+        self._receive(
+            self._accel_history,
+            RecordKind.ACCEL,
+            (ros_data.linear.x, ros_data.linear.y, ros_data.linear.z),
         )
 
     def _orient_callback(self, ros_data: OrientationEuler) -> None:
-        self._orient = Orientation(
-            yaw=ros_data.yaw.data,
-            pitch=ros_data.pitch.data,
-            roll=ros_data.roll.data,
+        self._receive(
+            self._orient_history,
+            RecordKind.ORIENTATION,
+            (ros_data.yaw.data, ros_data.pitch.data, ros_data.roll.data),
         )
 
     def _wheelpos_callback(self, ros_data: Wheels) -> None:
-        self._wheelpos = WheelPosition(
-            wheel_pos_r=ros_data.wheelPosR.data,
-            wheel_pos_l=ros_data.wheelPosL.data,
-            wheel_speed_r=ros_data.wheelSpeedR.data,
-            wheel_speed_l=ros_data.wheelSpeedL.data,
+        self._receive(
+            self._wheelpos_history,
+            RecordKind.WHEELS,
+            (
+                ros_data.wheelPosR.data,
+                ros_data.wheelPosL.data,
+                ros_data.wheelSpeedR.data,
+                ros_data.wheelSpeedL.data,
+            ),
+        )
+
+    def _receive(
+        self, history: SensorHistory, kind: RecordKind, values: Tuple[float, ...]
+    ) -> None:
+        """Keep a reading of a sensor, and record it if there is a recorder"""
+        timestamp = time.time()
+        history.append(timestamp, values)
+        if self._recorder is not None:
+            self._recorder.record(kind, values, timestamp)
+        with self._sample_condition:
+            self._sample_condition.notify_all()
+
+    def _blob_callback(self, ros_data: BlobMessage) -> None:
+        color = ros_data.color.data
+        self._blobs[color] = Blob(
+            color=color,
+            size=ros_data.size.data,
+            x=ros_data.center.x,
+            y=ros_data.center.y,
+            timestamp=time.time(),
+        )
+
+    def _qr_code_callback(self, ros_data: QrCodeMessage) -> None:
+        self._qr_codes[ros_data.text] = QrCode(
+            text=ros_data.text,
+            distance=ros_data.distance,
+            x=ros_data.center.x,
+            y=ros_data.center.y,
+            timestamp=time.time(),
         )
 
+    def _qr_code_appear_callback(self, ros_data: QrCodeChange) -> None:
+        self._qr_codes[ros_data.id] = QrCode(
+            text=ros_data.id,
+            distance=ros_data.distance,
+            x=ros_data.center.x,
+            y=ros_data.center.y,
+            timestamp=time.time(),
+        )
+
+    def _qr_code_disappear_callback(self, ros_data: QrCodeChange) -> None:
+        self._qr_codes.pop(ros_data.id, None)
+
+    @staticmethod
+    def _fresh(
+        detections: List[Detection], max_age: Optional[float]
+    ) -> List[Detection]:
+        """Leave out the detections (Blobs or QrCodes) older than `max_age` seconds"""
+        if max_age is None:
+            return detections
+        oldest = time.time() - max_age
+        return [detection for detection in detections if detection.timestamp >= oldest]
+
     def _unlock_move_callback(self, ros_data: Int16) -> None:
-        self._used_pids.discard(ros_data.data)
+        if self._recorder is not None:
+            self._recorder.record(RecordKind.COMPLETED, (ros_data.data,), time.time())
+        self._complete_action(ros_data.data)
+
+    def _complete_action(self, blockid: int) -> None:
+        """Mark the action with the blockid as completed, and wake up whoever waits for it"""
+        self._last_completed_at = time.time()
+        with self._completed_condition:
+            self._used_pids.discard(blockid)
+            event = self._completed_events.pop(blockid, None)
+            if event is not None:
+                event.set()
+            self._completed_condition.notify_all()
+        self._adapt_sensor_frequency()
+
+    def _release_blockid(self, blockid: int) -> None:
+        """Give back the blockid of an action that failed to start.
+        Unlike `_complete_action`, nobody can be waiting for the action itself yet.
+        """
+        with self._completed_condition:
+            self._used_pids.discard(blockid)
+            self._completed_events.pop(blockid, None)
+            self._completed_condition.notify_all()
+        self._adapt_sensor_frequency()
+
+    def _send_moves(self) -> None:
+        """The loop of the thread sending moves, if `coalesce_moves` was passed.
+        While a move is being sent, newer moves replace each other in `_pending_move`,
+        so only the newest one is sent next.
+        """
+        while True:
+            with self._pending_move_condition:
+                while self._pending_move is None:
+                    self._pending_move_condition.wait()
+                arguments, blockid = self._pending_move
+                self._pending_move = None
+            try:
+                self._move_srv(*arguments)
+            except Exception as e:
+                self._logger(f"Failed to send move {blockid}: {e}")
+                self._complete_action(blockid)
+
+    def _adapt_sensor_frequency(self) -> None:
+        """Wake up the thread switching the sensor frequency, as actions started or completed.
+        Does nothing if `adaptive_sensor_frequency` wasn't passed.
+        """
+        if self._sensor_frequency_switcher is None:
+            return
+        with self._sensor_frequency_condition:
+            self._sensor_frequency_condition.notify()
+
+    def _switch_sensor_frequency(self) -> None:
+        """The loop of the thread switching the sensor frequency, if `adaptive_sensor_frequency`
+        was passed. The frequency is set to the adaptive one as soon as an action is in progress,
+        and only back to LOW once the robot was idle for SENSOR_FREQUENCY_IDLE_DELAY seconds.
+        """
+        idle_since: Optional[float] = None
+        while True:
+            with self._sensor_frequency_condition:
+                timeout: Optional[float] = None
+                if self._used_pids:
+                    idle_since = None
+                    wanted = self._adaptive_sensor_frequency
+                elif self._sensor_frequency is None:
+                    wanted = SensorFrequency.LOW
+                else:
+                    now = time.monotonic()
+                    if idle_since is None:
+                        idle_since = now
+                    timeout = idle_since + SENSOR_FREQUENCY_IDLE_DELAY - now
+                    wanted = (
+                        SensorFrequency.LOW if timeout <= 0 else self._sensor_frequency
+                    )
+                if wanted == self._sensor_frequency:
+                    self._sensor_frequency_condition.wait(
+                        None if timeout is None or timeout <= 0 else timeout
+                    )
+                    continue
+            try:
+                self.set_sensor_frequency(wanted)
+            except Exception as e:
+                self._logger(
+                    f"Failed to set the sensor frequency to {wanted.name}: {e}"
+                )
+                time.sleep(SENSOR_FREQUENCY_IDLE_DELAY)
 
     def _phone_battery_callback(self, ros_data: Int8) -> None:
         self._phone_battery_val = ros_data.data
@@ -0,0 +1,448 @@
+import os
+import mmap
+import time
+import threading
+from pathlib import Path
+
+import numpy
+
+from robobo_interface.base import IRobobo
+from robobo_interface.recording import (
+    LOG_MAGIC,
+    RECORD_HEADER,
+    IMAGE_HEADER,
+    TEXT_KINDS,
+    SENSOR_KINDS,
+    RecordKind,
+)
+from robobo_interface.datatypes import (
+    Emotion,
+    LedColor,
+    LedId,
+    Acceleration,
+    Orientation,
+    WheelPosition,
+    SoundEmotion,
+    SensorFrequency,
+    Sensor,
+    SampleStamp,
+)
+from robobo_interface.utils import BlockidAllocator, LatestImage, write_image
+
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from numpy.typing import NDArray
+
+# How often (in real seconds) the image stream of a replay checks for a newer image.
+STREAM_POLL_INTERVAL = 0.01
+
+
+class SessionLog:
+    """A session log written by a `SessionRecorder`, memory-mapped for reading.
+
+    Opening the log reads only the headers of the records, to index them by kind.
+    The values themselves are read from the memory-mapped file when asked for,
+    so opening a log of many gigabytes of images is still fast.
+
+    Arguments:
+    path: Union[str, Path] -> The file to read.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self._path = Path(path)
+        with open(self._path, "rb") as file:
+            # mmap can't map an empty file, and a file without the magic isn't a log anyway
+            if os.fstat(file.fileno()).st_size < len(LOG_MAGIC):
+                raise ValueError(f"{self._path} is not a session log")
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(LOG_MAGIC)] != LOG_MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{self._path} is not a session log")
+
+        times: Dict[RecordKind, List[float]] = {kind: [] for kind in RecordKind}
+        offsets: Dict[RecordKind, List[int]] = {kind: [] for kind in RecordKind}
+        lengths: Dict[RecordKind, List[int]] = {kind: [] for kind in RecordKind}
+        # When each action with a blockid completed, by kind and index of the command
+        durations: Dict[RecordKind, Dict[int, float]] = {
+            kind: {} for kind in RecordKind
+        }
+        pending: Dict[int, Tuple[RecordKind, int, float]] = {}
+
+        offset = len(LOG_MAGIC)
+        size = len(self._mmap)
+        # A record that is cut off (because the recording crashed) is ignored
+        while offset + RECORD_HEADER.size <= size:
+            timestamp, kind_value, _, length = RECORD_HEADER.unpack_from(
+                self._mmap, offset
+            )
+            payload = offset + RECORD_HEADER.size
+            if payload + length > size:
+                break
+            kind = RecordKind(kind_value)
+            times[kind].append(timestamp)
+            offsets[kind].append(payload)
+            lengths[kind].append(length)
+            if kind in (
+                RecordKind.MOVE,
+                RecordKind.SET_PHONE_PAN,
+                RecordKind.SET_PHONE_TILT,
+            ):
+                blockid = int(self._floats(payload, length)[-1])
+                pending[blockid] = (kind, len(times[kind]) - 1, timestamp)
+            elif kind == RecordKind.COMPLETED:
+                blockid = int(self._floats(payload, length)[0])
+                if blockid in pending:
+                    command, index, sent_at = pending.pop(blockid)
+                    durations[command][index] = timestamp - sent_at
+            offset = payload + length + (-length % 8)
+
+        self._times = {
+            kind: numpy.array(times[kind], dtype=numpy.float64) for kind in RecordKind
+        }
+        self._offsets = {kind: offsets[kind] for kind in RecordKind}
+        self._lengths = {kind: lengths[kind] for kind in RecordKind}
+        self._durations = durations
+        all_times = [t for kind_times in times.values() for t in kind_times]
+        self._start = min(all_times, default=0.0)
+        self._end = max(all_times, default=0.0)
+
+    @property
+    def path(self) -> Path:
+        """The file of the log"""
+        return self._path
+
+    @property
+    def start(self) -> float:
+        """The timestamp of the first record"""
+        return self._start
+
+    @property
+    def end(self) -> float:
+        """The timestamp of the last record"""
+        return self._end
+
+    def close(self) -> None:
+        """Unmap the file.
+        This is only possible once the arrays returned by `values` and `image` are gone.
+        """
+        self._mmap.close()
+
+    def count(self, kind: RecordKind) -> int:
+        """The amount of records of a kind"""
+        return len(self._offsets[kind])
+
+    def times(self, kind: RecordKind) -> NDArray[numpy.float64]:
+        """The timestamps of all records of a kind, in the order they were recorded"""
+        return self._times[kind]
+
+    def index_at(self, kind: RecordKind, timestamp: float) -> Optional[int]:
+        """The index of the newest record of a kind that is not newer than `timestamp`.
+        If all records of this kind are newer, the first one is used.
+        None if there are no records of this kind at all.
+        """
+        if not self._offsets[kind]:
+            return None
+        index = int(numpy.searchsorted(self._times[kind], timestamp, side="right")) - 1
+        return max(index, 0)
+
+    def values(self, kind: RecordKind, index: int) -> NDArray[numpy.float64]:
+        """The values of a record of numeric values, read directly from the file"""
+        return self._floats(self._offsets[kind][index], self._lengths[kind][index])
+
+    def series(self, kind: RecordKind) -> Tuple[NDArray[numpy.float64], NDArray]:
+        """All records of a numeric kind at once, for offline analysis.
+
+        returns:
+            The timestamps, shape (n,), and the values, shape (n, width)
+        """
+        values = [self.values(kind, index) for index in range(self.count(kind))]
+        if not values:
+            return self._times[kind], numpy.empty((0, 0), dtype=numpy.float64)
+        return self._times[kind], numpy.stack(values)
+
+    def text(self, kind: RecordKind, index: int) -> str:
+        """The text of a record of a text kind, like TALK"""
+        if kind not in TEXT_KINDS:
+            raise ValueError(f"Records of kind {kind} don't contain text")
+        offset = self._offsets[kind][index]
+        return self._mmap[offset : offset + self._lengths[kind][index]].decode("utf-8")
+
+    def image(self, index: int) -> NDArray[numpy.uint8]:
+        """An image of the front camera, read directly from the file.
+        The returned array is read-only.
+        """
+        offset = self._offsets[RecordKind.IMAGE][index]
+        height, width, channels, _ = IMAGE_HEADER.unpack_from(self._mmap, offset)
+        pixels = numpy.frombuffer(
+            self._mmap,
+            dtype=numpy.uint8,
+            count=height * width * channels,
+            offset=offset + IMAGE_HEADER.size,
+        )
+        if channels == 1:
+            return pixels.reshape((height, width))
+        return pixels.reshape((height, width, channels))
+
+    def duration(self, kind: RecordKind, index: int) -> Optional[float]:
+        """How long the action of a command record took to complete.
+        None if its completion was not recorded.
+        """
+        return self._durations[kind].get(index)
+
+    def _floats(self, offset: int, length: int) -> NDArray[numpy.float64]:
+        return numpy.frombuffer(
+            self._mmap, dtype="<f8", count=length // 8, offset=offset
+        )
+
+
+class ReplayRobobo(IRobobo):
+    """A robot that plays back a session log, written by a `SessionRecorder`,
+    instead of talking to an actual robot.
+
+    Reading a sensor returns the newest recorded reading at the current time of the replay,
+    which starts at the start of the log. Commands are not sent anywhere,
+    but actions do take time: a move takes as long as its `millis`,
+    and a pan or tilt takes as long as the closest recorded one took.
+
+    This makes it possible to run a controller against recorded data,
+    for example to profile or debug it, without the robot.
+
+    Arguments you should understand:
+    path: Union[str, Path] -> The session log to play back.
+
+    Arguments you only have to understand if you want to do advanced stuff:
+    speed: Optional[float] = None -> How much faster than real time to play back.
+        If None, time only passes when the controller sleeps or waits for an action,
+        which makes the replay deterministic, and as fast as your code.
+    """
+
+    def __init__(self, path: Union[str, Path], speed: Optional[float] = None):
+        if speed is not None and speed <= 0:
+            raise ValueError(f"The speed of a replay should be positive, got {speed}")
+        self._log = SessionLog(path)
+        self._speed = speed
+        self._time = self._log.start
+        self._started_at = time.monotonic()
+
+        self._used_pids = BlockidAllocator()
+        self._block_ends: Dict[int, float] = {}
+        self._last_completed_at = self._log.start
+
+    @property
+    def log(self) -> SessionLog:
+        """The session log that is played back"""
+        return self._log
+
+    def get_time(self) -> float:
+        """The current time of the replay, in the time of the log"""
+        if self._speed is None:
+            return self._time
+        return self._log.start + (time.monotonic() - self._started_at) * self._speed
+
+    def is_finished(self) -> bool:
+        """Whether the replay is past the last record of the log"""
+        return self.get_time() > self._log.end
+
+    def close(self) -> None:
+        """Close the log file"""
+        self._log.close()
+
+    def set_emotion(self, emotion: Emotion) -> None:
+        pass
+
+    def move(
+        self,
+        left_speed: int,
+        right_speed: int,
+        millis: int,
+        blockid: Optional[int] = None,
+    ) -> int:
+        return self._start_action(millis / 1000, blockid)
+
+    def reset_wheels(self) -> None:
+        pass
+
+    def talk(self, message: str) -> None:
+        pass
+
+    def play_emotion_sound(self, emotion: SoundEmotion) -> None:
+        pass
+
+    def set_led(self, selector: LedId, color: LedColor) -> None:
+        pass
+
+    def set_sensor_frequency(self, frequency: SensorFrequency) -> None:
+        pass
+
+    def read_irs(
+        self, out: Optional[NDArray[numpy.float64]] = None
+    ) -> Union[List[Optional[float]], NDArray[numpy.float64]]:
+        if out is not None:
+            numpy.copyto(out, self._read(RecordKind.IRS))
+            return out
+        return [
+            None if numpy.isnan(value) else value
+            for value in self._read(RecordKind.IRS).tolist()
+        ]
+
+    def get_image_front(
+        self, out: Optional[NDArray[numpy.uint8]] = None
+    ) -> NDArray[numpy.uint8]:
+        index = self._log.index_at(RecordKind.IMAGE, self.get_time())
+        if index is None:
+            raise ValueError(f"{self._log.path} contains no images")
+        return write_image(self._log.image(index), out)
+
+    def set_phone_pan(
+        self, pan_position: int, pan_speed: int, blockid: Optional[int] = None
+    ) -> int:
+        return self._start_action(
+            self._recorded_duration(RecordKind.SET_PHONE_PAN), blockid
+        )
+
+    def read_phone_pan(self) -> int:
+        return int(self._read(RecordKind.PHONE_PAN)[0])
+
+    def set_phone_tilt(
+        self, tilt_position: int, tilt_speed: int, blockid: Optional[int] = None
+    ) -> int:
+        return self._start_action(
+            self._recorded_duration(RecordKind.SET_PHONE_TILT), blockid
+        )
+
+    def read_phone_tilt(self) -> int:
+        return int(self._read(RecordKind.PHONE_TILT)[0])
+
+    def read_accel(self) -> Acceleration:
+        return Acceleration.from_array(self._read(RecordKind.ACCEL))
+
+    def read_orientation(self) -> Orientation:
+        return Orientation.from_array(self._read(RecordKind.ORIENTATION))
+
+    def read_wheels(self) -> WheelPosition:
+        return WheelPosition.from_array(self._read(RecordKind.WHEELS))
+
+    def read_stamp(self, sensor: Sensor) -> SampleStamp:
+        kind = SENSOR_KINDS[sensor]
+        index = self._log.index_at(kind, self.get_time())
+        if index is None:
+            return SampleStamp()
+        return SampleStamp(float(self._log.times(kind)[index]), index + 1)
+
+    def wait_for_fresh(
+        self,
+        sensor: Sensor,
+        after: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """Advance the replay to the first recorded reading of the sensor at or after `after`.
+        Returns False if there is no such reading, or if it is more than `timeout` away.
+        """
+        self._release_completed()
+        if after is None:
+            after = self._last_completed_at
+        times = self._log.times(SENSOR_KINDS[sensor])
+        index = int(numpy.searchsorted(times, after, side="left"))
+        now = self.get_time()
+        deadline = None if timeout is None else now + timeout
+        if index == len(times):
+            if deadline is not None:
+                self._advance_to(deadline)
+            return False
+        if deadline is not None and times[index] > deadline:
+            self._advance_to(deadline)
+            return False
+        self._advance_to(times[index])
+        return True
+
+    def sleep(self, seconds: float) -> None:
+        self._advance_to(self.get_time() + seconds)
+
+    def is_blocked(self, blockid: int) -> bool:
+        self._release_completed()
+        return blockid in self._used_pids
+
+    def block(self) -> None:
+        self.wait_all()
+
+    def wait(self, blockid: int, timeout: Optional[float] = None) -> bool:
+        end = self._block_ends.get(blockid)
+        if end is not None:
+            if timeout is not None:
+                end = min(end, self.get_time() + timeout)
+            self._advance_to(end)
+        return not self.is_blocked(blockid)
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        ends = list(self._block_ends.values())
+        if ends:
+            end = max(ends)
+            if timeout is not None:
+                end = min(end, self.get_time() + timeout)
+            self._advance_to(end)
+        self._release_completed()
+        return not self._used_pids
+
+    def _start_image_stream(
+        self, latest: LatestImage, max_fps: Optional[float]
+    ) -> Callable[[], None]:
+        if self._log.count(RecordKind.IMAGE) == 0:
+            raise ValueError(f"{self._log.path} contains no images")
+
+        stopped = threading.Event()
+        interval = 1 / max_fps if max_fps is not None else 0.0
+
+        def stream() -> None:
+            # Put an image whenever the replay reaches a newer one,
+            # but no more often than `max_fps` per second of replay time.
+            last_index = None
+            last_put = -float("inf")
+            while not stopped.is_set():
+                now = self.get_time()
+                index = self._log.index_at(RecordKind.IMAGE, now)
+                if index != last_index and now - last_put >= interval:
+                    latest.put(write_image(self._log.image(index)))
+                    last_index = index
+                    last_put = now
+                stopped.wait(STREAM_POLL_INTERVAL)
+
+        threading.Thread(target=stream, daemon=True).start()
+        return stopped.set
+
+    def _read(self, kind: RecordKind) -> NDArray[numpy.float64]:
+        index = self._log.index_at(kind, self.get_time())
+        if index is None:
+            raise ValueError(f"{self._log.path} contains no records of {kind}")
+        return self._log.values(kind, index)
+
+    def _recorded_duration(self, kind: RecordKind) -> float:
+        """How long the recorded command of this kind that is closest to now took"""
+        times = self._log.times(kind)
+        if len(times) == 0:
+            return 0.0
+        index = int(numpy.abs(times - self.get_time()).argmin())
+        duration = self._log.duration(kind, index)
+        return duration if duration is not None else 0.0
+
+    def _start_action(self, duration: float, blockid: Optional[int]) -> int:
+        self._release_completed()
+        blockid = self._used_pids.acquire(blockid)
+        self._block_ends[blockid] = self.get_time() + duration
+        return blockid
+
+    def _release_completed(self) -> None:
+        now = self.get_time()
+        completed = self._used_pids.drain_completed(
+            lambda blockid: self._block_ends.get(blockid, now) <= now
+        )
+        for blockid in completed:
+            end = self._block_ends.pop(blockid, now)
+            self._last_completed_at = max(self._last_completed_at, end)
+
+    def _advance_to(self, timestamp: float) -> None:
+        now = self.get_time()
+        if timestamp <= now:
+            return
+        if self._speed is None:
+            self._time = timestamp
+        else:
+            time.sleep((timestamp - now) / self._speed)
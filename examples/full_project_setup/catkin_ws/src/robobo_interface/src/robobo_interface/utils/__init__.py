@@ -1,3 +1,14 @@
 from .sets import LockedSet
+from .blockids import BlockidAllocator, DEFAULT_BLOCKIDS
+from .images import ImageRing, LatestImage, write_image
+from .history import SensorHistory
 
-__all__ = ("LockedSet",)
+__all__ = (
+    "LockedSet",
+    "BlockidAllocator",
+    "DEFAULT_BLOCKIDS",
+    "ImageRing",
+    "LatestImage",
+    "write_image",
+    "SensorHistory",
+)
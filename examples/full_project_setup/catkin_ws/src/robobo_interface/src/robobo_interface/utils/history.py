@@ -0,0 +1,159 @@
+import time
+import threading
+
+import numpy
+
+from typing import Optional, Sequence, Tuple
+from numpy.typing import NDArray
+
+
+class SensorHistory:
+    """A fixed-size ring buffer of timestamped sensor readings, backed by one numpy array.
+
+    Every sample is a row of `[timestamp, value_0, value_1, ...]`.
+    Nothing is allocated when adding a sample, and once the buffer is full,
+    the oldest sample is overwritten. It is safe to add samples from one thread
+    (for example, the one of a ROS subscriber) while reading them from another.
+
+    Reading the newest sample doesn't take the lock, but works like a seqlock:
+    the version goes up before and after every write, and a read that saw
+    the version change (or saw a write in progress) is done again.
+    So these reads never hold up the thread adding samples, and never return
+    a sample that is half old and half new.
+
+    Arguments:
+    width: int -> The amount of values per sample, without the timestamp.
+    capacity: int -> The amount of samples to keep.
+    """
+
+    def __init__(self, width: int, capacity: int):
+        if capacity < 1:
+            raise ValueError(
+                f"A SensorHistory needs a capacity of at least 1, got {capacity}"
+            )
+        self._samples = numpy.zeros((capacity, width + 1), dtype=numpy.float64)
+        self._capacity = capacity
+        self._next = 0
+        self._count = 0
+        self._sequence = 0
+        # Odd while a sample is being written
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def width(self) -> int:
+        """The amount of values per sample, without the timestamp"""
+        return self._samples.shape[1] - 1
+
+    def append(self, timestamp: float, values: Sequence[float]) -> None:
+        """Add a sample, overwriting the oldest one if the buffer is full"""
+        with self._lock:
+            self._version += 1
+            try:
+                row = self._samples[self._next]
+                row[0] = timestamp
+                row[1:] = values
+                self._next = (self._next + 1) % self._capacity
+                self._count = min(self._count + 1, self._capacity)
+                self._sequence += 1
+            finally:
+                self._version += 1
+
+    def latest(
+        self, out: Optional[NDArray[numpy.float64]] = None
+    ) -> NDArray[numpy.float64]:
+        """A copy of the newest sample, or all zeros if there is none yet.
+
+        Arguments
+        out: An array of shape (width + 1,) to write the sample into,
+            instead of allocating a new one.
+        """
+        return self._copy_newest(0, out)
+
+    def latest_values(
+        self, out: Optional[NDArray[numpy.float64]] = None
+    ) -> NDArray[numpy.float64]:
+        """Like `latest`, but without the timestamp, so `out` needs shape (width,)"""
+        return self._copy_newest(1, out)
+
+    def stamp(self) -> Tuple[float, int]:
+        """The timestamp of the newest sample (0 if there is none yet),
+        and the amount of samples that were ever added
+        """
+        while True:
+            version = self._version
+            if version % 2 == 0:
+                stamp = float(self._samples[self._next - 1, 0]), self._sequence
+                if self._version == version:
+                    return stamp
+            # Let the writing thread finish
+            time.sleep(0)
+
+    def last(
+        self, n: Optional[int] = None, out: Optional[NDArray[numpy.float64]] = None
+    ) -> NDArray[numpy.float64]:
+        """The newest `n` samples, oldest first, shape (n, width + 1).
+        If there are less than `n` samples, all are returned.
+
+        Arguments
+        n: The amount of samples. If None, all samples are returned.
+        out: An array to write the samples into, instead of allocating a new one.
+            Needs at least `n` rows. Only the returned rows of it are written.
+        """
+        with self._lock:
+            n = self._count if n is None else max(min(n, self._count), 0)
+            return self._copy_last(n, out)
+
+    def since(
+        self, timestamp: float, out: Optional[NDArray[numpy.float64]] = None
+    ) -> NDArray[numpy.float64]:
+        """All samples with a timestamp after `timestamp`, oldest first.
+        `out` is the same as the one of `last`.
+        """
+        with self._lock:
+            # Timestamps only increase, so do a binary search over the samples,
+            # from oldest (0) to newest (self._count - 1)
+            oldest = self._next - self._count
+            low, high = 0, self._count
+            while low < high:
+                middle = (low + high) // 2
+                if self._samples[(oldest + middle) % self._capacity, 0] > timestamp:
+                    high = middle
+                else:
+                    low = middle + 1
+            return self._copy_last(self._count - low, out)
+
+    def _copy_newest(
+        self, start: int, out: Optional[NDArray[numpy.float64]]
+    ) -> NDArray[numpy.float64]:
+        """Copy the newest sample from column `start` on, without taking the lock"""
+        while True:
+            version = self._version
+            if version % 2 == 0:
+                row = self._samples[self._next - 1, start:]
+                if out is None:
+                    copy = row.copy()
+                else:
+                    numpy.copyto(out, row)
+                    copy = out
+                if self._version == version:
+                    return copy
+            # Let the writing thread finish
+            time.sleep(0)
+
+    def _copy_last(
+        self, n: int, out: Optional[NDArray[numpy.float64]]
+    ) -> NDArray[numpy.float64]:
+        if out is None:
+            out = numpy.empty((n, self._samples.shape[1]), dtype=numpy.float64)
+        else:
+            out = out[:n]
+        # The newest sample is just before self._next, and the samples wrap around.
+        start = (self._next - n) % self._capacity
+        first = min(n, self._capacity - start)
+        out[:first] = self._samples[start : start + first]
+        out[first:] = self._samples[: n - first]
+        return out
@@ -0,0 +1,279 @@
+import os
+import time
+import socket
+import subprocess
+import traceback
+import multiprocessing
+from multiprocessing.connection import Connection
+
+import numpy
+
+from robobo_interface.simulation import SimulationRobobo
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from numpy.typing import NDArray
+
+ResetFunction = Callable[[SimulationRobobo], Any]
+StepFunction = Callable[[SimulationRobobo, Any], Tuple[Any, float, bool]]
+
+
+class SimulationVectorEnv:
+    """Multiple simulations, each driven by its own worker process, stepped in lockstep.
+
+    Every worker connects a SimulationRobobo to one CoppeliaSim instance,
+    and runs your `reset` and `step` functions on it. Calling `step` on this class
+    steps all simulations at the same time, and returns the results as numpy arrays,
+    with one row per simulation.
+    When an episode is done, the worker starts a new one by calling `reset` again.
+
+    The `reset` and `step` functions are sent to the worker processes,
+    so they should be functions defined at the top level of a module, not lambdas.
+
+    Arguments you should understand:
+    reset: Callable[[SimulationRobobo], Observation] -> Start a new episode,
+        and return the first observation.
+    step: Callable[[SimulationRobobo, Action], Tuple[Observation, float, bool]] ->
+        Perform one action, and return the next observation, the reward,
+        and whether the episode is done.
+    ports: Sequence[int] -> The ports of the CoppeliaSim instances to use, one per worker.
+        Start these with, for example, `scripts/start_coppelia_sim.sh`
+
+    Arguments you only have to understand if you want to do advanced stuff:
+    ip_adress: Optional[str] = None -> The IP adress of the CoppeliaSim instances.
+        If None, the default of SimulationRobobo is used.
+    max_steps: Optional[int] = None -> The maximum amount of steps of an episode.
+        Episodes that take longer are ended as if `step` returned done.
+    stepping: bool = True -> Whether to run the simulations in stepping mode.
+    launch_command: Optional[Sequence[str]] = None -> A command to start a
+        CoppeliaSim instance with. `{port}` is replaced by the port of the instance.
+        If None, the instances are expected to be running already.
+    launch_timeout: float = 120.0 -> How many seconds the instances started with
+        `launch_command` get to start accepting connections.
+    client_factory: Optional[Callable[[str, int], Any]] = None -> What to create the
+        connection to CoppeliaSim with, called with the IP adress and port.
+        Pass `FakeRemoteAPIClient` to run without CoppeliaSim, for example when testing.
+        If None, the normal RemoteAPIClient is used.
+    logger: Callable[[str], None] = print -> The function the workers log with.
+    """
+
+    def __init__(
+        self,
+        reset: ResetFunction,
+        step: StepFunction,
+        ports: Sequence[int],
+        ip_adress: Optional[str] = None,
+        max_steps: Optional[int] = None,
+        stepping: bool = True,
+        launch_command: Optional[Sequence[str]] = None,
+        launch_timeout: float = 120.0,
+        client_factory: Optional[Callable[[str, int], Any]] = None,
+        logger: Callable[[str], None] = print,
+    ):
+        if not ports:
+            raise ValueError("Specify at least one port to connect to")
+
+        self._ports = list(ports)
+        self._closed = False
+        self._simulators: List[subprocess.Popen] = []
+        if launch_command is not None:
+            self._simulators = [
+                subprocess.Popen([arg.format(port=port) for arg in launch_command])
+                for port in self._ports
+            ]
+            try:
+                self._wait_for_simulators(ip_adress, launch_timeout)
+            except BaseException:
+                self._stop_simulators()
+                raise
+
+        self._connections: List[Connection] = []
+        self._workers: List[multiprocessing.Process] = []
+        for port in self._ports:
+            parent_end, worker_end = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_worker,
+                args=(
+                    worker_end,
+                    reset,
+                    step,
+                    port,
+                    ip_adress,
+                    max_steps,
+                    stepping,
+                    client_factory,
+                    logger,
+                ),
+                daemon=True,
+            )
+            worker.start()
+            worker_end.close()
+            self._connections.append(parent_end)
+            self._workers.append(worker)
+
+    def __len__(self) -> int:
+        return len(self._ports)
+
+    def __enter__(self) -> "SimulationVectorEnv":
+        return self
+
+    def __exit__(self, *_args) -> None:
+        self.close()
+
+    def reset(self) -> NDArray[Any]:
+        """Start a new episode in all simulations.
+
+        returns:
+            The first observation of each simulation, stacked.
+        """
+        for connection in self._connections:
+            connection.send(("reset", None))
+        return numpy.stack([numpy.asarray(obs) for obs in self._receive_all()])
+
+    def step(
+        self, actions: Sequence[Any]
+    ) -> Tuple[
+        NDArray[Any], NDArray[numpy.float64], NDArray[numpy.bool_], List[Dict[str, Any]]
+    ]:
+        """Perform one action in every simulation, at the same time.
+
+        Arguments:
+        actions: One action per simulation
+
+        returns:
+            observations: The next observation of each simulation, stacked.
+                If the episode of a simulation ended, this is the first observation
+                of its next episode.
+            rewards: The reward of each simulation, shape (K,)
+            dones: Whether the episode of each simulation ended, shape (K,)
+            infos: One dictionary per simulation. If the episode ended, its last
+                observation is at "final_observation", and "truncated" is True
+                if this was because of `max_steps`.
+        """
+        if len(actions) != len(self._connections):
+            raise ValueError(
+                f"Expected {len(self._connections)} actions, got {len(actions)}"
+            )
+
+        for connection, action in zip(self._connections, actions):
+            connection.send(("step", action))
+        observations, rewards, dones, infos = zip(*self._receive_all())
+        return (
+            numpy.stack([numpy.asarray(obs) for obs in observations]),
+            numpy.asarray(rewards, dtype=numpy.float64),
+            numpy.asarray(dones, dtype=numpy.bool_),
+            list(infos),
+        )
+
+    def close(self) -> None:
+        """Stop all workers, and all simulations started by this class"""
+        if self._closed:
+            return
+        self._closed = True
+
+        for connection in self._connections:
+            try:
+                connection.send(("close", None))
+            except (BrokenPipeError, EOFError, OSError):
+                pass
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        for connection in self._connections:
+            connection.close()
+        self._stop_simulators()
+
+    def _wait_for_simulators(self, ip_adress: Optional[str], timeout: float) -> None:
+        """Wait untill all launched simulators accept connections on their port.
+        Connecting right away would fail on a cold start, as CoppeliaSim takes a while to load.
+        """
+        if ip_adress is None:
+            ip_adress = os.getenv("COPPELIA_SIM_IP", "0.0.0.0")
+        deadline = time.monotonic() + timeout
+        for port, simulator in zip(self._ports, self._simulators):
+            while True:
+                try:
+                    socket.create_connection((ip_adress, port), timeout=1.0).close()
+                    break
+                except OSError:
+                    pass
+                if simulator.poll() is not None:
+                    raise RuntimeError(
+                        f"The simulation for port {port} exited with code"
+                        f" {simulator.returncode} before accepting connections"
+                    )
+                if time.monotonic() > deadline:
+                    raise TimeoutError(
+                        f"The simulation at {ip_adress}:{port}"
+                        f" did not accept connections within {timeout} seconds"
+                    )
+                time.sleep(0.1)
+
+    def _stop_simulators(self) -> None:
+        for simulator in self._simulators:
+            simulator.terminate()
+            simulator.wait()
+
+    def _receive_all(self) -> List[Any]:
+        results = []
+        for port, connection in zip(self._ports, self._connections):
+            try:
+                status, data = connection.recv()
+            except EOFError:
+                raise RuntimeError(f"The worker for the simulation at {port} died")
+            if status == "error":
+                raise RuntimeError(f"The simulation at {port} failed:\n{data}")
+            results.append(data)
+        return results
+
+
+def _worker(
+    connection: Connection,
+    reset: ResetFunction,
+    step: StepFunction,
+    port: int,
+    ip_adress: Optional[str],
+    max_steps: Optional[int],
+    stepping: bool,
+    client_factory: Optional[Callable[[str, int], Any]],
+    logger: Callable[[str], None],
+) -> None:
+    """The loop of a worker process, performing the commands of SimulationVectorEnv"""
+    try:
+        client = None
+        if client_factory is not None:
+            client = client_factory(ip_adress or "localhost", port)
+        rob = SimulationRobobo(
+            api_port=port,
+            ip_adress=ip_adress,
+            logger=logger,
+            stepping=stepping,
+            client=client,
+        )
+
+        steps = 0
+        while True:
+            command, data = connection.recv()
+            if command == "reset":
+                steps = 0
+                connection.send(("ok", reset(rob)))
+            elif command == "step":
+                observation, reward, done = step(rob, data)
+                steps += 1
+                info: Dict[str, Any] = {}
+                if not done and max_steps is not None and steps >= max_steps:
+                    done = True
+                    info["truncated"] = True
+                if done:
+                    info["final_observation"] = observation
+                    observation = reset(rob)
+                    steps = 0
+                connection.send(("ok", (observation, reward, done, info)))
+            elif command == "close":
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    except Exception:
+        connection.send(("error", traceback.format_exc()))
+    finally:
+        connection.close()
@@ -0,0 +1,133 @@
+"""Tests of BlockidAllocator, which hands out the blockids of all robots.
+
+Run from anywhere, without CoppeliaSim or ROS:
+`python3 -m pytest test/` or `python3 -m unittest discover test`
+"""
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+# Import straight from the source, so this runs without a catkin workspace.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from robobo_interface.utils import BlockidAllocator, DEFAULT_BLOCKIDS  # noqa: E402
+
+
+class TestBlockidAllocator(unittest.TestCase):
+    def test_hands_out_every_blockid_once(self):
+        allocator = BlockidAllocator(range(1, 6))
+        acquired = [allocator.acquire() for _ in range(5)]
+        self.assertEqual(sorted(acquired), [1, 2, 3, 4, 5])
+        self.assertEqual(set(allocator), set(acquired))
+
+    def test_exhaustion(self):
+        allocator = BlockidAllocator(range(1, 4))
+        for _ in range(3):
+            allocator.acquire()
+        with self.assertRaises(RuntimeError):
+            allocator.acquire()
+
+    def test_freed_blockid_is_handed_out_again_last(self):
+        allocator = BlockidAllocator(range(1, 4))
+        first = allocator.acquire()
+        allocator.discard(first)
+        # The other free blockids go first, so a late completion of the old action
+        # is unlikely to be taken for the new one.
+        self.assertEqual([allocator.acquire() for _ in range(3)], [2, 3, first])
+
+    def test_freed_blockid_after_exhaustion(self):
+        allocator = BlockidAllocator(range(1, 4))
+        for _ in range(3):
+            allocator.acquire()
+        allocator.discard(2)
+        self.assertEqual(allocator.acquire(), 2)
+        with self.assertRaises(RuntimeError):
+            allocator.acquire()
+
+    def test_acquire_blockid_in_use(self):
+        allocator = BlockidAllocator(range(1, 4))
+        blockid = allocator.acquire()
+        with self.assertRaises(ValueError):
+            allocator.acquire(blockid)
+
+    def test_explicit_blockids_are_skipped(self):
+        allocator = BlockidAllocator(range(1, 4))
+        self.assertEqual(allocator.acquire(1), 1)
+        self.assertEqual(allocator.acquire(), 2)
+        # Outside of the range is allowed, as long as it fits the ROS messages
+        self.assertEqual(allocator.acquire(5000), 5000)
+        allocator.discard(5000)
+        self.assertEqual(allocator.acquire(), 3)
+        with self.assertRaises(RuntimeError):
+            allocator.acquire()
+
+    def test_removals_free_blockids(self):
+        allocator = BlockidAllocator(range(1, 5))
+        for _ in range(4):
+            allocator.acquire()
+        allocator.remove(1)
+        allocator.discard_many([2, 3])
+        allocator.drain_completed(lambda blockid: blockid == 4)
+        self.assertEqual(len(allocator), 0)
+        self.assertEqual(sorted(allocator.acquire() for _ in range(4)), [1, 2, 3, 4])
+
+    def test_no_blockid_is_queued_twice(self):
+        allocator = BlockidAllocator(range(1, 3))
+        blockid = allocator.acquire()
+        allocator.discard(blockid)
+        allocator.discard(blockid)
+        allocator.add(blockid)
+        allocator.discard(blockid)
+        self.assertEqual(sorted(allocator.acquire() for _ in range(2)), [1, 2])
+        with self.assertRaises(RuntimeError):
+            allocator.acquire()
+
+    def test_range_must_fit_int16(self):
+        self.assertEqual(BlockidAllocator().blockids, DEFAULT_BLOCKIDS)
+        BlockidAllocator(range(-(2**15), 2**15))
+        for blockids in (range(1, 2**15 + 1), range(-(2**15) - 1, 0), range(5, 5)):
+            with self.assertRaises(ValueError):
+                BlockidAllocator(blockids)
+
+    def test_explicit_blockid_must_fit_int16(self):
+        allocator = BlockidAllocator()
+        for blockid in (2**15, -(2**15) - 1):
+            with self.assertRaises(ValueError):
+                allocator.acquire(blockid)
+        self.assertEqual(len(allocator), 0)
+
+    def test_concurrent_acquire_and_discard(self):
+        allocator = BlockidAllocator(range(1, 65))
+        held = [set() for _ in range(8)]
+        errors = []
+
+        def worker(mine):
+            try:
+                for _ in range(2000):
+                    blockid = allocator.acquire()
+                    if any(blockid in other for other in held):
+                        errors.append(f"{blockid} was handed out twice")
+                    mine.add(blockid)
+                    if len(mine) > 4:
+                        released = mine.pop()
+                        allocator.discard(released)
+            except Exception as e:
+                errors.append(repr(e))
+
+        threads = [threading.Thread(target=worker, args=(mine,)) for mine in held]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        in_use = set().union(*held)
+        self.assertEqual(set(allocator), in_use)
+        # Everything that was given back can be handed out again
+        free = [allocator.acquire() for _ in range(64 - len(in_use))]
+        self.assertEqual(set(free) | in_use, set(range(1, 65)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Tests of SensorHistory, the ring buffer the hardware keeps its sensor readings in.
+
+Run from anywhere, without CoppeliaSim or ROS:
+`python3 -m pytest test/` or `python3 -m unittest discover test`
+"""
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+import numpy
+
+# Import straight from the source, so this runs without a catkin workspace.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from robobo_interface.utils import SensorHistory  # noqa: E402
+
+
+class TestSensorHistory(unittest.TestCase):
+    def test_empty(self):
+        history = SensorHistory(width=3, capacity=4)
+        self.assertEqual(len(history), 0)
+        self.assertEqual(history.width, 3)
+        numpy.testing.assert_array_equal(history.latest(), [0, 0, 0, 0])
+        self.assertEqual(history.stamp(), (0.0, 0))
+        self.assertEqual(history.last().shape, (0, 4))
+        self.assertEqual(history.since(0.0).shape, (0, 4))
+        with self.assertRaises(ValueError):
+            SensorHistory(width=3, capacity=0)
+
+    def test_latest(self):
+        history = SensorHistory(width=2, capacity=4)
+        history.append(1.0, [10, 11])
+        history.append(2.0, [20, 21])
+        numpy.testing.assert_array_equal(history.latest(), [2.0, 20, 21])
+        numpy.testing.assert_array_equal(history.latest_values(), [20, 21])
+        self.assertEqual(history.stamp(), (2.0, 2))
+
+        out = numpy.empty(2)
+        self.assertIs(history.latest_values(out), out)
+        numpy.testing.assert_array_equal(out, [20, 21])
+
+    def test_wraps_around(self):
+        history = SensorHistory(width=1, capacity=3)
+        for i in range(1, 8):
+            history.append(float(i), [i * 10])
+        self.assertEqual(len(history), 3)
+        numpy.testing.assert_array_equal(history.last()[:, 0], [5, 6, 7])
+        numpy.testing.assert_array_equal(history.last(2)[:, 1], [60, 70])
+        numpy.testing.assert_array_equal(history.last(10)[:, 0], [5, 6, 7])
+        self.assertEqual(history.stamp(), (7.0, 7))
+
+        out = numpy.full((5, 2), -1.0)
+        rows = history.last(2, out)
+        numpy.testing.assert_array_equal(rows, [[6, 60], [7, 70]])
+        # Only the returned rows are written
+        numpy.testing.assert_array_equal(out[2:], -1.0)
+
+    def test_since(self):
+        history = SensorHistory(width=1, capacity=4)
+        for i in range(1, 7):
+            history.append(float(i), [i])
+        # Only 3 to 6 are still there
+        numpy.testing.assert_array_equal(history.since(0.0)[:, 0], [3, 4, 5, 6])
+        numpy.testing.assert_array_equal(history.since(4.0)[:, 0], [5, 6])
+        numpy.testing.assert_array_equal(history.since(4.5)[:, 0], [5, 6])
+        self.assertEqual(len(history.since(6.0)), 0)
+
+    def test_concurrent_reads_never_mix_samples(self):
+        history = SensorHistory(width=8, capacity=16)
+        done = threading.Event()
+        torn = []
+
+        def writer():
+            for i in range(1, 20000):
+                history.append(float(i), [i] * 8)
+            done.set()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        while not done.is_set():
+            sample = history.latest()
+            if not (sample == sample[0]).all():
+                torn.append(sample)
+            timestamp, sequence = history.stamp()
+            if timestamp != sequence:
+                torn.append((timestamp, sequence))
+            rows = history.last(4)
+            if not (numpy.diff(rows[:, 0]) == 1).all():
+                torn.append(rows[:, 0])
+        thread.join()
+        self.assertEqual(torn, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
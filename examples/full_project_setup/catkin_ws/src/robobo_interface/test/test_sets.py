@@ -0,0 +1,139 @@
+"""Tests of LockedSet, the thread-safe set the blockids in use are kept in.
+
+Run from anywhere, without CoppeliaSim or ROS:
+`python3 -m pytest test/` or `python3 -m unittest discover test`
+"""
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+# Import straight from the source, so this runs without a catkin workspace.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from robobo_interface.utils import BlockidAllocator, LockedSet  # noqa: E402
+
+
+class RemovalLog(LockedSet):
+    """A LockedSet that remembers what `_removed` was called with"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.removed = []
+
+    def _removed(self, elements):
+        # The lock should be held, so trying to take it fails.
+        assert not self._lock.acquire(blocking=False)
+        self.removed.extend(elements)
+
+
+class TestLockedSet(unittest.TestCase):
+    def test_behaves_like_a_set(self):
+        locked = LockedSet([1, 2, 3])
+        self.assertIn(2, locked)
+        self.assertEqual(len(locked), 3)
+        self.assertEqual(sorted(locked), [1, 2, 3])
+        self.assertEqual(locked - {1}, {2, 3})
+        self.assertEqual(locked & {1, 5}, {1})
+        self.assertEqual(locked | {5}, {1, 2, 3, 5})
+        locked.add_many([4, 5])
+        self.assertEqual(locked.snapshot(), {1, 2, 3, 4, 5})
+        self.assertIs(type(locked.snapshot()), set)
+
+    def test_iterating_while_changing(self):
+        locked = LockedSet(range(10))
+        for element in locked:
+            locked.discard(element)
+            locked.add(element + 100)
+        self.assertEqual(locked.snapshot(), set(range(100, 110)))
+
+    def test_discard_many_and_drain_completed(self):
+        locked = RemovalLog(range(10))
+        self.assertEqual(locked.discard_many([1, 2, 50]), {1, 2})
+        self.assertEqual(locked.drain_completed(lambda e: e % 2 == 0), {0, 4, 6, 8})
+        self.assertEqual(locked.snapshot(), {3, 5, 7, 9})
+        self.assertEqual(sorted(locked.removed), [0, 1, 2, 4, 6, 8])
+
+    def test_every_removal_is_reported(self):
+        cases = {
+            "remove": (lambda s: s.remove(1), {1}),
+            "discard": (lambda s: s.discard(1), {1}),
+            "pop": (lambda s: s.pop(), None),
+            "clear": (lambda s: s.clear(), {1, 2, 3, 4}),
+            "difference_update": (lambda s: s.difference_update({1}, [2]), {1, 2}),
+            "intersection_update": (lambda s: s.intersection_update({1, 9}), {2, 3, 4}),
+            "symmetric_difference_update": (
+                lambda s: s.symmetric_difference_update({1, 9}),
+                {1},
+            ),
+            "-=": (lambda s: s.__isub__({1, 2}), {1, 2}),
+            "&=": (lambda s: s.__iand__({1}), {2, 3, 4}),
+            "^=": (lambda s: s.__ixor__({4, 5}), {4}),
+        }
+        for name, (change, expected) in cases.items():
+            with self.subTest(name):
+                locked = RemovalLog([1, 2, 3, 4])
+                before = locked.snapshot()
+                change(locked)
+                removed = before - locked.snapshot()
+                self.assertEqual(set(locked.removed), removed)
+                if expected is not None:
+                    self.assertEqual(removed, expected)
+                else:
+                    self.assertEqual(len(removed), 1)
+
+    def test_in_place_operators_keep_the_set(self):
+        locked = LockedSet([1, 2])
+        original = locked
+        locked |= {3}
+        locked -= {1}
+        locked &= {2, 3}
+        locked ^= {4}
+        self.assertIs(locked, original)
+        self.assertEqual(locked.snapshot(), {2, 3, 4})
+        locked -= locked
+        self.assertEqual(len(locked), 0)
+
+    def test_additions_are_not_reported(self):
+        locked = RemovalLog()
+        locked.add(1)
+        locked.update([2], {3})
+        locked |= {4}
+        locked.symmetric_difference_update({5})
+        self.assertEqual(locked.snapshot(), {1, 2, 3, 4, 5})
+        self.assertEqual(locked.removed, [])
+
+    def test_cleared_blockids_are_free_again(self):
+        allocator = BlockidAllocator(range(1, 4))
+        for _ in range(3):
+            allocator.acquire()
+        allocator.clear()
+        self.assertEqual(sorted(allocator.acquire() for _ in range(3)), [1, 2, 3])
+        allocator -= {1, 2}
+        allocator.pop()
+        self.assertEqual(sorted(allocator.acquire() for _ in range(3)), [1, 2, 3])
+
+    def test_concurrent_changes(self):
+        locked = LockedSet()
+
+        def worker(offset):
+            for i in range(2000):
+                locked.add(offset + i)
+                locked.update([offset + i + 1])
+                locked.difference_update([offset + i])
+                locked.discard_many([offset + i + 1])
+                list(locked)
+
+        threads = [
+            threading.Thread(target=worker, args=(offset,))
+            for offset in range(0, 80000, 10000)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(locked), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
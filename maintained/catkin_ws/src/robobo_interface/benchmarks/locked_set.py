@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Compare the LockedSet with a threading.Lock to the old one with a multiprocessing.Lock.
+
+Run from anywhere, without ROS:
+`python3 benchmarks/locked_set.py`
+
+First, the cost of the single operations is measured.
+Then, the loop of `perform_blocking`: while waiting for an action,
+the robot checks its blockids every poll (`in` on the hardware,
+a copy of all of them in the simulation) and removes the completed ones at the end.
+Both sets run exactly the same operations. The new set can also do this loop
+with `snapshot` and its bulk operations, which is reported on its own,
+as the old set has no such methods.
+"""
+import sys
+import timeit
+from functools import wraps
+from multiprocessing import Lock
+from pathlib import Path
+
+# Import the utils straight from the source, so this runs without a catkin workspace.
+sys.path.insert(
+    0, str(Path(__file__).resolve().parents[1] / "src" / "robobo_interface")
+)
+
+from utils import LockedSet  # noqa: E402
+
+ROUNDS = 100_000
+POLLS = 20
+IN_USE = 8
+
+
+def process_locked_method(f):
+    @wraps(f)
+    def inner(self, *args, **kwargs):
+        with self._lock:
+            return f(self, *args, **kwargs)
+
+    return inner
+
+
+class ProcessLockedSet(set):
+    """The LockedSet as it was, with a multiprocessing.Lock"""
+
+    def __init__(self, *args, **kwargs):
+        self._lock = Lock()
+        super().__init__(*args, **kwargs)
+
+    add = process_locked_method(set.add)
+    discard = process_locked_method(set.discard)
+    __contains__ = process_locked_method(set.__contains__)
+    __len__ = process_locked_method(set.__len__)
+    __iter__ = process_locked_method(set.__iter__)
+
+
+def blocking_loop(used) -> None:
+    used.add(1000)
+    for _ in range(POLLS):
+        _ = 1000 in used
+        _ = list(used)
+    for blockid in (1000, 1, 2):
+        used.discard(blockid)
+    used.add(1)
+    used.add(2)
+
+
+def blocking_loop_bulk(used: LockedSet) -> None:
+    used.add(1000)
+    for _ in range(POLLS):
+        _ = 1000 in used
+        _ = list(used.snapshot())
+    used.discard_many((1000, 1, 2))
+    used.add_many((1, 2))
+
+
+def measure(statement, number: int = ROUNDS) -> float:
+    """The time one call of `statement` takes, in microseconds"""
+    return min(timeit.repeat(statement, number=number, repeat=3)) / number * 1e6
+
+
+def main() -> None:
+    old = ProcessLockedSet(range(IN_USE))
+    new = LockedSet(range(IN_USE))
+
+    operations = {
+        "in": (lambda: 3 in old, lambda: 3 in new),
+        "len": (lambda: len(old), lambda: len(new)),
+        "add + discard": (
+            lambda: (old.add(100), old.discard(100)),
+            lambda: (new.add(100), new.discard(100)),
+        ),
+        "list (iteration)": (lambda: list(old), lambda: list(new)),
+    }
+    print(f"{'operation':>18} {'process lock':>14} {'thread lock':>13}")
+    for name, (old_statement, new_statement) in operations.items():
+        print(
+            f"{name:>18}"
+            f" {measure(old_statement):>11.3f} us"
+            f" {measure(new_statement):>10.3f} us"
+        )
+
+    old_time = measure(lambda: blocking_loop(old), ROUNDS // POLLS)
+    new_time = measure(lambda: blocking_loop(new), ROUNDS // POLLS)
+    bulk_time = measure(lambda: blocking_loop_bulk(new), ROUNDS // POLLS)
+    print(
+        f"\nOne perform_blocking with {POLLS} polls and {IN_USE} blockids in use:"
+        f"\n  process lock: {old_time:.2f} us"
+        f"\n  thread lock: {new_time:.2f} us"
+        f" ({old_time / new_time:.1f}x faster)"
+        f"\n  thread lock, with snapshot and bulk operations: {bulk_time:.2f} us"
+        f" ({old_time / bulk_time:.1f}x faster)"
+    )
+
+
+if __name__ == "__main__":
+    main()
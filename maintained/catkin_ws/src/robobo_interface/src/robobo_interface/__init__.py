@@ -1,16 +1,73 @@
+import importlib
+
 from .datatypes import (
     Emotion,
     SoundEmotion,
     LedColor,
     LedId,
+    SensorFrequency,
+    Sensor,
+    SampleStamp,
+    BlobColor,
+    Blob,
+    QrCode,
     Acceleration,
     Orientation,
     Position,
     WheelPosition,
+    SensorSnapshot,
+    SensorFrame,
+    SENSOR_FRAME_DTYPE,
+    FleetSnapshot,
 )
 from .base import IRobobo
-from .hardware import HardwareRobobo
-from .simulation import SimulationRobobo
+
+from typing import TYPE_CHECKING, Any, List
+
+# The robots are only imported once they are used, so that using the simulation
+# does not load all of ROS and OpenCV (and the other way around).
+# This matters most for processes that are started often, like the workers of
+# a SimulationVectorEnv. `import robobo_interface.hardware` still works as before.
+_LAZY_IMPORTS = {
+    "HardwareRobobo": ".hardware",
+    "SimulationRobobo": ".simulation",
+    "SimulationRoboboFleet": ".fleet",
+    "SimulationVectorEnv": ".vectorized",
+    "FakeRemoteAPIClient": ".fake_client",
+    "AsyncRobobo": ".async_robobo",
+    "RecordKind": ".recording",
+    "SessionRecorder": ".recording",
+    "RecordingRobobo": ".recording",
+    "SessionLog": ".replay",
+    "ReplayRobobo": ".replay",
+    "InstrumentedRobobo": ".instrumentation",
+    "RoboboMetrics": ".instrumentation",
+}
+
+if TYPE_CHECKING:
+    from .hardware import HardwareRobobo
+    from .simulation import SimulationRobobo
+    from .fleet import SimulationRoboboFleet
+    from .vectorized import SimulationVectorEnv
+    from .fake_client import FakeRemoteAPIClient
+    from .async_robobo import AsyncRobobo
+    from .recording import RecordKind, SessionRecorder, RecordingRobobo
+    from .replay import SessionLog, ReplayRobobo
+    from .instrumentation import InstrumentedRobobo, RoboboMetrics
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    # Cache it, so this is only called the first time.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
 
 __all__ = (
     "IRobobo",
@@ -18,10 +75,31 @@ __all__ = (
     "SoundEmotion",
     "LedColor",
     "LedId",
+    "SensorFrequency",
+    "Sensor",
+    "SampleStamp",
+    "BlobColor",
+    "Blob",
+    "QrCode",
     "Acceleration",
     "Orientation",
     "Position",
     "WheelPosition",
+    "SensorSnapshot",
+    "SensorFrame",
+    "SENSOR_FRAME_DTYPE",
+    "FleetSnapshot",
     "HardwareRobobo",
     "SimulationRobobo",
+    "SimulationRoboboFleet",
+    "SimulationVectorEnv",
+    "FakeRemoteAPIClient",
+    "AsyncRobobo",
+    "RecordKind",
+    "SessionRecorder",
+    "RecordingRobobo",
+    "SessionLog",
+    "ReplayRobobo",
+    "InstrumentedRobobo",
+    "RoboboMetrics",
 )
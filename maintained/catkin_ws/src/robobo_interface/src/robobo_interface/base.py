@@ -1,4 +1,6 @@
+import time
 import functools
+import threading
 from abc import ABC, abstractmethod
 
 import numpy
@@ -11,10 +13,14 @@ from robobo_interface.datatypes import (
     Orientation,
     WheelPosition,
     SoundEmotion,
+    SensorFrequency,
+    Sensor,
+    SampleStamp,
+    SensorFrame,
 )
-from robobo_interface.utils import LockedSet
+from robobo_interface.utils import BlockidAllocator, LatestImage
 
-from typing import List, Optional, Callable
+from typing import List, Optional, Callable, Iterator, Union
 from numpy.typing import NDArray
 
 
@@ -31,7 +37,10 @@ class IRobobo(ABC):
     This will prevent you from doing simulatanious tasks, but decrease complexity.
     """
 
-    _used_pids: LockedSet[int]
+    _used_pids: BlockidAllocator
+    # Wether `wait` can be called from another thread while the robot is in use,
+    # because it doesn't talk to the robot, but gets told when an action is done.
+    _thread_safe_wait: bool = False
 
     @abstractmethod
     def __init__(self, *args, **kwargs) -> None:
@@ -117,24 +126,81 @@ class IRobobo(ABC):
         """
         ...
 
+    def set_sensor_frequency(self, frequency: SensorFrequency) -> None:
+        """Set how often the robot sends out the values of its sensors.
+        Higher frequencies give fresher readings, at the cost of bandwidth and battery.
+        By default, this does nothing, for robots that read their sensors when asked.
+
+        Arguments:
+        frequency: SensorFrequency
+        """
+        pass
+
     # The returned options here might sometimes be False instead of None.
     # So, check with `if X` not with `if X is not none`
     @abstractmethod
-    def read_irs(self) -> List[Optional[float]]:
+    def read_irs(
+        self, out: Optional[NDArray[numpy.float64]] = None
+    ) -> Union[List[Optional[float]], NDArray[numpy.float64]]:
         """Returns sensor readings:
         [BackL, BackR, FrontL, FrontR, FrontC, FrontRR, BackC, FrontLL]
+
+        Arguments
+        out: An array of shape (8,) and dtype float64 to write the readings into,
+            and return, instead of a new list. Reusing the same array avoids allocating
+            memory for every reading. Readings that are None are written as NaN.
         """
         ...
 
     @abstractmethod
-    def get_image_front(self) -> NDArray[numpy.uint8]:
+    def get_image_front(
+        self, out: Optional[NDArray[numpy.uint8]] = None
+    ) -> NDArray[numpy.uint8]:
         """Get the image from the front camera as a numpy array in cv2 format.
 
         You can, for example, write this image to file with:
         https://docs.opencv.org/3.4/d4/da8/group__imgcodecs.html#gabbc7ef1aa2edfaa87772f1202d67e0ce
+
+        Arguments
+        out: An array of shape (height, width, 3) and dtype uint8 to write the image into,
+            and return. Reusing the same array avoids allocating memory for every frame.
+            If None, a new array is returned.
         """
         ...
 
+    def stream_images(
+        self, max_fps: Optional[float] = None, max_age: Optional[float] = None
+    ) -> Iterator[NDArray[numpy.uint8]]:
+        """Iterate over the images of the front camera, as they would be returned by
+        `get_image_front`.
+
+        A background thread keeps receiving images, so the newest one is always ready,
+        and getting the next image from this iterator doesn't have to wait for the camera.
+        This does mean the same image can be returned multiple times,
+        if you ask for images faster than the camera produces them.
+        The background thread stops when you stop iterating (or `break` out of the loop).
+
+        example:
+        ```
+        for image in rob.stream_images(max_fps=10):
+            rob.move_blocking(*decide_movement(image), 100)
+        ```
+
+        Arguments:
+        max_fps: Optional[float] = None -> How many images to receive per second, at most.
+            If None, every image the camera produces is received.
+        max_age: Optional[float] = None -> How old (in seconds) the returned image can be.
+            If the newest image is older, wait for a new one.
+            If None, the newest image is always returned immediately.
+        """
+        latest = LatestImage()
+        stop = self._start_image_stream(latest, max_fps)
+        try:
+            while True:
+                yield latest.get(max_age)
+        finally:
+            stop()
+
     @abstractmethod
     def set_phone_pan(
         self, pan_position: int, pan_speed: int, blockid: Optional[int] = None
@@ -222,6 +288,71 @@ class IRobobo(ABC):
         """Get the wheel orientation and speed of the robot"""
         ...
 
+    def read_frame(self) -> SensorFrame:
+        """Get the readings of all sensors at once, to store with `SensorFrame.to_record`.
+        The timestamp is the one of the IR sensors (see `read_stamp`).
+        """
+        return SensorFrame(
+            irs=list(self.read_irs()),
+            accel=self.read_accel(),
+            orientation=self.read_orientation(),
+            wheels=self.read_wheels(),
+            phone_pan=self.read_phone_pan(),
+            phone_tilt=self.read_phone_tilt(),
+            timestamp=self.read_stamp(Sensor.IRS).timestamp,
+        )
+
+    def read_stamp(self, sensor: Sensor) -> SampleStamp:
+        """Get when the newest reading of a sensor was taken.
+        The reading itself is returned by the `read_` method of the sensor.
+
+        By default, a reading is assumed to be taken when it is asked for,
+        so this is the current `time.time()`. The sequence is then always 0,
+        which means it is unknown wether the reading changed.
+
+        Arguments:
+        sensor: Sensor - The sensor to get the stamp of.
+        """
+        return SampleStamp(time.time(), 0)
+
+    def wait_for_fresh(
+        self,
+        sensor: Sensor,
+        after: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """Wait untill the sensor has a reading that was taken at or after `after`.
+        Use this instead of a fixed `sleep` between an action and reading its result.
+        example:
+        ```
+        rob.move_blocking(50, 50, 500)
+        rob.wait_for_fresh(Sensor.IRS, timeout=0.1)
+        irs = rob.read_irs()
+        ```
+
+        Arguments:
+        sensor: Sensor - The sensor to wait for.
+        after: Optional[float] - A timestamp in the clock of the robot (see `SampleStamp`).
+            If None, the time the last action (like a move) was completed is used.
+        timeout: Optional[float] - the maximum amount of seconds to wait.
+            If None, wait indefinetly. On the hardware, a reading is only sent when it changes,
+            so it is a good idea to always pass a timeout.
+
+        returns:
+            Whether there is a fresh reading. False if the timeout passed first.
+        """
+        # By default, readings are taken when asked for (see `read_stamp`),
+        # so this only has to sleep untill `after`.
+        if after is None:
+            return True
+        remaining = after - time.time()
+        if timeout is not None and remaining > timeout:
+            self.sleep(timeout)
+            return False
+        if remaining > 0:
+            self.sleep(remaining)
+        return True
+
     @abstractmethod
     def sleep(self, seconds: float) -> None:
         """Block for a an amount of seconds.
@@ -243,8 +374,7 @@ class IRobobo(ABC):
         f: Callable[[int], None]. Some function to call.
         """
         blockid = f()
-        while self.is_blocked(blockid):
-            self.sleep(0.002)
+        self.wait(blockid)
 
     @abstractmethod
     def is_blocked(self, blockid: int) -> bool:
@@ -260,6 +390,83 @@ class IRobobo(ABC):
         """Block untill (only return once) all blocking actions are completed"""
         ...
 
-    def _first_unblocked(self) -> int:
-        """Get the first available blockid"""
-        return min(set(range(1, 768)) - self._used_pids)
+    def wait(self, blockid: int, timeout: Optional[float] = None) -> bool:
+        """Wait untill the action with the given blockid is completed.
+        By default, this polls `is_blocked`. The robots in this package
+        override it to wait for the completion itself.
+
+        Arguments:
+        blockid: the id to wait for
+        timeout: the maximum amount of seconds to wait. If None, wait indefinetly.
+
+        returns:
+            Whether the action is completed. False if the timeout passed first.
+        """
+        return self._poll_until(lambda: not self.is_blocked(blockid), timeout)
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """Wait untill all blocking actions are completed.
+        By default, this polls `is_blocked` for all blockids in use.
+
+        Arguments:
+        timeout: the maximum amount of seconds to wait. If None, wait indefinetly.
+
+        returns:
+            Whether all actions are completed. False if the timeout passed first.
+        """
+        return self._poll_until(
+            lambda: not any(
+                self.is_blocked(blockid) for blockid in list(self._used_pids)
+            ),
+            timeout,
+        )
+
+    def _poll_until(
+        self, condition: Callable[[], bool], timeout: Optional[float] = None
+    ) -> bool:
+        """Sleep in small steps untill `condition` returns True,
+        or `timeout` seconds of real time have passed.
+
+        returns:
+            Whether the condition became True.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not condition():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self.sleep(0.002)
+        return True
+
+    def _start_image_stream(
+        self, latest: LatestImage, max_fps: Optional[float]
+    ) -> Callable[[], None]:
+        """Start putting the images of the front camera into `latest` in the background,
+        at most `max_fps` per second.
+
+        By default, this calls `get_image_front` from a background thread,
+        so that has to be safe to call from another thread.
+        The robots in this package override this with a stream of their own.
+
+        returns:
+            A function that stops the stream.
+        """
+        interval = 0.0 if max_fps is None else 1 / max_fps
+        stopped = threading.Event()
+
+        def stream() -> None:
+            try:
+                while not stopped.is_set():
+                    started = time.monotonic()
+                    latest.put(self.get_image_front())
+                    stopped.wait(started + interval - time.monotonic())
+            except Exception as e:
+                latest.fail(e)
+
+        thread = threading.Thread(target=stream, daemon=True)
+        thread.start()
+
+        def stop() -> None:
+            stopped.set()
+            thread.join()
+
+        return stop
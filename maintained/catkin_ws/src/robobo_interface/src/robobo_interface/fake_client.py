@@ -0,0 +1,508 @@
+import re
+import math
+import time
+import itertools
+import threading
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# The same values as the constants of CoppeliaSim
+SIMULATION_STOPPED = 0
+SIMULATION_PAUSED = 8
+SIMULATION_ADVANCING_RUNNING = 17
+HANDLE_WORLD = -1
+SCRIPTTYPE_CHILDSCRIPT = 1
+
+# Constants of CoppeliaSim whose values only matter to the fake itself
+SCRIPTTYPE_SANDBOXSCRIPT = 8
+INTPARAM_SCENE_UNIQUE_ID = 20
+
+# Every scene gets a new unique id, like every loaded scene does in CoppeliaSim
+_scene_ids = itertools.count(1)
+
+# Handles of scripts are the handle of their object plus this offset
+SCRIPT_HANDLE_OFFSET = 10000
+
+# The physical properties of the fake Robobo
+TIME_STEP = 0.05
+ARENA_HALF_SIZE = 2.0  # The arena is a square from -2 to 2 meters, with walls around it
+ROBOT_RADIUS = 0.08
+WHEEL_BASE = 0.1
+METERS_PER_SPEED = 0.002  # Meters per second per unit of wheel speed (range: -100-100)
+DEGREES_PER_SPEED = 6.6  # Wheel rotation in degrees per second per unit of wheel speed
+PAN_TILT_DEGREES_PER_SPEED = 2.0
+IR_RANGE = 0.2
+CAMERA_RESOLUTION = (64, 64)
+
+# The angles of the IR sensors relative to the front of the robot, in degrees.
+# In the order of read_irs: [BackL, BackR, FrontL, FrontR, FrontC, FrontRR, BackC, FrontLL]
+IR_ANGLES = [160.0, -160.0, 15.0, -15.0, 0.0, -40.0, 180.0, 40.0]
+
+# The parts of a Robobo that have a script or handle, relative to `/Robobo[i]`
+ROBOBO_PARTS = [
+    "",
+    "/Left_Motor",
+    "/Back_L",
+    "/IR_Back_C",
+    "/Pan_Motor",
+    "/Pan_Motor/Pan_Respondable/Tilt_Motor",
+    "/Pan_Motor/Pan_Respondable/Tilt_Motor/Smartphone_Respondable",
+    "/Pan_Motor/Pan_Respondable/Tilt_Motor/Smartphone_Respondable/Smartphone_camera",
+]
+
+
+class _FakeRobobo:
+    """The state of one Robobo in the fake scene"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.reset()
+
+    def reset(self) -> None:
+        # Robots start next to each other, facing the positive x axis.
+        self.x = 0.0
+        self.y = 0.3 * self.index
+        self.theta = 0.0
+        self.phone_positions = [(self.x, self.y)] * 3
+        self.speed_l = 0.0
+        self.speed_r = 0.0
+        self.move_left = 0.0
+        self.move_signal: Optional[str] = None
+        self.wheel_pos_l = 0.0
+        self.wheel_pos_r = 0.0
+        self.wheel_zero_l = 0.0
+        self.wheel_zero_r = 0.0
+        self.pan = 180.0
+        self.pan_target = 180.0
+        self.pan_speed = 0.0
+        self.pan_signal: Optional[str] = None
+        self.tilt = 90.0
+        self.tilt_target = 90.0
+        self.tilt_speed = 0.0
+        self.tilt_signal: Optional[str] = None
+        self.leds: Dict[str, str] = {}
+        self.block_registry: Dict[int, str] = {}
+
+
+class FakeSim:
+    """A stand-in for the `sim` object of CoppeliaSim, as returned by `client.require("sim")`.
+
+    This only implements the functions and script functions SimulationRobobo uses,
+    for a scene with a number of Robobos in an empty arena with walls.
+    The physics are a simple kinematic model, good enough to test code against,
+    but nothing like the real simulation.
+    """
+
+    simulation_stopped = SIMULATION_STOPPED
+    simulation_paused = SIMULATION_PAUSED
+    simulation_advancing_running = SIMULATION_ADVANCING_RUNNING
+    handle_world = HANDLE_WORLD
+    scripttype_childscript = SCRIPTTYPE_CHILDSCRIPT
+    scripttype_sandboxscript = SCRIPTTYPE_SANDBOXSCRIPT
+    intparam_scene_unique_id = INTPARAM_SCENE_UNIQUE_ID
+
+    def __init__(self, nr_robots: int = 1):
+        self._scene_id = next(_scene_ids)
+        self.executed_scripts = 0
+        self._robots = [_FakeRobobo(i) for i in range(nr_robots)]
+        self._state = SIMULATION_STOPPED
+        self._stepping = False
+        self._time = 0.0
+        self._synced_at = time.monotonic()
+        self._signals: Dict[str, int] = {}
+        # Multiple clients can use the same scene from different threads.
+        self._lock = threading.RLock()
+
+        # Handles of objects are indexes in this list
+        self._objects: List[Tuple[int, str]] = [
+            (robot.index, part) for robot in self._robots for part in ROBOBO_PARTS
+        ]
+        self._paths = {
+            f"/Robobo[{index}]{part}": handle
+            for handle, (index, part) in enumerate(self._objects)
+        }
+        self._script_functions: Dict[str, Callable[..., Any]] = {
+            "moveWheelsByTime": self._move_wheels_by_time,
+            "resetWheelEncoders": self._reset_wheel_encoders,
+            "readWheels": self._read_wheels,
+            "setLEDColor": self._set_led_color,
+            "readAllIRSensor": self._read_all_ir_sensor,
+            "movePanTo": self._move_pan_to,
+            "readPanPosition": self._read_pan_position,
+            "moveTiltTo": self._move_tilt_to,
+            "readTiltPosition": self._read_tilt_position,
+            "readAccelerationSensor": self._read_acceleration_sensor,
+            "readOrientationSensor": self._read_orientation_sensor,
+            "readAllSensors": self._read_all_sensors,
+            "readCompletedBlocks": self._read_completed_blocks,
+            "moveWheelsByTimeOf": self._move_wheels_by_time_of,
+            "readAllSensorsOf": self._read_all_sensors_of,
+        }
+
+    # Simulation control
+
+    def startSimulation(self) -> int:
+        if self._state == SIMULATION_STOPPED:
+            self._time = 0.0
+            self._signals.clear()
+            for robot in self._robots:
+                robot.reset()
+        self._state = SIMULATION_ADVANCING_RUNNING
+        self._synced_at = time.monotonic()
+        return 1
+
+    def pauseSimulation(self) -> int:
+        self._sync()
+        self._state = SIMULATION_PAUSED
+        return 1
+
+    def stopSimulation(self) -> int:
+        self._state = SIMULATION_STOPPED
+        self._signals.clear()
+        return 1
+
+    def getSimulationState(self) -> int:
+        return self._state
+
+    def getSimulationTime(self) -> float:
+        self._sync()
+        return self._time
+
+    def getSimulationTimeStep(self) -> float:
+        return TIME_STEP
+
+    def setStepping(self, enable: bool = True) -> int:
+        self._sync()
+        self._stepping = enable
+        return 0
+
+    def step(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._state == SIMULATION_ADVANCING_RUNNING:
+                self._advance()
+
+    # Objects and scripts
+
+    def getObject(self, path: str, options: Optional[dict] = None) -> int:
+        if path not in self._paths:
+            raise Exception(f"object does not exist: {path}")
+        return self._paths[path]
+
+    def getScript(self, script_type: int, handle: int, name: str = "") -> int:
+        if script_type != SCRIPTTYPE_CHILDSCRIPT or not 0 <= handle < len(
+            self._objects
+        ):
+            raise Exception(f"object has no script: {handle}")
+        return handle + SCRIPT_HANDLE_OFFSET
+
+    def getInt32Param(self, parameter: int) -> int:
+        if parameter != INTPARAM_SCENE_UNIQUE_ID:
+            raise Exception(f"unknown parameter: {parameter}")
+        return self._scene_id
+
+    def executeScriptString(self, code: str, script: int) -> Tuple[int, List[int]]:
+        """The fake can't run Lua, so this only understands RESOLVE_HANDLES_LUA
+        of SimulationRobobo, and resolves the paths listed in it.
+        """
+        paths_table = re.search(r"local paths = \{(.*?)\}", code)
+        if script != SCRIPTTYPE_SANDBOXSCRIPT or paths_table is None:
+            raise Exception("the fake can only execute the handle resolving script")
+        self.executed_scripts += 1
+        handles: List[int] = []
+        for path in re.findall(r'"([^"]*)"', paths_table.group(1)):
+            handle = self._paths.get(path, -1)
+            handles.extend(
+                [handle, handle + SCRIPT_HANDLE_OFFSET if handle >= 0 else -1]
+            )
+        return 0, handles
+
+    def callScriptFunction(
+        self,
+        name: str,
+        script: int,
+        ints: List[int],
+        floats: List[float],
+        strings: List[str],
+        buffer: bytes,
+    ) -> Tuple[List[Any], List[float], List[str], bytes]:
+        self._sync()
+        if name not in self._script_functions:
+            raise Exception(f"script function does not exist: {name}")
+        robot = self._robots[self._objects[script - SCRIPT_HANDLE_OFFSET][0]]
+        return self._script_functions[name](robot, ints, floats, strings)
+
+    def getInt32Signal(self, name: str) -> Optional[int]:
+        self._sync()
+        return self._signals.get(name)
+
+    def getObjectPosition(self, handle: int, relative_to: int) -> List[float]:
+        self._sync()
+        robot = self._robots[self._objects[handle][0]]
+        return [robot.x, robot.y, 0.0]
+
+    def getObjectOrientation(self, handle: int, relative_to: int) -> List[float]:
+        self._sync()
+        robot = self._robots[self._objects[handle][0]]
+        return [0.0, 0.0, robot.theta]
+
+    def setObjectPosition(
+        self, handle: int, position: List[float], relative_to: int = HANDLE_WORLD
+    ) -> None:
+        robot = self._robots[self._objects[handle][0]]
+        robot.x, robot.y = position[0], position[1]
+
+    def setObjectOrientation(
+        self, handle: int, orientation: List[float], relative_to: int = HANDLE_WORLD
+    ) -> None:
+        robot = self._robots[self._objects[handle][0]]
+        robot.theta = orientation[2]
+
+    def getVisionSensorImg(self, handle: int) -> Tuple[bytes, List[int]]:
+        """A gradient that depends on where the robot is looking,
+        so that images change when the robot moves.
+        """
+        self._sync()
+        robot = self._robots[self._objects[handle][0]]
+        res_x, res_y = CAMERA_RESOLUTION
+        shade = int((math.degrees(robot.theta) % 360) / 360 * 255)
+        row = bytes(
+            value for x in range(res_x) for value in (shade, x * 255 // res_x, 128)
+        )
+        return row * res_y, [res_x, res_y]
+
+    # Time
+
+    def _sync(self) -> None:
+        """Outside of stepping mode, the simulation runs on its own in real time.
+        So, advance it by the amount of steps that have passed since the last call.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._state != SIMULATION_ADVANCING_RUNNING or self._stepping:
+                self._synced_at = now
+                return
+            while now - self._synced_at >= TIME_STEP:
+                self._advance()
+                self._synced_at += TIME_STEP
+
+    def _advance(self) -> None:
+        """Advance the simulation by one step"""
+        self._time += TIME_STEP
+        for robot in self._robots:
+            self._advance_wheels(robot)
+            robot.pan, robot.pan_speed = self._advance_joint(
+                robot.pan, robot.pan_target, robot.pan_speed, robot.pan_signal
+            )
+            robot.tilt, robot.tilt_speed = self._advance_joint(
+                robot.tilt, robot.tilt_target, robot.tilt_speed, robot.tilt_signal
+            )
+            robot.phone_positions = [(robot.x, robot.y)] + robot.phone_positions[:2]
+
+    def _advance_wheels(self, robot: _FakeRobobo) -> None:
+        if robot.move_left <= 0:
+            return
+        left = robot.speed_l * METERS_PER_SPEED * TIME_STEP
+        right = robot.speed_r * METERS_PER_SPEED * TIME_STEP
+        robot.theta += (right - left) / WHEEL_BASE
+        limit = ARENA_HALF_SIZE - ROBOT_RADIUS
+        distance = (left + right) / 2
+        robot.x = min(max(robot.x + distance * math.cos(robot.theta), -limit), limit)
+        robot.y = min(max(robot.y + distance * math.sin(robot.theta), -limit), limit)
+        robot.wheel_pos_l += robot.speed_l * DEGREES_PER_SPEED * TIME_STEP
+        robot.wheel_pos_r += robot.speed_r * DEGREES_PER_SPEED * TIME_STEP
+
+        robot.move_left -= TIME_STEP
+        if robot.move_left <= 1e-9:
+            robot.move_left = 0.0
+            robot.speed_l = robot.speed_r = 0.0
+            if robot.move_signal is not None:
+                self._signals[robot.move_signal] = 0
+
+    def _advance_joint(
+        self, position: float, target: float, speed: float, signal: Optional[str]
+    ) -> Tuple[float, float]:
+        if speed <= 0:
+            return position, speed
+        delta = speed * PAN_TILT_DEGREES_PER_SPEED * TIME_STEP
+        if abs(target - position) <= delta:
+            if signal is not None:
+                self._signals[signal] = 0
+            return target, 0.0
+        return position + math.copysign(delta, target - position), speed
+
+    # Script functions, named after the Lua functions they stand in for
+
+    def _move_wheels_by_time(self, robot: _FakeRobobo, ints, floats, strings):
+        robot.speed_r = float(min(max(ints[0], -100), 100))
+        robot.speed_l = float(min(max(ints[1], -100), 100))
+        robot.move_left = floats[0]
+        robot.move_signal = strings[0]
+        self._signals[strings[0]] = 1 if robot.move_left > 0 else 0
+        return [], [], [], b""
+
+    def _reset_wheel_encoders(self, robot: _FakeRobobo, ints, floats, strings):
+        robot.wheel_zero_l = robot.wheel_pos_l
+        robot.wheel_zero_r = robot.wheel_pos_r
+        return [], [], [], b""
+
+    def _read_wheels(self, robot: _FakeRobobo, ints, floats, strings):
+        return (
+            [
+                math.floor(robot.wheel_pos_r - robot.wheel_zero_r),
+                math.floor(robot.wheel_pos_l - robot.wheel_zero_l),
+                int(robot.speed_l),
+                int(robot.speed_r),
+            ],
+            [],
+            [],
+            b"",
+        )
+
+    def _set_led_color(self, robot: _FakeRobobo, ints, floats, strings):
+        robot.leds[strings[0]] = strings[1]
+        return [], [], [], b""
+
+    def _read_all_ir_sensor(self, robot: _FakeRobobo, ints, floats, strings):
+        return [self._ir_value(robot, angle) for angle in IR_ANGLES], [], [], b""
+
+    def _move_pan_to(self, robot: _FakeRobobo, ints, floats, strings):
+        robot.pan_target = float(min(max(ints[0], 11), 343))
+        robot.pan_speed = float(min(max(ints[1], 0), 100))
+        if robot.pan_speed > 0:
+            robot.pan_signal = strings[0]
+            self._signals[strings[0]] = 1
+        return [], [], [], b""
+
+    def _read_pan_position(self, robot: _FakeRobobo, ints, floats, strings):
+        return [math.floor(robot.pan)], [], [], b""
+
+    def _move_tilt_to(self, robot: _FakeRobobo, ints, floats, strings):
+        robot.tilt_target = float(min(max(ints[0], 5), 105))
+        robot.tilt_speed = float(min(max(ints[1], 0), 100))
+        if robot.tilt_speed > 0:
+            robot.tilt_signal = strings[0]
+            self._signals[strings[0]] = 1
+        return [], [], [], b""
+
+    def _read_tilt_position(self, robot: _FakeRobobo, ints, floats, strings):
+        return [math.floor(robot.tilt)], [], [], b""
+
+    def _read_acceleration_sensor(self, robot: _FakeRobobo, ints, floats, strings):
+        (x0, y0), (x1, y1), (x2, y2) = robot.phone_positions
+        return [], [x0 - 2 * x1 + x2, y0 - 2 * y1 + y2, 0.0], [], b""
+
+    def _read_orientation_sensor(self, robot: _FakeRobobo, ints, floats, strings):
+        return [], [math.degrees(robot.theta), 0.0, 0.0], [], b""
+
+    def _read_all_sensors(self, robot: _FakeRobobo, ints, floats, strings):
+        irs, _, _, _ = self._read_all_ir_sensor(robot, [], [], [])
+        _, accel, _, _ = self._read_acceleration_sensor(robot, [], [], [])
+        _, orientation, _, _ = self._read_orientation_sensor(robot, [], [], [])
+        wheels, _, _, _ = self._read_wheels(robot, [], [], [])
+        pan, _, _, _ = self._read_pan_position(robot, [], [], [])
+        tilt, _, _, _ = self._read_tilt_position(robot, [], [], [])
+        values = (
+            irs
+            + accel
+            + orientation
+            + wheels
+            + pan
+            + tilt
+            + [robot.x, robot.y, 0.0]
+            + [0.0, 0.0, robot.theta]
+            + [self._time]
+        )
+        return [], [float(value) for value in values], [], b""
+
+    def _read_completed_blocks(self, robot: _FakeRobobo, ints, floats, strings):
+        robot.block_registry.update(zip(ints, strings))
+        completed = [
+            blockid
+            for blockid, signal in robot.block_registry.items()
+            if not self._signals.get(signal)
+        ]
+        for blockid in completed:
+            del robot.block_registry[blockid]
+        return completed, [], [], b""
+
+    def _move_wheels_by_time_of(self, robot: _FakeRobobo, ints, floats, strings):
+        for i, (seconds, signal) in enumerate(zip(floats, strings)):
+            script, right, left = ints[3 * i : 3 * i + 3]
+            self.callScriptFunction(
+                "moveWheelsByTime", script, [right, left], [seconds], [signal], b""
+            )
+        return [], [], [], b""
+
+    def _read_all_sensors_of(self, robot: _FakeRobobo, ints, floats, strings):
+        values: List[float] = []
+        for script in ints:
+            _, sensors, _, _ = self.callScriptFunction(
+                "readAllSensors", script, [], [], [], b""
+            )
+            values.extend(sensors)
+        return [], values, [], b""
+
+    def _ir_value(self, robot: _FakeRobobo, angle: float) -> float:
+        """The IR value of a sensor, using the same formula as ir_back_c.lua,
+        with the distance to the closest wall in the direction of the sensor.
+        """
+        direction = robot.theta + math.radians(angle)
+        dx, dy = math.cos(direction), math.sin(direction)
+        distances = []
+        for position, step in ((robot.x, dx), (robot.y, dy)):
+            if step > 1e-9:
+                distances.append((ARENA_HALF_SIZE - position) / step)
+            elif step < -1e-9:
+                distances.append((-ARENA_HALF_SIZE - position) / step)
+        distance = max(min(distances) - ROBOT_RADIUS, 1e-3)
+        if distance > IR_RANGE:
+            distance = 1000000
+        return 16 * 0.1288 * (distance**-1.7887)
+
+
+class FakeRemoteAPIClient:
+    """A stand-in for `coppeliasim_zmqremoteapi_client.RemoteAPIClient`,
+    that simulates a scene in Python instead of connecting to CoppeliaSim.
+
+    This makes it possible to run and test code that uses SimulationRobobo
+    without CoppeliaSim, by passing it as client:
+    `SimulationRobobo(client=FakeRemoteAPIClient())`
+
+    The scene contains `nr_robots` Robobos (`/Robobo[0]` and up) in an empty arena
+    with walls around it. There is no base or food.
+    See `FakeSim` for what is and isn't simulated.
+
+    Like with CoppeliaSim, all clients in a process that connect to the same port
+    share the same scene. To get a separate scene, use a different port.
+    """
+
+    _scenes: Dict[int, FakeSim] = {}
+    _scenes_lock = threading.Lock()
+
+    def __init__(
+        self, host: str = "localhost", port: int = 23000, *, nr_robots: int = 1
+    ):
+        self.host = host
+        self.port = port
+        with FakeRemoteAPIClient._scenes_lock:
+            scene = FakeRemoteAPIClient._scenes.get(port)
+            if scene is None:
+                scene = FakeSim(nr_robots)
+                FakeRemoteAPIClient._scenes[port] = scene
+        if len(scene._robots) != nr_robots:
+            raise ValueError(
+                f"The scene at port {port} has {len(scene._robots)} robots,"
+                f" not {nr_robots}"
+            )
+        self._sim = scene
+
+    def require(self, name: str) -> FakeSim:
+        if name != "sim":
+            raise ValueError(f"The fake client only provides `sim`, not {name}")
+        return self._sim
+
+    def setStepping(self, enable: bool = True) -> int:
+        return self._sim.setStepping(enable)
+
+    def step(self, *, wait: bool = True) -> None:
+        self._sim.step(wait)
@@ -0,0 +1,434 @@
+import sys
+import json
+import math
+import time
+import bisect
+import functools
+import threading
+from pathlib import Path
+
+from robobo_interface.base import IRobobo
+from robobo_interface.utils import LatestImage
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# The upper bounds of the latency buckets, in seconds.
+# From a tenth of a millisecond (reading a cached sensor) to ten seconds (a long move).
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class LatencyHistogram:
+    """The amount of calls that took at most each of `buckets` seconds,
+    like a Prometheus histogram.
+
+    Arguments:
+    buckets: Sequence[float] = LATENCY_BUCKETS -> The upper bounds of the buckets,
+        in seconds, from low to high. Anything slower than the last one is counted as +Inf.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self._bounds = list(buckets)
+        # One more than the bounds, for +Inf. Not cumulative, that is done on export.
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Add a call that took `seconds`"""
+        self._counts[bisect.bisect_left(self._bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """The amount of calls that took at most each bound, ending with +Inf"""
+        bounds = self._bounds + [math.inf]
+        running = 0
+        ret = []
+        for bound, count in zip(bounds, self._counts):
+            running += count
+            ret.append((bound, running))
+        return ret
+
+    def quantile(self, q: float) -> float:
+        """An upper bound of the `q` quantile (0-1), from the buckets.
+        Returns the max if it falls in the last bucket, and 0 if nothing was observed.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        for bound, count in self.cumulative():
+            if count >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class MethodStats:
+    """What is known about the calls to one method of the robot"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.latency = LatencyHistogram(buckets)
+        self.errors = 0
+        self.rpcs = 0
+
+
+class RoboboMetrics:
+    """The call counts, latencies and RPC counts of the methods of a robot,
+    as collected by `InstrumentedRobobo`.
+
+    RPCs are the calls to CoppeliaSim in the simulation,
+    and the ROS service calls on the hardware.
+    The RPCs that are made while no method is running (for example by a background thread)
+    are counted as made by the method "none".
+
+    Arguments:
+    buckets: Sequence[float] = LATENCY_BUCKETS -> The upper bounds of the latency buckets, in seconds.
+    """
+
+    NO_METHOD = "none"
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._methods: Dict[str, MethodStats] = {}
+        self.started_at = time.time()
+
+    def observe(self, method: str, seconds: float, failed: bool = False) -> None:
+        """Add a call to `method` that took `seconds`"""
+        with self._lock:
+            stats = self._stats(method)
+            stats.latency.observe(seconds)
+            if failed:
+                stats.errors += 1
+
+    def count_rpc(self, method: Optional[str]) -> None:
+        """Add an RPC made while `method` was running"""
+        with self._lock:
+            self._stats(method or self.NO_METHOD).rpcs += 1
+
+    def reset(self) -> None:
+        """Forget everything collected so far"""
+        with self._lock:
+            self._methods = {}
+            self.started_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """A summary that can be written as JSON, with a dictionary per method"""
+        with self._lock:
+            methods = {
+                name: {
+                    "calls": stats.latency.count,
+                    "errors": stats.errors,
+                    "rpcs": stats.rpcs,
+                    "total_seconds": stats.latency.total,
+                    "mean_seconds": (
+                        stats.latency.total / stats.latency.count
+                        if stats.latency.count
+                        else 0.0
+                    ),
+                    "p50_seconds": stats.latency.quantile(0.5),
+                    "p99_seconds": stats.latency.quantile(0.99),
+                    "max_seconds": stats.latency.max,
+                    "buckets": {
+                        _format_bound(bound): count
+                        for bound, count in stats.latency.cumulative()
+                    },
+                }
+                for name, stats in sorted(self._methods.items())
+            }
+        return {
+            "started_at": self.started_at,
+            "duration_seconds": time.time() - self.started_at,
+            "methods": methods,
+        }
+
+    def to_prometheus(self, prefix: str = "robobo") -> str:
+        """The metrics in the Prometheus text format,
+        for example to put in the directory of the node exporter textfile collector.
+        """
+        histogram = f"{prefix}_method_duration_seconds"
+        lines = [
+            f"# HELP {histogram} How long the methods of the robot took.",
+            f"# TYPE {histogram} histogram",
+        ]
+        with self._lock:
+            methods = sorted(self._methods.items())
+            for name, stats in methods:
+                for bound, count in stats.latency.cumulative():
+                    lines.append(
+                        f'{histogram}_bucket{{method="{name}",le="{_format_bound(bound)}"}} {count}'
+                    )
+                lines.append(
+                    f'{histogram}_sum{{method="{name}"}} {stats.latency.total}'
+                )
+                lines.append(
+                    f'{histogram}_count{{method="{name}"}} {stats.latency.count}'
+                )
+            for metric, description, attribute in (
+                ("method_errors_total", "Calls that raised an exception.", "errors"),
+                ("rpcs_total", "RPCs and service calls made by each method.", "rpcs"),
+            ):
+                lines.append(f"# HELP {prefix}_{metric} {description}")
+                lines.append(f"# TYPE {prefix}_{metric} counter")
+                for name, stats in methods:
+                    lines.append(
+                        f'{prefix}_{metric}{{method="{name}"}} {getattr(stats, attribute)}'
+                    )
+        return "\n".join(lines) + "\n"
+
+    def dump(
+        self, directory: Union[str, Path], name: str = "robobo_metrics"
+    ) -> Tuple[Path, Path]:
+        """Write the summary to `directory`, as `{name}.json` and `{name}.prom`.
+        Pass RESULT_DIR to find them next to the other results.
+
+        returns:
+            The paths of the JSON and the Prometheus file.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        json_path = directory / f"{name}.json"
+        prometheus_path = directory / f"{name}.prom"
+        json_path.write_text(json.dumps(self.to_dict(), indent=2))
+        prometheus_path.write_text(self.to_prometheus())
+        return json_path, prometheus_path
+
+    def _stats(self, method: str) -> MethodStats:
+        # Only call with the lock held.
+        stats = self._methods.get(method)
+        if stats is None:
+            stats = self._methods[method] = MethodStats(self._buckets)
+        return stats
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if math.isinf(bound) else repr(bound)
+
+
+class _CountedCalls:
+    """Passes everything on to `target`, but calls `count` first
+    for every call of it, or of one of its methods.
+    """
+
+    # Methods that don't talk to the robot
+    _NOT_RPCS = frozenset(("close",))
+
+    def __init__(self, target: Any, count: Callable[[], None]):
+        self._target = target
+        self._count = count
+
+    def __call__(self, *args, **kwargs):
+        self._count()
+        return self._target(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._target, name)
+        if not callable(attribute) or name in self._NOT_RPCS:
+            return attribute
+
+        count = self._count
+
+        def counted(*args, **kwargs):
+            count()
+            return attribute(*args, **kwargs)
+
+        # Cache it, so this is only called the first time.
+        self.__dict__[name] = counted
+        return counted
+
+
+def _timed(name: str) -> Callable[..., Any]:
+    """A method of InstrumentedRobobo, that times the method of the robot called `name`"""
+
+    # Without `updated=()`, this would copy that the method of IRobobo is abstract.
+    @functools.wraps(getattr(IRobobo, name), updated=())
+    def method(self: "InstrumentedRobobo", *args, **kwargs):
+        return self._call(name, getattr(self._robot, name), args, kwargs)
+
+    return method
+
+
+class InstrumentedRobobo(IRobobo):
+    """A robot that measures how often each of its methods is called, how long they take,
+    and how many RPCs (calls to CoppeliaSim, or ROS services on the hardware) they make,
+    while passing all calls on to the actual robot.
+
+    This is to find out where a control step spends its time.
+    All public methods are measured, also the ones that are specific to one kind of robot,
+    like `play_simulation`. A method that calls another method of the robot
+    (like `perform_blocking`) counts the time of both, but the RPCs only for the inner one.
+
+    example:
+    ```
+    rob = InstrumentedRobobo(SimulationRobobo())
+    run_all_actions(rob)
+    rob.metrics.dump(RESULT_DIR)
+    ```
+
+    Only wrap a robot when you want to measure it. Without this, nothing is measured,
+    and setting `enabled` to False leaves only the cost of one extra function call.
+
+    Arguments you should understand:
+    robot: IRobobo -> The robot to measure.
+
+    Arguments you only have to understand if you want to do advanced stuff:
+    metrics: Optional[RoboboMetrics] = None -> Where to collect the measurements.
+        If None, a new one is made. Pass the same one to multiple robots to add them up.
+    count_rpcs: bool = True -> Wether to count the RPCs the robot makes.
+        For the simulation, this connects to CoppeliaSim right away.
+        For any other robot than the HardwareRobobo and the SimulationRobobo
+        (or a RecordingRobobo of one), no RPCs are counted.
+    enabled: bool = True -> Wether to measure anything. Can be changed later.
+    """
+
+    def __init__(
+        self,
+        robot: IRobobo,
+        metrics: Optional[RoboboMetrics] = None,
+        count_rpcs: bool = True,
+        enabled: bool = True,
+    ):
+        self._robot = robot
+        self._metrics = metrics if metrics is not None else RoboboMetrics()
+        self._used_pids = robot._used_pids
+        self.enabled = enabled
+        # The method that is running on each thread, to know who made an RPC.
+        self._running = threading.local()
+        if count_rpcs:
+            _count_rpcs(robot, self._count_rpc)
+
+    def __getattr__(self, name: str):
+        # Everything that is not part of IRobobo, like `play_simulation`, goes to the robot,
+        # and is measured as well if it is a public method.
+        if name == "_robot":
+            raise AttributeError(name)
+        attribute = getattr(self._robot, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def method(*args, **kwargs):
+            return self._call(name, attribute, args, kwargs)
+
+        # Cache it, so this is only called the first time.
+        self.__dict__[name] = method
+        return method
+
+    @property
+    def robot(self) -> IRobobo:
+        """The robot this measures"""
+        return self._robot
+
+    @property
+    def _thread_safe_wait(self) -> bool:
+        return self._robot._thread_safe_wait
+
+    @property
+    def metrics(self) -> RoboboMetrics:
+        """Where the measurements are collected"""
+        return self._metrics
+
+    set_emotion = _timed("set_emotion")
+    move = _timed("move")
+    move_blocking = _timed("move_blocking")
+    reset_wheels = _timed("reset_wheels")
+    talk = _timed("talk")
+    play_emotion_sound = _timed("play_emotion_sound")
+    set_led = _timed("set_led")
+    set_sensor_frequency = _timed("set_sensor_frequency")
+    read_irs = _timed("read_irs")
+    get_image_front = _timed("get_image_front")
+    stream_images = _timed("stream_images")
+    set_phone_pan = _timed("set_phone_pan")
+    set_phone_pan_blocking = _timed("set_phone_pan_blocking")
+    read_phone_pan = _timed("read_phone_pan")
+    set_phone_tilt = _timed("set_phone_tilt")
+    set_phone_tilt_blocking = _timed("set_phone_tilt_blocking")
+    read_phone_tilt = _timed("read_phone_tilt")
+    read_accel = _timed("read_accel")
+    read_orientation = _timed("read_orientation")
+    read_wheels = _timed("read_wheels")
+    read_frame = _timed("read_frame")
+    read_stamp = _timed("read_stamp")
+    wait_for_fresh = _timed("wait_for_fresh")
+    sleep = _timed("sleep")
+    perform_blocking = _timed("perform_blocking")
+    is_blocked = _timed("is_blocked")
+    block = _timed("block")
+    wait = _timed("wait")
+    wait_all = _timed("wait_all")
+
+    def _start_image_stream(
+        self, latest: LatestImage, max_fps: Optional[float]
+    ) -> Callable[[], None]:
+        return self._robot._start_image_stream(latest, max_fps)
+
+    def _call(
+        self,
+        name: str,
+        method: Callable[..., Any],
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+    ) -> Any:
+        if not self.enabled:
+            return method(*args, **kwargs)
+
+        outer = getattr(self._running, "method", None)
+        self._running.method = name
+        failed = True
+        start = time.perf_counter()
+        try:
+            ret = method(*args, **kwargs)
+            failed = False
+            return ret
+        finally:
+            self._metrics.observe(name, time.perf_counter() - start, failed)
+            self._running.method = outer
+
+    def _count_rpc(self) -> None:
+        if self.enabled:
+            self._metrics.count_rpc(getattr(self._running, "method", None))
+
+
+def _count_rpcs(robot: IRobobo, count: Callable[[], None]) -> None:
+    """Make the robot call `count` for every RPC it makes."""
+    # Only look at the modules that are already imported,
+    # to not import ROS to instrument a simulation, or the other way around.
+    recording = sys.modules.get("robobo_interface.recording")
+    if recording is not None and isinstance(robot, recording.RecordingRobobo):
+        _count_rpcs(robot.robot, count)
+        return
+
+    simulation = sys.modules.get("robobo_interface.simulation")
+    if simulation is not None and isinstance(robot, simulation.SimulationRobobo):
+        # Every call to the sim API is one RPC, and so is every step.
+        sim = robot._sim
+        client = robot._client
+        robot._sim_instance = _CountedCalls(sim, count)
+        client.step = _CountedCalls(client.step, count)
+        return
+
+    hardware = sys.modules.get("robobo_interface.hardware")
+    if hardware is not None and isinstance(robot, hardware.HardwareRobobo):
+        for name, value in list(vars(robot).items()):
+            if isinstance(value, hardware.PersistentServiceProxy):
+                setattr(robot, name, _CountedCalls(value, count))
@@ -0,0 +1,487 @@
+import time
+import struct
+import threading
+from enum import Enum
+from pathlib import Path
+
+import numpy
+
+from robobo_interface.base import IRobobo
+from robobo_interface.datatypes import (
+    Emotion,
+    LedColor,
+    LedId,
+    Acceleration,
+    Orientation,
+    WheelPosition,
+    SoundEmotion,
+    SensorFrequency,
+    Sensor,
+    SampleStamp,
+)
+from robobo_interface.utils import LatestImage
+
+from typing import (
+    BinaryIO,
+    Callable,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
+from numpy.typing import NDArray
+
+# The first bytes of every session log, to recognise the file (and its version) by.
+LOG_MAGIC = b"RBBOLOG\x01"
+
+# Every record starts with this header: timestamp, kind, (unused), payload length.
+# It is 16 bytes, and payloads are padded to a multiple of 8 bytes,
+# so the float64 values of a payload can be read directly from the memory-mapped file.
+RECORD_HEADER = struct.Struct("<dHHI")
+# Images start with their height, width and amount of channels (and some padding)
+IMAGE_HEADER = struct.Struct("<IIII")
+
+
+class RecordKind(Enum):
+    """What a record of a session log contains.
+    Sensor readings and numeric commands are stored as float64 values,
+    images as their raw pixels, and the other commands as text.
+    """
+
+    # Sensor readings
+    IRS = 1  # In the order of `read_irs`, NaN for None
+    ACCEL = 2  # [x, y, z]
+    ORIENTATION = 3  # [yaw, pitch, roll]
+    WHEELS = 4  # [wheel_pos_r, wheel_pos_l, wheel_speed_r, wheel_speed_l]
+    PHONE_PAN = 5  # [pan]
+    PHONE_TILT = 6  # [tilt]
+    IMAGE = 7  # raw pixels of the front camera
+
+    # Commands
+    MOVE = 16  # [left_speed, right_speed, millis, blockid]
+    SET_PHONE_PAN = 17  # [pan_position, pan_speed, blockid]
+    SET_PHONE_TILT = 18  # [tilt_position, tilt_speed, blockid]
+    COMPLETED = 19  # [blockid], the action with this blockid is done
+    RESET_WHEELS = 20  # []
+    SLEEP = 21  # [seconds]
+    SET_SENSOR_FREQUENCY = 22  # [frequency]
+    SET_EMOTION = 23  # text
+    TALK = 24  # text
+    PLAY_EMOTION_SOUND = 25  # text
+    SET_LED = 26  # text, "<selector> <color>"
+
+
+# The kind of the records of the readings of each sensor
+SENSOR_KINDS = {
+    Sensor.IRS: RecordKind.IRS,
+    Sensor.ACCEL: RecordKind.ACCEL,
+    Sensor.ORIENTATION: RecordKind.ORIENTATION,
+    Sensor.WHEELS: RecordKind.WHEELS,
+    Sensor.PHONE_PAN: RecordKind.PHONE_PAN,
+    Sensor.PHONE_TILT: RecordKind.PHONE_TILT,
+}
+
+TEXT_KINDS = frozenset(
+    (
+        RecordKind.SET_EMOTION,
+        RecordKind.TALK,
+        RecordKind.PLAY_EMOTION_SOUND,
+        RecordKind.SET_LED,
+    )
+)
+
+
+class SessionRecorder:
+    """Writes sensor readings and commands, with their timestamps, to an append-only binary log.
+    The log can be read back with `SessionLog`, or played back with `ReplayRobobo`.
+
+    Records are written to a buffer, which is flushed to the file at most `flush_interval`
+    seconds after a record was written, so recording doesn't have to wait for the disk.
+    It is safe to record from multiple threads at the same time.
+
+    Arguments you should understand:
+    path: Union[str, Path] -> The file to write to, for example `RESULT_DIR / "session.rblog"`.
+        If it exists already, the new records are added to the end of it.
+
+    Arguments you only have to understand if you want to do advanced stuff:
+    clock: Callable[[], float] = time.time -> Where the timestamps of the records come from.
+        For a simulation in stepping mode, you might want to pass `rob.get_sim_time`,
+        so the log is in simulation time instead of real time.
+    flush_interval: float = 1.0 -> How often (in seconds) to write the buffer to the file.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        clock: Callable[[], float] = time.time,
+        flush_interval: float = 1.0,
+    ):
+        self._path = Path(path)
+        self._clock = clock
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._file: BinaryIO = open(self._path, "ab")
+        if self._file.tell() == 0:
+            # Flushed right away, so the log can be opened before anything is recorded
+            self._file.write(LOG_MAGIC)
+            self._file.flush()
+        else:
+            with open(self._path, "rb") as existing:
+                if existing.read(len(LOG_MAGIC)) != LOG_MAGIC:
+                    self._file.close()
+                    raise ValueError(f"{self._path} is not a session log")
+        self._last_flush = time.monotonic()
+        # Flushes the records that were written since the last flush, if any
+        self._flush_timer: Optional[threading.Timer] = None
+
+    @property
+    def path(self) -> Path:
+        """The file the log is written to"""
+        return self._path
+
+    def __enter__(self) -> "SessionRecorder":
+        return self
+
+    def __exit__(self, *_args) -> None:
+        self.close()
+
+    def now(self) -> float:
+        """The current time, according to the clock of this recorder"""
+        return self._clock()
+
+    def record(
+        self,
+        kind: RecordKind,
+        values: Sequence[Optional[float]],
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """Write a record of numeric values. None values are stored as NaN.
+
+        Arguments:
+        kind: RecordKind - What the values are.
+        values: Sequence[Optional[float]] - The values themselves.
+        timestamp: Optional[float] - When the values were measured or sent.
+            If None, the current time of the clock is used.
+        """
+        payload = numpy.array(
+            [numpy.nan if value is None else value for value in values],
+            dtype="<f8",
+        ).tobytes()
+        self._write(kind, payload, timestamp)
+
+    def record_text(
+        self, kind: RecordKind, text: str, timestamp: Optional[float] = None
+    ) -> None:
+        """Write a record of text, like the message of `talk`.
+        The arguments are the same as the ones of `record`.
+        """
+        self._write(kind, text.encode("utf-8"), timestamp)
+
+    def record_image(
+        self, image: NDArray[numpy.uint8], timestamp: Optional[float] = None
+    ) -> None:
+        """Write an image of the front camera, either color or grayscale.
+        The arguments are the same as the ones of `record`.
+        """
+        height, width = image.shape[:2]
+        channels = image.shape[2] if image.ndim == 3 else 1
+        payload = IMAGE_HEADER.pack(height, width, channels, 0) + image.tobytes()
+        self._write(RecordKind.IMAGE, payload, timestamp)
+
+    def flush(self) -> None:
+        """Write everything that is recorded so far to the file"""
+        with self._lock:
+            self._file.flush()
+            self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Flush and close the file. Nothing can be recorded afterwards."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._file.closed:
+                self._file.close()
+
+    def _flush_on_timer(self) -> None:
+        with self._lock:
+            self._flush_timer = None
+            if not self._file.closed:
+                self._file.flush()
+                self._last_flush = time.monotonic()
+
+    def _write(
+        self, kind: RecordKind, payload: bytes, timestamp: Optional[float]
+    ) -> None:
+        if timestamp is None:
+            timestamp = self._clock()
+        header = RECORD_HEADER.pack(timestamp, kind.value, 0, len(payload))
+        padding = b"\x00" * (-len(payload) % 8)
+        with self._lock:
+            self._file.write(header)
+            self._file.write(payload)
+            self._file.write(padding)
+            if time.monotonic() - self._last_flush >= self._flush_interval:
+                self._file.flush()
+                self._last_flush = time.monotonic()
+            elif self._flush_timer is None:
+                # Also when nothing is recorded after this, it is flushed in time
+                self._flush_timer = threading.Timer(
+                    self._flush_interval, self._flush_on_timer
+                )
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+
+class RecordingRobobo(IRobobo):
+    """A robot that writes everything it reads and does to a `SessionRecorder`,
+    while passing all calls on to the actual robot.
+
+    This works for both the hardware and the simulation. Functions that are specific to one
+    of them (like `play_simulation`) can still be called, but are not recorded.
+    To also record every message the hardware sends (and not only the ones you read),
+    pass the same recorder to the `HardwareRobobo` as well.
+    The sensor readings and completed actions are then recorded by the `HardwareRobobo`
+    when they arrive, and not again by this, so every reading is in the log once.
+
+    example:
+    ```
+    recorder = SessionRecorder(RESULT_DIR / "session.rblog")
+    rob = RecordingRobobo(SimulationRobobo(), recorder)
+    ...
+    recorder.close()
+    ```
+
+    Arguments you should understand:
+    robot: IRobobo -> The robot to control.
+    recorder: SessionRecorder -> Where to write the records to.
+
+    Arguments you only have to understand if you want to do advanced stuff:
+    record_images: bool = True -> Wether to record the images of the front camera.
+        These take a lot more space than all other records combined.
+    """
+
+    def __init__(
+        self, robot: IRobobo, recorder: SessionRecorder, record_images: bool = True
+    ):
+        self._robot = robot
+        self._recorder = recorder
+        self._record_images = record_images
+        self._used_pids = robot._used_pids
+        # The kinds the robot already writes to the same recorder itself
+        self._skipped: FrozenSet[RecordKind] = (
+            getattr(robot, "recorded_kinds", frozenset())
+            if getattr(robot, "recorder", None) is recorder
+            else frozenset()
+        )
+        # The blockids of which the completion is not recorded yet
+        self._pending: Set[int] = set()
+        self._pending_lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        # Everything that is not part of IRobobo, like `play_simulation`, goes to the robot.
+        if name == "_robot":
+            raise AttributeError(name)
+        return getattr(self._robot, name)
+
+    @property
+    def robot(self) -> IRobobo:
+        """The robot this records"""
+        return self._robot
+
+    @property
+    def _thread_safe_wait(self) -> bool:
+        return self._robot._thread_safe_wait
+
+    @property
+    def recorder(self) -> SessionRecorder:
+        """The recorder this writes to"""
+        return self._recorder
+
+    def set_emotion(self, emotion: Emotion) -> None:
+        self._recorder.record_text(RecordKind.SET_EMOTION, emotion.value)
+        self._robot.set_emotion(emotion)
+
+    def move(
+        self,
+        left_speed: int,
+        right_speed: int,
+        millis: int,
+        blockid: Optional[int] = None,
+    ) -> int:
+        sent_at = self._recorder.now()
+        blockid = self._robot.move(left_speed, right_speed, millis, blockid)
+        self._record_action(
+            RecordKind.MOVE, (left_speed, right_speed, millis), blockid, sent_at
+        )
+        return blockid
+
+    def reset_wheels(self) -> None:
+        self._recorder.record(RecordKind.RESET_WHEELS, ())
+        self._robot.reset_wheels()
+
+    def talk(self, message: str) -> None:
+        self._recorder.record_text(RecordKind.TALK, message)
+        self._robot.talk(message)
+
+    def play_emotion_sound(self, emotion: SoundEmotion) -> None:
+        self._recorder.record_text(RecordKind.PLAY_EMOTION_SOUND, emotion.value)
+        self._robot.play_emotion_sound(emotion)
+
+    def set_led(self, selector: LedId, color: LedColor) -> None:
+        self._recorder.record_text(
+            RecordKind.SET_LED, f"{selector.value} {color.value}"
+        )
+        self._robot.set_led(selector, color)
+
+    def set_sensor_frequency(self, frequency: SensorFrequency) -> None:
+        self._recorder.record(RecordKind.SET_SENSOR_FREQUENCY, (frequency.value,))
+        self._robot.set_sensor_frequency(frequency)
+
+    def read_irs(
+        self, out: Optional[NDArray[numpy.float64]] = None
+    ) -> Union[List[Optional[float]], NDArray[numpy.float64]]:
+        irs = self._robot.read_irs(out)
+        self._record(RecordKind.IRS, irs)
+        return irs
+
+    def get_image_front(
+        self, out: Optional[NDArray[numpy.uint8]] = None
+    ) -> NDArray[numpy.uint8]:
+        image = self._robot.get_image_front(out)
+        if self._record_images:
+            self._recorder.record_image(image)
+        return image
+
+    def stream_images(
+        self, max_fps: Optional[float] = None, max_age: Optional[float] = None
+    ) -> Iterator[NDArray[numpy.uint8]]:
+        images = self._robot.stream_images(max_fps, max_age)
+        try:
+            for image in images:
+                if self._record_images:
+                    self._recorder.record_image(image)
+                yield image
+        finally:
+            images.close()
+
+    def set_phone_pan(
+        self, pan_position: int, pan_speed: int, blockid: Optional[int] = None
+    ) -> int:
+        sent_at = self._recorder.now()
+        blockid = self._robot.set_phone_pan(pan_position, pan_speed, blockid)
+        self._record_action(
+            RecordKind.SET_PHONE_PAN, (pan_position, pan_speed), blockid, sent_at
+        )
+        return blockid
+
+    def read_phone_pan(self) -> int:
+        pan = self._robot.read_phone_pan()
+        self._record(RecordKind.PHONE_PAN, (pan,))
+        return pan
+
+    def set_phone_tilt(
+        self, tilt_position: int, tilt_speed: int, blockid: Optional[int] = None
+    ) -> int:
+        sent_at = self._recorder.now()
+        blockid = self._robot.set_phone_tilt(tilt_position, tilt_speed, blockid)
+        self._record_action(
+            RecordKind.SET_PHONE_TILT, (tilt_position, tilt_speed), blockid, sent_at
+        )
+        return blockid
+
+    def read_phone_tilt(self) -> int:
+        tilt = self._robot.read_phone_tilt()
+        self._record(RecordKind.PHONE_TILT, (tilt,))
+        return tilt
+
+    def read_accel(self) -> Acceleration:
+        accel = self._robot.read_accel()
+        self._record(RecordKind.ACCEL, accel.to_array())
+        return accel
+
+    def read_orientation(self) -> Orientation:
+        orientation = self._robot.read_orientation()
+        self._record(RecordKind.ORIENTATION, orientation.to_array())
+        return orientation
+
+    def read_wheels(self) -> WheelPosition:
+        wheels = self._robot.read_wheels()
+        self._record(RecordKind.WHEELS, wheels.to_array())
+        return wheels
+
+    def read_stamp(self, sensor: Sensor) -> SampleStamp:
+        return self._robot.read_stamp(sensor)
+
+    def wait_for_fresh(
+        self,
+        sensor: Sensor,
+        after: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        return self._robot.wait_for_fresh(sensor, after, timeout)
+
+    def sleep(self, seconds: float) -> None:
+        self._recorder.record(RecordKind.SLEEP, (seconds,))
+        self._robot.sleep(seconds)
+
+    def is_blocked(self, blockid: int) -> bool:
+        blocked = self._robot.is_blocked(blockid)
+        if not blocked:
+            self._record_completed([blockid])
+        return blocked
+
+    def block(self) -> None:
+        self._robot.block()
+        self._record_completed(self._take_pending())
+
+    def wait(self, blockid: int, timeout: Optional[float] = None) -> bool:
+        completed = self._robot.wait(blockid, timeout)
+        if completed:
+            self._record_completed([blockid])
+        return completed
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        completed = self._robot.wait_all(timeout)
+        if completed:
+            self._record_completed(self._take_pending())
+        return completed
+
+    def _start_image_stream(
+        self, latest: LatestImage, max_fps: Optional[float]
+    ) -> Callable[[], None]:
+        return self._robot._start_image_stream(latest, max_fps)
+
+    def _record(self, kind: RecordKind, values: Sequence[Optional[float]]) -> None:
+        if kind not in self._skipped:
+            self._recorder.record(kind, values)
+
+    def _record_action(
+        self,
+        kind: RecordKind,
+        values: Sequence[float],
+        blockid: int,
+        sent_at: float,
+    ) -> None:
+        with self._pending_lock:
+            self._pending.add(blockid)
+        self._recorder.record(kind, (*values, blockid), sent_at)
+
+    def _take_pending(self) -> List[int]:
+        with self._pending_lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        return pending
+
+    def _record_completed(self, blockids: Sequence[int]) -> None:
+        now = self._recorder.now()
+        for blockid in blockids:
+            with self._pending_lock:
+                if blockid not in self._pending:
+                    continue
+                self._pending.discard(blockid)
+            if RecordKind.COMPLETED not in self._skipped:
+                self._recorder.record(RecordKind.COMPLETED, (blockid,), now)
@@ -1,9 +1,10 @@
 import os
 import sys
+import math
 import time
 import signal
+import threading
 
-import cv2
 import numpy
 
 from robobo_interface.base import IRobobo
@@ -16,16 +17,82 @@ from robobo_interface.datatypes import (
     Orientation,
     WheelPosition,
     SoundEmotion,
+    SensorSnapshot,
+    SensorFrame,
+    SensorFrequency,
+    Sensor,
+    SampleStamp,
+)
+from robobo_interface.utils import (
+    BlockidAllocator,
+    DEFAULT_BLOCKIDS,
+    ImageRing,
+    LatestImage,
+    write_image,
 )
-from robobo_interface.utils import LockedSet
 
 from coppeliasim_zmqremoteapi_client import RemoteAPIClient
 
-from typing import Callable, List, NoReturn, Optional, TypeVar
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NoReturn,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 from numpy.typing import NDArray
 
 T = TypeVar("T")
 
+# The bounds of the time to wait between checking if actions are completed.
+# Starts at the minimum, and doubles with every check, up to the maximum.
+MIN_POLL_DELAY = 0.001
+MAX_POLL_DELAY = 0.02
+
+# In stepping mode, how many steps to take between checking if the simulation is still running.
+# Without checking, waiting on a simulation that was stopped elsewhere would step forever.
+STEPS_PER_STATE_CHECK = 50
+
+# The layout of the floats returned by `readAllSensors` in smartphone.lua
+SNAPSHOT_IRS = slice(0, 8)
+SNAPSHOT_ACCEL = slice(8, 11)
+SNAPSHOT_ORIENTATION = slice(11, 14)
+SNAPSHOT_WHEELS = slice(14, 18)
+SNAPSHOT_PAN = 18
+SNAPSHOT_TILT = 19
+SNAPSHOT_POSITION = slice(20, 23)
+SNAPSHOT_WORLD_ORIENTATION = slice(23, 26)
+SNAPSHOT_SIM_TIME = 26
+SNAPSHOT_SIZE = 27
+
+# Resolves the objects at a list of paths, and the child scripts attached to them,
+# in one call to the simulation. Objects or scripts that don't exist are -1.
+RESOLVE_HANDLES_LUA = """
+local paths = {%s}
+local handles = {}
+for i = 1, #paths do
+    local object = sim.getObject(paths[i], {noError = true})
+    local script = -1
+    if object ~= -1 then
+        local ok, found = pcall(sim.getScript, sim.scripttype_childscript, object)
+        if ok and found then script = found end
+    end
+    handles[#handles + 1] = object
+    handles[#handles + 1] = script
+end
+return handles
+"""
+
+# The handles of the scenes that were already resolved, as (object, script) per path.
+# Handles stay the same as long as the scene is loaded, so the scene only needs
+# to be asked once per robot. Keyed by (ip adress, port, scene unique id, identifier)
+_HANDLE_CACHE: Dict[Tuple[str, int, int, str], Dict[str, Tuple[int, int]]] = {}
+
 
 class SimulationRobobo(IRobobo):
     """The simulation robot.
@@ -54,6 +121,31 @@ class SimulationRobobo(IRobobo):
         If that envoirement variable is not set, it will default to "0.0.0.0"
     logger: Callable[[str], None] = print -> The function to use for logging / printing.
     timeout_dur: int -> The amount of time to wait for API calls before erroring out.
+        The connection is only made when the robot is first used,
+        so that is also when a failing connection shows up.
+    stepping: bool = False -> Whether to run the simulation in stepping mode.
+        Normally, CoppeliaSim runs on its own, and `sleep` and the `_blocking` functions
+        wait in real time for the simulation to catch up.
+        In stepping mode, the simulation only advances when this class tells it to,
+        meaning these functions advance the simulation by exactly the amount of steps needed,
+        as fast as the physics engine allows, with results that don't depend on the load
+        of the computer. Only use this when you are the only client of the simulation.
+    state_cache_duration: float = 1.0 -> How long (in seconds) to trust the last known state
+        of the simulation (running, paused, stopped) before asking CoppeliaSim again.
+        The actuators and `sleep` use this known state to check if the simulation is running,
+        so they don't have to pay an extra round trip every call.
+        The state is always updated by `play_simulation`, `pause_simulation`,
+        `stop_simulation`, `is_running`, `is_paused` and `is_stopped`.
+    client: Optional[RemoteAPIClient] = None -> An existing connection to CoppeliaSim to use.
+        This is used to control multiple robots in one scene over one connection,
+        like `SimulationRoboboFleet` does. If passed, `api_port` and `ip_adress` are only used
+        to open extra connections of the same kind, like the one of `stream_images`.
+    image_buffers: int = 0 -> The amount of buffers `get_image_front` reuses for its frames
+        when no `out` is passed. If 0, every frame is a new array.
+        Else, frames are written into these buffers in turn, which avoids allocating memory
+        for every frame, but means a frame is overwritten `image_buffers` frames later.
+    blockids: range = range(1, 768) -> The blockids this robot hands out for its actions.
+        Give robots ranges that don't overlap to tell their actions apart by blockid.
     """
 
     def __init__(
@@ -63,10 +155,24 @@ class SimulationRobobo(IRobobo):
         ip_adress: Optional[str] = None,
         logger: Callable[[str], None] = print,
         timeout_dur: int = 10,
+        stepping: bool = False,
+        state_cache_duration: float = 1.0,
+        client: Optional[RemoteAPIClient] = None,
+        image_buffers: int = 0,
+        blockids: range = DEFAULT_BLOCKIDS,
     ):
         self._logger = logger
-        self._used_pids: LockedSet[int] = LockedSet()
+        self._image_ring = ImageRing(image_buffers)
+        self._used_pids = BlockidAllocator(blockids)
         self._identifier = f"[{identifier}]"
+        self._stepping = stepping
+        self._time_step: Optional[float] = None
+        self._state_cache_duration = state_cache_duration
+        self._known_state: Optional[int] = None
+        self._known_state_at = 0.0
+        # Whether smartphone.lua of the scene has `readCompletedBlocks`.
+        # None untill the first poll found out.
+        self._reads_completed_blocks: Optional[bool] = None
 
         if api_port is None:
             api_port = int(os.getenv("COPPELIA_SIM_PORT", "23000"))
@@ -76,25 +182,82 @@ class SimulationRobobo(IRobobo):
         if ip_adress is None:
             ip_adress = os.getenv("COPPELIA_SIM_IP", "0.0.0.0")
 
-        # The RemoteAPIClient waits indefinetly, but I want some way to show an error.
-        # It closes the connection when it gets garbage collected, so no need to close
-        try:
-            self._client = timeout(
-                lambda: RemoteAPIClient(host=ip_adress, port=api_port), timeout_dur
-            )
-        except TimeoutError:
-            self._fail_connect(api_port, ip_adress)
-
-        try:
-            self._sim = timeout(lambda: self._client.require("sim"), timeout_dur)
-        except TimeoutError:
-            self._fail_connect(api_port, ip_adress)
+        self._api_port = api_port
+        self._ip_adress = ip_adress
+
+        # Connecting, and finding the robot in the scene, only happens on first use.
+        # This keeps constructing cheap, and lets robots be constructed in parallel.
+        self._timeout_dur = timeout_dur
+        self._connect_lock = threading.RLock()
+        self._client_instance = client
+        self._sim_instance = None
+
+    # The handles of the scene, which are resolved by `_initialise_handles` on first use.
+    _HANDLE_ATTRIBUTES = frozenset(
+        (
+            "_robobo",
+            "_wheels_script",
+            "_leds_script",
+            "_ir_script",
+            "_pan_motor_script",
+            "_tilt_motor_script",
+            "_smartphone_script",
+            "_smartphone_camera",
+            "_base",
+            "_base_script",
+            "_food_script",
+        )
+    )
+
+    def __getattr__(self, name: str):
+        # Only called for attributes that are not set (yet).
+        if name in SimulationRobobo._HANDLE_ATTRIBUTES:
+            with self._connect_lock:
+                if name not in self.__dict__:
+                    self._initialise_handles()
+            return self.__dict__[name]
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {name!r}"
+        )
 
-        self._initialise_handles()
-        self._logger(
-            f"""Connected to remote CoppeliaSim API server at port {api_port}
+    @property
+    def _client(self) -> RemoteAPIClient:
+        """The connection to CoppeliaSim, which is made on first use"""
+        if self._client_instance is None:
+            with self._connect_lock:
+                if self._client_instance is None:
+                    try:
+                        self._client_instance = timeout(
+                            lambda: RemoteAPIClient(
+                                host=self._ip_adress, port=self._api_port
+                            ),
+                            self._timeout_dur,
+                        )
+                    except TimeoutError:
+                        self._fail_connect(self._api_port, self._ip_adress)
+        return self._client_instance
+
+    @property
+    def _sim(self):
+        """The `sim` API of CoppeliaSim, which is required on first use"""
+        if self._sim_instance is None:
+            with self._connect_lock:
+                if self._sim_instance is None:
+                    client = self._client
+                    # The RemoteAPIClient waits indefinetly,
+                    # but I want some way to show an error.
+                    try:
+                        sim = timeout(lambda: client.require("sim"), self._timeout_dur)
+                    except TimeoutError:
+                        self._fail_connect(self._api_port, self._ip_adress)
+                    if self._stepping:
+                        client.setStepping(True)
+                    self._sim_instance = sim
+                    self._logger(
+                        f"""Connected to remote CoppeliaSim API server at port {self._api_port}
             Connected to robot: {self._identifier}"""
-        )
+                    )
+        return self._sim_instance
 
     def set_emotion(self, emotion: Emotion) -> None:
         """Show the emotion of the robot on the screen
@@ -125,21 +288,23 @@ class SimulationRobobo(IRobobo):
         returns:
             the blockid
         """
-        if not self.is_running():
+        if not self._is_running_cached():
             raise RuntimeError("Cannot move wheels when simulation is not running")
-        if blockid in self._used_pids:
-            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
-        blockid = blockid if blockid is not None else self._first_unblocked()
-        self._used_pids.add(blockid)
+        blockid = self._used_pids.acquire(blockid)
 
-        self._sim.callScriptFunction(
-            "moveWheelsByTime",
-            self._wheels_script,
-            [right_speed, left_speed],
-            [millis / 1000.0],
-            [self._block_string(blockid)],
-            bytearray(),
-        )
+        try:
+            self._sim.callScriptFunction(
+                "moveWheelsByTime",
+                self._wheels_script,
+                [right_speed, left_speed],
+                [millis / 1000.0],
+                [self._block_string(blockid)],
+                bytearray(),
+            )
+        except BaseException:
+            # The action never started, so its blockid can be handed out again.
+            self._used_pids.discard(blockid)
+            raise
 
         return blockid
 
@@ -148,7 +313,7 @@ class SimulationRobobo(IRobobo):
         After calling this topic both encoders (topic /robot/wheels) will start again
         in position 0.
         """
-        if not self.is_running():
+        if not self._is_running_cached():
             raise RuntimeError("Cannot reset wheels when simulation is not running")
         self._sim.callScriptFunction(
             "resetWheelEncoders",
@@ -177,6 +342,17 @@ class SimulationRobobo(IRobobo):
         """
         self._logger(f"The robot {self._identifier} makes sound: {emotion.value}")
 
+    def set_sensor_frequency(self, frequency: SensorFrequency) -> None:
+        """Set how often the robot sends out the values of its sensors.
+        For the simulation, sensors are always read directly, so this is just printing.
+
+        Arguments:
+        frequency: SensorFrequency
+        """
+        self._logger(
+            f"The robot {self._identifier} sets its sensor frequency to {frequency.name}"
+        )
+
     def set_led(self, selector: LedId, color: LedColor) -> None:
         """Set the led of the robot
 
@@ -184,7 +360,7 @@ class SimulationRobobo(IRobobo):
         selector: LedId
         color: LedColor
         """
-        if not self.is_running():
+        if not self._is_running_cached():
             raise RuntimeError("Cannot set leds when simulation is not running")
         self._sim.callScriptFunction(
             "setLEDColor",
@@ -195,9 +371,14 @@ class SimulationRobobo(IRobobo):
             bytearray(),
         )
 
-    def read_irs(self) -> List[Optional[float]]:
+    def read_irs(
+        self, out: Optional[NDArray[numpy.float64]] = None
+    ) -> Union[List[Optional[float]], NDArray[numpy.float64]]:
         """Returns sensor readings:
         [BackL, BackR, FrontL, FrontR, FrontC, FrontRR, BackC, FrontLL]
+
+        Arguments
+        out: An array of shape (8,) to write the readings into, see `IRobobo.read_irs`.
         """
         ints, _floats, _strings, _buffer = self._sim.callScriptFunction(
             "readAllIRSensor",
@@ -207,22 +388,27 @@ class SimulationRobobo(IRobobo):
             [],
             bytearray(),
         )
+        if out is not None:
+            out[:] = ints
+            return out
         return list(ints)
 
-    def get_image_front(self) -> NDArray[numpy.uint8]:
+    def get_image_front(
+        self, out: Optional[NDArray[numpy.uint8]] = None
+    ) -> NDArray[numpy.uint8]:
         """Get the image from the front camera as a numpy array in cv2 format.
 
         You can, for example, write this image to file with:
         https://docs.opencv.org/3.4/d4/da8/group__imgcodecs.html#gabbc7ef1aa2edfaa87772f1202d67e0ce
-        """
-        img, [resX, resY] = self._sim.getVisionSensorImg(self._smartphone_camera)
-        img = numpy.frombuffer(img, dtype=numpy.uint8).reshape(resY, resX, 3)
 
-        # In CoppeliaSim images are left to right (x-axis), and bottom to top (y-axis)
-        # (consistent with the axes of vision sensors, pointing Z outwards, Y up)
-        # and color format is RGB triplets, whereas OpenCV uses BGR:
-        cv2.flip(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), 0)
-        return img
+        Arguments
+        out: An array of shape (height, width, 3) and dtype uint8 to write the image into.
+            If None, the image is written into a new array,
+            or into the next buffer if `image_buffers` was passed to the constructor.
+        """
+        return self._read_image_front(
+            self._sim, self._smartphone_camera, out, self._image_ring
+        )
 
     def set_phone_pan(
         self, pan_position: int, pan_speed: int, blockid: Optional[int] = None
@@ -239,21 +425,22 @@ class SimulationRobobo(IRobobo):
         returns:
             the blockid
         """
-        if not self.is_running():
+        if not self._is_running_cached():
             raise RuntimeError("Cannot set phone pan when simulation is not running")
-        if blockid in self._used_pids:
-            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
-        blockid = blockid if blockid is not None else self._first_unblocked()
-        self._used_pids.add(blockid)
+        blockid = self._used_pids.acquire(blockid)
 
-        self._sim.callScriptFunction(
-            "movePanTo",
-            self._pan_motor_script,
-            [pan_position, pan_speed],
-            [],
-            [self._block_string(blockid)],
-            bytearray(),
-        )
+        try:
+            self._sim.callScriptFunction(
+                "movePanTo",
+                self._pan_motor_script,
+                [pan_position, pan_speed],
+                [],
+                [self._block_string(blockid)],
+                bytearray(),
+            )
+        except BaseException:
+            self._used_pids.discard(blockid)
+            raise
 
         return blockid
 
@@ -284,21 +471,22 @@ class SimulationRobobo(IRobobo):
         returns:
             the blockid
         """
-        if not self.is_running():
+        if not self._is_running_cached():
             raise RuntimeError("Cannot set phone tilt when simulation is not running")
-        if blockid in self._used_pids:
-            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
-        blockid = blockid if blockid is not None else self._first_unblocked()
-        self._used_pids.add(blockid)
+        blockid = self._used_pids.acquire(blockid)
 
-        self._sim.callScriptFunction(
-            "moveTiltTo",
-            self._tilt_motor_script,
-            [tilt_position, tilt_speed],
-            [],
-            [self._block_string(blockid)],
-            bytearray(),
-        )
+        try:
+            self._sim.callScriptFunction(
+                "moveTiltTo",
+                self._tilt_motor_script,
+                [tilt_position, tilt_speed],
+                [],
+                [self._block_string(blockid)],
+                bytearray(),
+            )
+        except BaseException:
+            self._used_pids.discard(blockid)
+            raise
 
         return blockid
 
@@ -351,38 +539,197 @@ class SimulationRobobo(IRobobo):
         )
         return WheelPosition(*ints)
 
+    def read_all(self) -> SensorSnapshot:
+        """Get all sensor readings of the robot, and its position and orientation
+        relative to the world, in a single call to the simulation.
+
+        This returns the same values as calling all the `read_` methods,
+        `get_position`, `get_orientation` and `get_sim_time` one after the other,
+        but only costs one round trip to CoppeliaSim instead of nine.
+
+        This only works in the simulation.
+        """
+        _ints, floats, _strings, _buffer = self._sim.callScriptFunction(
+            "readAllSensors",
+            self._smartphone_script,
+            [],
+            [],
+            [],
+            bytearray(),
+        )
+        return SensorSnapshot(
+            irs=list(floats[SNAPSHOT_IRS]),
+            accel=Acceleration(*floats[SNAPSHOT_ACCEL]),
+            orientation=Orientation(*floats[SNAPSHOT_ORIENTATION]),
+            wheels=WheelPosition(*floats[SNAPSHOT_WHEELS]),
+            phone_pan=int(floats[SNAPSHOT_PAN]),
+            phone_tilt=int(floats[SNAPSHOT_TILT]),
+            position=Position(*floats[SNAPSHOT_POSITION]),
+            world_orientation=Orientation(*floats[SNAPSHOT_WORLD_ORIENTATION]),
+            sim_time=floats[SNAPSHOT_SIM_TIME],
+        )
+
+    def read_frame(self) -> SensorFrame:
+        """Get the readings of all sensors at once, to store with `SensorFrame.to_record`.
+        In the simulation, this is a single call, using `read_all`.
+        """
+        return self.read_all().to_frame()
+
     def sleep(self, seconds: float) -> None:
         """Block for a an amount of seconds.
         How to do this depends on the kind of robot, and so is to be found here.
+
+        In stepping mode, this advances the simulation by the amount of steps
+        needed for `seconds` to pass in the simulation, without waiting in real time.
         """
+        if self._stepping:
+            self._step_while_running(self._steps_for(seconds), "sleep")
+            return
+
         start_time = self.get_sim_time()
         while self.get_sim_time() - start_time < seconds:
-            if not self.is_running():
+            if not self._is_running_cached():
                 raise RuntimeError("Cannot sleep when simulation is not running")
             time.sleep(0.02)
 
+    def read_stamp(self, sensor: Sensor) -> SampleStamp:
+        """Get when the newest reading of a sensor was taken.
+        In the simulation, every reading is taken when it is asked for,
+        so this is the current simulation time, and the number of the current step.
+        """
+        sim_time = self.get_sim_time()
+        return SampleStamp(sim_time, round(sim_time / self.get_sim_time_step()))
+
+    def wait_for_fresh(
+        self,
+        sensor: Sensor,
+        after: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """Wait untill the simulation time reaches `after`.
+        In the simulation, every reading is taken when it is asked for,
+        so it is always at least as fresh as the end of the last action,
+        and this only has to wait if `after` is in the future.
+
+        Arguments:
+        sensor: Sensor - The sensor to wait for.
+        after: Optional[float] - A simulation time.
+            If None, the time the last action was completed is used,
+            so this returns immediately.
+        timeout: Optional[float] - the maximum amount of seconds to wait. In stepping mode,
+            this is in simulation time. If None, wait indefinetly.
+
+        returns:
+            Whether there is a fresh reading. False if the timeout passed first.
+        """
+        if after is None:
+            return True
+        return self._wait_until(lambda: self.get_sim_time() >= after, timeout)
+
+    def move_blocking(self, left_speed: int, right_speed: int, millis: int) -> None:
+        """Move the robot wheels for `millis` time
+
+        In stepping mode, this advances the simulation by the amount of steps
+        the movement takes, and only then starts checking if it is done.
+
+        Arguments
+        left_speed: speed of the left wheel. Range: -100-0-100. 0 is no movement, negative backward.
+        right_speed: speed of the right wheel. Range: -100-0-100. 0 is no movement, negative backward.
+        millis: how many millisecond to move the robot
+        """
+        if not self._stepping:
+            return super().move_blocking(left_speed, right_speed, millis)
+
+        blockid = self.move(left_speed, right_speed, millis)
+        self._step_while_running(self._steps_for(millis / 1000.0), "wait for actions")
+        self._wait_until(lambda: not self.is_blocked(blockid))
+
+    def perform_blocking(self, f: Callable[[], int]) -> None:
+        """Perform a function in a blocking manner.
+        Which is to say, only return once the action is completed.
+        Usefull for all functions that take a blockid argument.
+
+        For the simulation, the time between checks grows from 1 to 20 milliseconds.
+        In stepping mode, this advances the simulation one step at a time
+        untill the action is completed, instead of sleeping.
+
+        Arguments:
+        f: Callable[[int], None]. Some function to call.
+        """
+        self.wait(f())
+
     def is_blocked(self, blockid: int) -> bool:
         """See if the robot is currently "blocked", which is to say, performing an action
 
+        For the simulation, this checks all blockids that are in use in one call,
+        and forgets the ones that are completed, so checking those again,
+        or calling `block` later, does not have to ask the simulation about them.
+        Checking a blockid that is still in use always asks the simulation.
+
         Arguments:
         blockid: the id to check
         """
-        res = self._sim.getInt32Signal(self._block_string(blockid))
-        if res == 0:
-            self._used_pids.discard(blockid)
+        if blockid not in self._used_pids:
             return False
-        else:
-            self._used_pids.add(blockid)
-            return True
+        return blockid in self._poll_blocks()
 
     def block(self):
         """Block untill (only return once) all blocking actions are completed"""
-        while any(self.is_blocked(blockid) for blockid in self._used_pids):
-            time.sleep(0.02)
+        self.wait_all()
+
+    def wait(self, blockid: int, timeout: Optional[float] = None) -> bool:
+        """Wait untill the action with the given blockid is completed.
+
+        Arguments:
+        blockid: the id to wait for
+        timeout: the maximum amount of seconds to wait. In stepping mode,
+            this is in simulation time. If None, wait indefinetly.
+
+        returns:
+            Whether the action is completed. False if the timeout passed first.
+        """
+        return self._wait_until(lambda: not self.is_blocked(blockid), timeout)
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """Wait untill all blocking actions are completed.
+
+        Arguments:
+        timeout: the maximum amount of seconds to wait. In stepping mode,
+            this is in simulation time. If None, wait indefinetly.
+
+        returns:
+            Whether all actions are completed. False if the timeout passed first.
+        """
+        return self._wait_until(lambda: not self._poll_blocks(), timeout)
+
+    def wait_any(
+        self, blockids: Iterable[int], timeout: Optional[float] = None
+    ) -> Set[int]:
+        """Wait untill at least one of the actions with the given blockids is completed.
+
+        Arguments:
+        blockids: the ids to wait for
+        timeout: the maximum amount of seconds to wait. In stepping mode,
+            this is in simulation time. If None, wait indefinetly.
+
+        returns:
+            The blockids that are completed. Empty if the timeout passed first.
+        """
+        waiting = set(blockids)
+        done: Set[int] = set()
+
+        def any_done() -> bool:
+            done.update(waiting - self._poll_blocks())
+            return bool(done)
+
+        self._wait_until(any_done, timeout)
+        return done
 
     def play_simulation(self):
         """Start the simulation"""
+        self._time_step = None
         self._sim.startSimulation()
+        self._set_known_state(self._sim.simulation_advancing_running)
 
     def pause_simulation(self):
         """Pause the simulation"""
@@ -398,19 +745,27 @@ class SimulationRobobo(IRobobo):
 
     def is_stopped(self) -> bool:
         """Return wether the simulation is stopped"""
-        return self._sim.getSimulationState() == self._sim.simulation_stopped
+        return self.refresh_simulation_state() == self._sim.simulation_stopped
 
     def is_paused(self) -> bool:
         """Return wether the simulation is stopped"""
-        return self._sim.getSimulationState() == self._sim.simulation_paused
+        return self.refresh_simulation_state() == self._sim.simulation_paused
 
     def is_running(self) -> bool:
         """Return wether the simulation is running"""
-        # There are 6 different types of running we don't care about
+        return self._state_is_running(self.refresh_simulation_state())
+
+    def refresh_simulation_state(self) -> int:
+        """Ask CoppeliaSim for the state of the simulation, and remember it.
+        Call this if the simulation might have been started or stopped by something else
+        than this class, and you don't want to wait for `state_cache_duration` to pass.
+
+        returns:
+            The simulation state, as one of the `sim.simulation_` constants.
+        """
         state = self._sim.getSimulationState()
-        return (state != self._sim.simulation_stopped) and (
-            state != self._sim.simulation_paused
-        )
+        self._set_known_state(state)
+        return state
 
     def get_sim_time(self) -> float:
         """Get simulation time (in seconds),
@@ -418,6 +773,18 @@ class SimulationRobobo(IRobobo):
         """
         return self._sim.getSimulationTime()
 
+    def is_stepping(self) -> bool:
+        """Return whether the simulation is in stepping mode,
+        which is to say, only advances when this class tells it to.
+        """
+        return self._stepping
+
+    def get_sim_time_step(self) -> float:
+        """Get the time (in seconds) the simulation advances with each step"""
+        if self._time_step is None:
+            self._time_step = self._sim.getSimulationTimeStep()
+        return self._time_step
+
     def nr_food_collected(self) -> int:
         """Return the amount of food currently collected.
 
@@ -507,6 +874,149 @@ class SimulationRobobo(IRobobo):
             raise AttributeError("Cannot find any food in the scene")
         return ret
 
+    def _poll_blocks(self) -> Set[int]:
+        """Ask the simulation which of the used blockids are completed,
+        in one call to the registry of actions in smartphone.lua.
+
+        Scenes saved with an older smartphone.lua don't have this registry.
+        For those, the signal of every blockid is checked with its own call instead.
+
+        returns:
+            The blockids that are still in use.
+        """
+        blockids = list(self._used_pids.snapshot())
+        if not blockids:
+            return set()
+
+        if self._reads_completed_blocks is False:
+            completed = [
+                blockid
+                for blockid in blockids
+                if self._sim.getInt32Signal(self._block_string(blockid)) == 0
+            ]
+        else:
+            try:
+                completed, _floats, _strings, _buffer = self._sim.callScriptFunction(
+                    "readCompletedBlocks",
+                    self._smartphone_script,
+                    blockids,
+                    [],
+                    [self._block_string(blockid) for blockid in blockids],
+                    bytearray(),
+                )
+            except Exception:
+                # Once the registry answered, any error is a real one.
+                if self._reads_completed_blocks:
+                    raise
+                self._reads_completed_blocks = False
+                self._logger(
+                    "The smartphone.lua in this scene is outdated, as it has no"
+                    " readCompletedBlocks. Re-save your scene with the updated"
+                    " smartphone.lua. Untill then, waiting for actions takes"
+                    " one call to the simulation per blockid."
+                )
+                return self._poll_blocks()
+            self._reads_completed_blocks = True
+
+        self._used_pids.discard_many(completed)
+        return set(blockids) - set(completed)
+
+    def _wait_until(
+        self, condition: Callable[[], bool], timeout: Optional[float] = None
+    ) -> bool:
+        """Check `condition` untill it is True, with a growing delay between checks.
+        In stepping mode, the simulation is advanced one step between checks instead.
+
+        Arguments:
+        condition: the check to perform. This should cost at most one call to the simulation.
+        timeout: the maximum amount of seconds to wait. In stepping mode,
+            this is in simulation time. If None, wait indefinetly.
+
+        returns:
+            Whether the condition became True before the timeout.
+        """
+        if self._stepping:
+            max_steps = None if timeout is None else self._steps_for(timeout)
+            steps = 0
+            while not condition():
+                if max_steps is not None and steps >= max_steps:
+                    return False
+                if steps % STEPS_PER_STATE_CHECK == 0 and not self._is_running_cached():
+                    raise RuntimeError(
+                        "Cannot wait for actions when simulation is not running"
+                    )
+                self._step()
+                steps += 1
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = MIN_POLL_DELAY
+        while not condition():
+            if not self._is_running_cached():
+                raise RuntimeError(
+                    "Cannot wait for actions when simulation is not running"
+                )
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_POLL_DELAY)
+        return True
+
+    def _is_running_cached(self) -> bool:
+        """Like `is_running`, but uses the last known state of the simulation
+        if it is not older than `state_cache_duration`
+        """
+        if (
+            self._known_state is None
+            or time.monotonic() - self._known_state_at > self._state_cache_duration
+        ):
+            return self.is_running()
+        return self._state_is_running(self._known_state)
+
+    def _set_known_state(self, state: int) -> None:
+        self._known_state = state
+        self._known_state_at = time.monotonic()
+
+    def _state_is_running(self, state: int) -> bool:
+        # There are 6 different types of running we don't care about
+        return (state != self._sim.simulation_stopped) and (
+            state != self._sim.simulation_paused
+        )
+
+    def _steps_for(self, seconds: float) -> int:
+        """The amount of simulation steps needed for `seconds` to pass.
+        The rounding is there to avoid taking an extra step because of float errors.
+        """
+        return max(math.ceil(round(seconds / self.get_sim_time_step(), 6)), 0)
+
+    def _step(self, steps: int = 1) -> None:
+        """Advance the simulation by `steps` steps. Only valid in stepping mode."""
+        for _ in range(steps):
+            self._client.step()
+
+    def _step_while_running(self, steps: int, doing: str) -> None:
+        """Advance the simulation by `steps` steps, checking if it is still running
+        every STEPS_PER_STATE_CHECK steps. Only valid in stepping mode.
+
+        Arguments:
+        steps: the amount of steps to take
+        doing: what the steps are for, for the error message
+
+        raises:
+            RuntimeError if the simulation is not running.
+        """
+        while True:
+            if not self._is_running_cached():
+                raise RuntimeError(f"Cannot {doing} when simulation is not running")
+            chunk = min(steps, STEPS_PER_STATE_CHECK)
+            self._step(chunk)
+            steps -= chunk
+            if steps <= 0:
+                return
+
     def _block_string(self, blockid: int) -> str:
         """Return some unique string based on the identifier and the blockid
         to make sure they don't overlap
@@ -515,46 +1025,139 @@ class SimulationRobobo(IRobobo):
 
     def _initialise_handles(self) -> None:
         # fmt: off
-        self._robobo = self._get_object(f"/Robobo{self._identifier}")
-        self._wheels_script = self._get_childscript(self._get_object(f"/Robobo{self._identifier}/Left_Motor"))
-        self._leds_script = self._get_childscript(self._get_object(f"/Robobo{self._identifier}/Back_L"))
-        self._ir_script = self._get_childscript(self._get_object(f"/Robobo{self._identifier}/IR_Back_C"))
-        self._pan_motor_script = self._get_childscript(self._get_object(f"/Robobo{self._identifier}/Pan_Motor"))
-        self._tilt_motor_script = self._get_childscript(self._get_object(f"/Robobo{self._identifier}/Pan_Motor/Pan_Respondable/Tilt_Motor"))
-        self._smartphone_script = self._get_childscript(self._get_object(f"/Robobo{self._identifier}/Pan_Motor/Pan_Respondable/Tilt_Motor/Smartphone_Respondable"))
-        self._smartphone_camera = self._get_object(f"/Robobo{self._identifier}/Pan_Motor/Pan_Respondable/Tilt_Motor/Smartphone_Respondable/Smartphone_camera")
+        paths = {
+            "robobo": f"/Robobo{self._identifier}",
+            "wheels": f"/Robobo{self._identifier}/Left_Motor",
+            "leds": f"/Robobo{self._identifier}/Back_L",
+            "ir": f"/Robobo{self._identifier}/IR_Back_C",
+            "pan_motor": f"/Robobo{self._identifier}/Pan_Motor",
+            "tilt_motor": f"/Robobo{self._identifier}/Pan_Motor/Pan_Respondable/Tilt_Motor",
+            "smartphone": f"/Robobo{self._identifier}/Pan_Motor/Pan_Respondable/Tilt_Motor/Smartphone_Respondable",
+            "camera": f"/Robobo{self._identifier}/Pan_Motor/Pan_Respondable/Tilt_Motor/Smartphone_Respondable/Smartphone_camera",
+            "base": "/Base",
+            "food": "/Food",
+        }
         # fmt: on
+        handles = self._resolve_handles(paths)
+
+        def get_object(name: str) -> int:
+            if handles[name][0] < 0:
+                raise AttributeError(f"Could not find {paths[name]} in scene")
+            return handles[name][0]
+
+        def get_childscript(name: str) -> int:
+            if handles[name][1] < 0:
+                raise AttributeError(f"Could not find Script of {paths[name]} in scene")
+            return handles[name][1]
+
+        self._robobo = get_object("robobo")
+        self._wheels_script = get_childscript("wheels")
+        self._leds_script = get_childscript("leds")
+        self._ir_script = get_childscript("ir")
+        self._pan_motor_script = get_childscript("pan_motor")
+        self._tilt_motor_script = get_childscript("tilt_motor")
+        self._smartphone_script = get_childscript("smartphone")
+        self._smartphone_camera = get_object("camera")
 
         try:
-            self._base = self._get_object("/Base")
-            self._base_script = self._get_childscript(self._base)
+            self._base = get_object("base")
+            self._base_script = get_childscript("base")
         except AttributeError:
             self._base = None
             self._base_script = None
 
         try:
-            self._food_script = self._get_childscript(self._get_object("/Food"))
+            self._food_script = get_childscript("food")
         except AttributeError:
             self._food_script = None
 
-    def _get_object(self, name: str) -> int:
-        # CoppeliaSim is a mess sometimes.
-        try:
-            ret = self._sim.getObject(name)
-        except:
-            raise AttributeError(f"Could not find {str} in scene")
-        if ret < 0:
-            raise AttributeError(f"Could not find {str} in scene")
-        return ret
+    def _resolve_handles(self, paths: Dict[str, str]) -> Dict[str, Tuple[int, int]]:
+        """Get the handles of the objects at `paths`, and of their child scripts.
+        These are taken from the cache if this robot was already resolved in this scene,
+        and otherwise resolved in one call to the simulation.
 
-    def _get_childscript(self, obj_handle: int) -> int:
-        try:
-            ret = self._sim.getScript(self._sim.scripttype_childscript, obj_handle)
-        except:
-            raise AttributeError(f"Could not find Script of {str} in scene")
-        if ret < 0:
-            raise AttributeError(f"Could not find Script of {str} in scene")
-        return ret
+        returns:
+            (object, script) for every name in `paths`, -1 for what doesn't exist
+        """
+        scene = self._sim.getInt32Param(self._sim.intparam_scene_unique_id)
+        key = (self._ip_adress, self._api_port, scene, self._identifier)
+        if key not in _HANDLE_CACHE:
+            code = RESOLVE_HANDLES_LUA % ", ".join(
+                f'"{path}"' for path in paths.values()
+            )
+            ret = self._sim.executeScriptString(
+                code, self._sim.scripttype_sandboxscript
+            )
+            # Some versions of CoppeliaSim return (result, value), others just the value
+            if len(ret) == 2 and isinstance(ret[1], list):
+                ret = ret[1]
+            _HANDLE_CACHE[key] = {
+                name: (int(ret[2 * i]), int(ret[2 * i + 1]))
+                for i, name in enumerate(paths)
+            }
+        return _HANDLE_CACHE[key]
+
+    def _read_image_front(
+        self,
+        sim,
+        camera: int,
+        out: Optional[NDArray[numpy.uint8]] = None,
+        ring: Optional[ImageRing] = None,
+    ) -> NDArray[numpy.uint8]:
+        """Read the front camera trough `sim`, which is either the connection
+        of this robot, or the one of an image stream.
+        The handle of the camera is passed in, as resolving it uses the connection of this robot.
+        If `out` is None, the image is written into the next buffer of `ring`, if passed.
+        """
+        img, [resX, resY] = sim.getVisionSensorImg(camera)
+        img = numpy.frombuffer(img, dtype=numpy.uint8).reshape(resY, resX, 3)
+        if out is None and ring is not None:
+            out = ring.next(img.shape)
+
+        # In CoppeliaSim images are left to right (x-axis), and bottom to top (y-axis)
+        # (consistent with the axes of vision sensors, pointing Z outwards, Y up)
+        # and color format is RGB triplets, whereas OpenCV uses BGR.
+        # Flipping both the rows and the channels is just a view,
+        # so the conversion happens while copying it into the output.
+        return write_image(img[::-1, :, ::-1], out)
+
+    def _start_image_stream(
+        self, latest: LatestImage, max_fps: Optional[float]
+    ) -> Callable[[], None]:
+        # The camera renders a new image every simulation step, so there is no use
+        # in reading it more often than that.
+        interval = 1 / max_fps if max_fps is not None else self.get_sim_time_step()
+        stopped = threading.Event()
+        # Resolving the handle can use the connection of this robot,
+        # so it has to happen here, and not on the thread of the stream.
+        camera = self._smartphone_camera
+
+        def stream() -> None:
+            try:
+                # A connection can only be used by one thread at a time,
+                # so the stream opens its own, to the same simulation.
+                client = timeout(
+                    lambda: type(self._client)(
+                        host=self._ip_adress, port=self._api_port
+                    ),
+                    self._timeout_dur,
+                )
+                sim = timeout(lambda: client.require("sim"), self._timeout_dur)
+                while not stopped.is_set():
+                    started = time.monotonic()
+                    latest.put(self._read_image_front(sim, camera))
+                    stopped.wait(started + interval - time.monotonic())
+            except Exception as e:
+                latest.fail(e)
+
+        thread = threading.Thread(target=stream, daemon=True)
+        thread.start()
+
+        def stop() -> None:
+            stopped.set()
+            thread.join()
+
+        return stop
 
     def _fail_connect(self, api_port: int, ip_adress: str) -> NoReturn:
         self._logger(
@@ -571,18 +1174,29 @@ class SimulationRobobo(IRobobo):
         quit_hard()
 
 
-# This only works on Unix. Luckily, we are in Docker.
-def timeout(func: Callable[[], T], timeout_duration: int = 10) -> T:
-    def handler(_signum, _frame):
-        raise TimeoutError()
+def timeout(func: Callable[[], T], timeout_duration: float = 10) -> T:
+    """Call `func`, but raise a TimeoutError if it takes longer than `timeout_duration`.
+
+    `func` runs on a separate thread, so this works from any thread.
+    When it takes too long, that thread is abandoned, and left to finish on its own.
+    """
+    result: List[T] = []
+    error: List[BaseException] = []
 
-    # set the timeout handler
-    signal.signal(signal.SIGALRM, handler)
-    signal.alarm(timeout_duration)
-    try:
-        return func()
-    finally:
-        signal.alarm(0)
+    def run() -> None:
+        try:
+            result.append(func())
+        except BaseException as e:
+            error.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout_duration)
+    if thread.is_alive():
+        raise TimeoutError()
+    if error:
+        raise error[0]
+    return result[0]
 
 
 # The API code catches too much, making it hard to quit when failing.
@@ -0,0 +1,99 @@
+from collections import deque
+
+from .sets import LockedSet
+
+from typing import Deque, Iterable, Optional, Set
+
+# The blockids a robot hands out by default. They have to fit in a 16-bit integer.
+DEFAULT_BLOCKIDS = range(1, 768)
+
+# The blockid is an Int16 in the ROS messages
+_BLOCKID_MIN = -(2**15)
+_BLOCKID_MAX = 2**15 - 1
+
+
+class BlockidAllocator(LockedSet[int]):
+    """The set of blockids that are in use, which also hands out the free ones.
+
+    The free blockids are kept in a queue, so handing one out (`acquire`)
+    and giving it back (`discard`) both take constant time, and a blockid is only
+    handed out again once all other free ones were handed out after it.
+    This makes it unlikely a late message about an old action
+    is mistaken for a message about a new one.
+
+    Arguments:
+    blockids: range = range(1, 768) -> The blockids to hand out.
+        Giving robots ranges that don't overlap gives every robot its own blockids.
+        Has to be non-empty, and fit in a 16-bit integer (-32768 to 32767).
+
+    raises:
+        ValueError if `blockids` is empty or does not fit in a 16-bit integer.
+    """
+
+    def __init__(self, blockids: range = DEFAULT_BLOCKIDS):
+        if not blockids:
+            raise ValueError(f"There are no blockids in {blockids}")
+        if min(blockids) < _BLOCKID_MIN or max(blockids) > _BLOCKID_MAX:
+            raise ValueError(
+                f"The blockids from {min(blockids)} to {max(blockids)} do not fit in"
+                " the 16-bit integer of the ROS messages"
+                f" (from {_BLOCKID_MIN} to {_BLOCKID_MAX})"
+            )
+        super().__init__()
+        self._blockids = blockids
+        self._free: Deque[int] = deque(blockids)
+        # The blockids that are in `_free`, to never put one in it twice
+        self._queued: Set[int] = set(blockids)
+
+    @property
+    def blockids(self) -> range:
+        """All blockids this can hand out"""
+        return self._blockids
+
+    def acquire(self, blockid: Optional[int] = None) -> int:
+        """Mark a blockid as in use, and return it.
+
+        Arguments:
+        blockid: the blockid to use. If None, a free one is chosen.
+
+        raises:
+            ValueError if the given blockid is already in use,
+                or does not fit in a 16-bit integer.
+            RuntimeError if all blockids are in use.
+        """
+        if blockid is not None and not _BLOCKID_MIN <= blockid <= _BLOCKID_MAX:
+            raise ValueError(
+                f"BlockID {blockid} does not fit in the 16-bit integer"
+                f" of the ROS messages (from {_BLOCKID_MIN} to {_BLOCKID_MAX})"
+            )
+        with self._lock:
+            if blockid is None:
+                blockid = self._pop_free()
+            elif set.__contains__(self, blockid):
+                raise ValueError(
+                    f"BlockID {blockid} is already in use: {set.copy(self)}"
+                )
+            set.add(self, blockid)
+            return blockid
+
+    def _pop_free(self) -> int:
+        # Blockids that were taken by passing them to `acquire` explicitly
+        # are still in the queue, and are skipped here.
+        while self._free:
+            blockid = self._free.popleft()
+            self._queued.discard(blockid)
+            if not set.__contains__(self, blockid):
+                return blockid
+        raise RuntimeError(
+            f"All {len(self._blockids)} blockids"
+            f" ({self._blockids.start}-{self._blockids.stop - 1}) are in use."
+            " Wait for some actions to complete (for example with `block`)"
+            " before starting new ones."
+        )
+
+    def _removed(self, blockids: Iterable[int]) -> None:
+        # Removed blockids are free again
+        for blockid in blockids:
+            if blockid in self._blockids and blockid not in self._queued:
+                self._free.append(blockid)
+                self._queued.add(blockid)
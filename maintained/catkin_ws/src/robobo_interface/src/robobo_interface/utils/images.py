@@ -0,0 +1,132 @@
+import time
+import threading
+
+import numpy
+
+from typing import List, Optional, Tuple
+from numpy.typing import NDArray
+
+
+def write_image(
+    image: NDArray[numpy.uint8], out: Optional[NDArray[numpy.uint8]] = None
+) -> NDArray[numpy.uint8]:
+    """Copy `image` into `out`, and return `out`.
+    If `out` is None, a new array is allocated instead.
+
+    The copy is where any conversion happens, so passing a view
+    (like `image[::-1, :, ::-1]` to flip it and swap the channels)
+    converts the image in a single pass.
+    """
+    if out is None:
+        return numpy.ascontiguousarray(image)
+    if out.shape != image.shape or out.dtype != image.dtype:
+        raise ValueError(
+            f"Expected an output buffer of shape {image.shape} and dtype {image.dtype},"
+            f" got shape {out.shape} and dtype {out.dtype}"
+        )
+    numpy.copyto(out, image)
+    return out
+
+
+class ImageRing:
+    """A fixed amount of image buffers, which are handed out in turn.
+    This avoids allocating a new array for every frame, but it means a buffer
+    is overwritten once all other buffers have been handed out after it.
+
+    Arguments:
+    size: int -> The amount of buffers to cycle trough. If 0, no buffers are kept,
+        and `next` always returns None.
+    """
+
+    def __init__(self, size: int):
+        if size < 0:
+            raise ValueError(f"The size of an ImageRing cannot be negative, got {size}")
+        self._size = size
+        self._buffers: List[NDArray[numpy.uint8]] = []
+        self._index = 0
+
+    def next(self, shape: Tuple[int, ...]) -> Optional[NDArray[numpy.uint8]]:
+        """Get the next buffer of the ring, with the given shape.
+        When the shape changes (for example, because the camera resolution changed),
+        the buffers are allocated again.
+        """
+        if self._size == 0:
+            return None
+        if self._buffers and self._buffers[0].shape != shape:
+            self._buffers = []
+        if len(self._buffers) < self._size:
+            self._buffers.append(numpy.empty(shape, dtype=numpy.uint8))
+            self._index = len(self._buffers) - 1
+            return self._buffers[-1]
+        self._index = (self._index + 1) % self._size
+        return self._buffers[self._index]
+
+
+class LatestImage:
+    """The newest image of a camera, handed over from the thread receiving the images
+    to the thread using them. Older images are dropped as soon as a newer one arrives.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._image: Optional[NDArray[numpy.uint8]] = None
+        self._received_at = 0.0
+        self._error: Optional[BaseException] = None
+
+    @property
+    def received_at(self) -> float:
+        """When the newest image was put, in seconds of `time.monotonic()`.
+        0 if there is no image yet.
+        """
+        return self._received_at
+
+    def put(self, image: NDArray[numpy.uint8]) -> None:
+        """Replace the image with a newer one"""
+        with self._condition:
+            self._image = image
+            self._received_at = time.monotonic()
+            self._condition.notify_all()
+
+    def fail(self, error: BaseException) -> None:
+        """Make `get` raise `error`, because no new images will come"""
+        with self._condition:
+            self._error = error
+            self._condition.notify_all()
+
+    def get(
+        self,
+        max_age: Optional[float] = None,
+        newer_than: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> NDArray[numpy.uint8]:
+        """Get the newest image.
+        Only waits if there is no image yet, or if it is older than `max_age` seconds.
+
+        Arguments:
+        max_age: Optional[float] - How old (in seconds) the image can be at most.
+        newer_than: Optional[float] - Only return an image that was put after this time,
+            in the same clock as `received_at`. Pass the `received_at` of an image
+            to wait for the one after it.
+        timeout: Optional[float] - The maximum amount of seconds to wait.
+            If None, wait indefinetly.
+
+        raises:
+            TimeoutError if no image was put in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._error is None and (
+                self._image is None
+                or (
+                    max_age is not None
+                    and time.monotonic() - self._received_at > max_age
+                )
+                or (newer_than is not None and self._received_at <= newer_than)
+            ):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No new image was put in {timeout} seconds")
+                self._condition.wait(remaining)
+            if self._error is not None:
+                raise self._error
+            return self._image
@@ -1,9 +1,10 @@
+import threading
 from functools import wraps
-from multiprocessing import Lock
 
 from typing import (
     Callable,
     Generic,
+    Iterable,
     Optional,
     TypeVar,
     Union,
@@ -30,46 +31,162 @@ def locked_method(f: Callable[..., T]) -> Callable[..., T]:
 
 class LockedSet(set, Generic[T]):
     """An implementation of set that is thread-safe.
-    Technically unneeded, as the set() in Cpython is already atomic with the GIL,
-    but used anyway, as relying on implementation details is not good practice
+    Technically mostly unneeded, as the set() in Cpython is already atomic with the GIL,
+    but used anyway, as relying on implementation details is not good practice.
+
+    The lock is a plain `threading.Lock`, as this is only ever shared between threads.
+    Iterating goes over a snapshot of the set, taken while holding the lock,
+    so other threads can keep adding and removing elements during the iteration.
+
+    Methods with `_many` in the name, and `drain_completed`,
+    do their work under a single acquisition of the lock.
+    All methods that change the set, including the ones inherited from set
+    (`clear`, `pop`, `update`, the `_update` methods and the in-place operators),
+    hold the lock, and report the elements they removed to `_removed`.
+    The methods that are called every poll of a blocking wait
+    (`in`, `len`, `add`, `discard` and iterating) take the lock themselves,
+    instead of going trough `locked_method`, to save a function call.
     """
 
     def __init__(self, *args, **kwargs):
-        self._lock = Lock()
+        self._lock = threading.Lock()
         super().__init__(*args, **kwargs)
 
+    def add(self, __element: T) -> None:
+        with self._lock:
+            set.add(self, __element)
+
     @locked_method
-    def add(self, __element: T):
-        return super().add(__element)
+    def add_many(self, elements: Iterable[T]) -> None:
+        """Add all of `elements`"""
+        set.update(self, elements)
 
     @locked_method
-    def remove(self, __element: T):
-        return super().remove(__element)
+    def update(self, *s: Iterable[T]) -> None:
+        set.update(self, *s)
 
     @locked_method
+    def remove(self, __element: T):
+        set.remove(self, __element)
+        self._removed((__element,))
+
     def discard(self, __element: T) -> None:
-        return super().discard(__element)
+        with self._lock:
+            if set.__contains__(self, __element):
+                set.discard(self, __element)
+                self._removed((__element,))
+
+    @locked_method
+    def discard_many(self, elements: Iterable[T]) -> Set[T]:
+        """Remove all of `elements` that are in the set.
+
+        returns:
+            The elements that were actually removed.
+        """
+        removed = set.intersection(self, elements)
+        set.difference_update(self, removed)
+        self._removed(removed)
+        return removed
+
+    @locked_method
+    def drain_completed(self, is_completed: Callable[[T], bool]) -> Set[T]:
+        """Remove all elements for which `is_completed` returns True.
+        `is_completed` is called while holding the lock, so it should be quick,
+        and should not use this set.
+
+        returns:
+            The elements that were removed.
+        """
+        removed = {element for element in set.__iter__(self) if is_completed(element)}
+        set.difference_update(self, removed)
+        self._removed(removed)
+        return removed
+
+    @locked_method
+    def pop(self) -> T:
+        element = set.pop(self)
+        self._removed((element,))
+        return element
+
+    @locked_method
+    def clear(self) -> None:
+        removed = set.copy(self)
+        set.clear(self)
+        self._removed(removed)
+
+    @locked_method
+    def difference_update(self, *s: Iterable[object]) -> None:
+        self._update_reporting_removed(set.difference_update, *s)
 
     @locked_method
+    def intersection_update(self, *s: Iterable[object]) -> None:
+        self._update_reporting_removed(set.intersection_update, *s)
+
+    @locked_method
+    def symmetric_difference_update(self, __s: Iterable[T]) -> None:
+        self._update_reporting_removed(set.symmetric_difference_update, __s)
+
+    @locked_method
+    def snapshot(self) -> Set[T]:
+        """A plain set with the elements that are in this set right now"""
+        return set.copy(self)
+
     def __contains__(self, __o: object) -> bool:
-        return super().__contains__(__o)
+        with self._lock:
+            return set.__contains__(self, __o)
 
     @locked_method
     def __sub__(self, __value: AbstractSet[Optional[T]]) -> Set[T]:
-        return super().__sub__(__value)
+        return set.__sub__(self, __value)
 
     @locked_method
     def __and__(self, __value: AbstractSet[object]) -> Set[T]:
-        return super().__and__(__value)
+        return set.__and__(self, __value)
 
     @locked_method
     def __or__(self, __value: AbstractSet[S]) -> Set[Union[T, S]]:
-        return super().__or__(__value)
+        return set.__or__(self, __value)
 
     @locked_method
-    def __iter__(self) -> Iterator[T]:
-        return super().__iter__()
+    def __ior__(self, __value: AbstractSet[T]) -> "LockedSet[T]":
+        set.__ior__(self, __value)
+        return self
+
+    @locked_method
+    def __iand__(self, __value: AbstractSet[object]) -> "LockedSet[T]":
+        self._update_reporting_removed(set.__iand__, __value)
+        return self
+
+    @locked_method
+    def __isub__(self, __value: AbstractSet[object]) -> "LockedSet[T]":
+        self._update_reporting_removed(set.__isub__, __value)
+        return self
 
     @locked_method
+    def __ixor__(self, __value: AbstractSet[T]) -> "LockedSet[T]":
+        self._update_reporting_removed(set.__ixor__, __value)
+        return self
+
+    def __iter__(self) -> Iterator[T]:
+        with self._lock:
+            return iter(set.copy(self))
+
     def __len__(self) -> int:
-        return super().__len__()
+        with self._lock:
+            return set.__len__(self)
+
+    def _update_reporting_removed(
+        self, update: Callable[..., object], *others: Iterable[object]
+    ) -> None:
+        """Apply the unlocked set method `update`, and pass the elements it removed
+        to `_removed`. Requires the lock to be held.
+        """
+        before = set.copy(self)
+        update(self, *others)
+        self._removed([e for e in before if not set.__contains__(self, e)])
+
+    def _removed(self, elements: Iterable[T]) -> None:
+        """Called with the lock held, after elements were removed from the set.
+        For subclasses to keep track of removed elements with.
+        """
+        pass
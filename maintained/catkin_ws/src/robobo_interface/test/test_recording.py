@@ -0,0 +1,133 @@
+"""Tests of recording a session, and reading and replaying it afterwards,
+with a SimulationRobobo on the FakeRemoteAPIClient.
+
+Run from anywhere, without CoppeliaSim or ROS:
+`python3 -m pytest test/` or `python3 -m unittest discover test`
+"""
+import sys
+import time
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy
+
+# Import straight from the source, so this runs without a catkin workspace.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from robobo_interface import (  # noqa: E402
+    FakeRemoteAPIClient,
+    LedColor,
+    LedId,
+    RecordingRobobo,
+    RecordKind,
+    ReplayRobobo,
+    SessionLog,
+    SessionRecorder,
+    SimulationRobobo,
+)
+
+
+class TestRecording(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "session.rblog"
+
+    def record_session(self):
+        """Record 3 moves, with readings of the wheels and the camera after each.
+
+        returns:
+            The wheel readings and images that were read, in order.
+        """
+        rob = SimulationRobobo(
+            client=FakeRemoteAPIClient(), stepping=True, logger=lambda _: None
+        )
+        recorder = SessionRecorder(self.path, clock=rob.get_sim_time)
+        recording = RecordingRobobo(rob, recorder)
+        recording.play_simulation()
+        wheels, images = [], []
+        for speed in (50, 30, -20):
+            recording.move_blocking(speed, speed, 500)
+            wheels.append(recording.read_wheels())
+            images.append(recording.get_image_front())
+        recording.set_phone_tilt_blocking(100, 50)
+        recording.set_led(LedId.FRONTCENTER, LedColor.RED)
+        recorder.close()
+        return wheels, images
+
+    def test_log_contains_the_session(self):
+        wheels, images = self.record_session()
+        log = SessionLog(self.path)
+        self.addCleanup(log.close)
+
+        for kind, count in (
+            (RecordKind.MOVE, 3),
+            (RecordKind.WHEELS, 3),
+            (RecordKind.IMAGE, 3),
+            (RecordKind.SET_PHONE_TILT, 1),
+            (RecordKind.COMPLETED, 4),
+            (RecordKind.SET_LED, 1),
+            (RecordKind.IRS, 0),
+        ):
+            self.assertEqual(log.count(kind), count, kind.name)
+
+        times, values = log.series(RecordKind.WHEELS)
+        self.assertTrue((numpy.diff(times) > 0).all())
+        numpy.testing.assert_array_equal(
+            values[:, 0], [reading.wheel_pos_r for reading in wheels]
+        )
+        numpy.testing.assert_array_equal(log.image(2), images[2])
+        numpy.testing.assert_array_equal(
+            log.values(RecordKind.MOVE, 1)[:3], [30, 30, 500]
+        )
+        self.assertAlmostEqual(log.duration(RecordKind.MOVE, 0), 0.5, places=1)
+        self.assertEqual(
+            log.text(RecordKind.SET_LED, 0),
+            f"{LedId.FRONTCENTER.value} {LedColor.RED.value}",
+        )
+
+    def test_replay_returns_the_recorded_readings(self):
+        wheels, images = self.record_session()
+        replay = ReplayRobobo(self.path)
+        self.addCleanup(replay.close)
+
+        for speed, recorded_wheels, recorded_image in zip(
+            (50, 30, -20), wheels, images
+        ):
+            replay.move_blocking(speed, speed, 500)
+            self.assertEqual(replay.read_wheels(), recorded_wheels)
+            numpy.testing.assert_array_equal(replay.get_image_front(), recorded_image)
+        replay.set_phone_tilt_blocking(100, 50)
+        self.assertTrue(replay.wait_all(timeout=0))
+        self.assertAlmostEqual(replay.get_time(), replay.log.end, places=1)
+
+    def test_unflushed_log(self):
+        self.path.touch()
+        with self.assertRaises(ValueError):
+            SessionLog(self.path)
+        self.path.unlink()
+
+        recorder = SessionRecorder(self.path, flush_interval=0.1)
+        self.addCleanup(recorder.close)
+        # A new log can be opened before anything was recorded
+        log = SessionLog(self.path)
+        self.assertEqual(log.count(RecordKind.IRS), 0)
+        log.close()
+        recorder.record(RecordKind.IRS, [1.0] * 8)
+        # Flushed after flush_interval, also without recording anything else
+        time.sleep(0.3)
+        log = SessionLog(self.path)
+        self.assertEqual(log.count(RecordKind.IRS), 1)
+        log.close()
+
+    def test_not_a_log(self):
+        self.path.write_bytes(b"definitely not a session log")
+        with self.assertRaises(ValueError):
+            SessionLog(self.path)
+        with self.assertRaises(ValueError):
+            SessionRecorder(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""Smoke tests of SimulationVectorEnv, against the FakeRemoteAPIClient.
+
+Run from anywhere, without CoppeliaSim or ROS:
+`python3 -m pytest test/` or `python3 -m unittest discover test`
+"""
+import sys
+import time
+import socket
+import unittest
+from pathlib import Path
+
+import numpy
+
+# Import straight from the source, so this runs without a catkin workspace.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from robobo_interface import FakeRemoteAPIClient, SimulationVectorEnv  # noqa: E402
+
+# Listens on the port after a second, like a CoppeliaSim that is still loading.
+SLOW_SIMULATOR = (
+    "import socket, time\n"
+    "time.sleep(1.0)\n"
+    "server = socket.create_server(('localhost', {port}))\n"
+    "time.sleep(60)\n"
+)
+
+
+def wheel_positions(rob):
+    wheels = rob.read_wheels()
+    return numpy.array([wheels.wheel_pos_l, wheels.wheel_pos_r], dtype=numpy.float64)
+
+
+def reset(rob):
+    rob.stop_simulation()
+    rob.play_simulation()
+    return wheel_positions(rob)
+
+
+def step(rob, action):
+    speed, done = action
+    rob.move_blocking(speed, speed, 100)
+    observation = wheel_positions(rob)
+    return observation, float(speed), done
+
+
+def free_ports(amount: int):
+    sockets = [socket.socket() for _ in range(amount)]
+    for sock in sockets:
+        sock.bind(("localhost", 0))
+    ports = [sock.getsockname()[1] for sock in sockets]
+    for sock in sockets:
+        sock.close()
+    return ports
+
+
+class TestSimulationVectorEnv(unittest.TestCase):
+    def make_env(self, **kwargs) -> SimulationVectorEnv:
+        kwargs.setdefault("ports", [23000, 23002])
+        env = SimulationVectorEnv(
+            reset,
+            step,
+            client_factory=FakeRemoteAPIClient,
+            logger=lambda _: None,
+            **kwargs,
+        )
+        self.addCleanup(env.close)
+        return env
+
+    def test_reset_and_step(self):
+        env = self.make_env()
+        self.assertEqual(len(env), 2)
+        observations = env.reset()
+        self.assertEqual(observations.shape, (2, 2))
+        numpy.testing.assert_array_equal(observations, 0)
+
+        observations, rewards, dones, infos = env.step([(50, False), (-50, False)])
+        self.assertEqual(observations.shape, (2, 2))
+        self.assertGreater(observations[0, 0], 0)
+        self.assertLess(observations[1, 0], 0)
+        numpy.testing.assert_array_equal(rewards, [50.0, -50.0])
+        numpy.testing.assert_array_equal(dones, [False, False])
+        self.assertEqual(infos, [{}, {}])
+
+    def test_done_resets(self):
+        env = self.make_env()
+        env.reset()
+        observations, _rewards, dones, infos = env.step([(50, True), (50, False)])
+        numpy.testing.assert_array_equal(dones, [True, False])
+        # The first simulation started a new episode, the second did not.
+        numpy.testing.assert_array_equal(observations[0], 0)
+        self.assertGreater(observations[1, 0], 0)
+        self.assertGreater(infos[0]["final_observation"][0], 0)
+        self.assertNotIn("truncated", infos[0])
+
+    def test_truncation(self):
+        env = self.make_env(max_steps=2)
+        env.reset()
+        _observations, _rewards, dones, infos = env.step([(50, False), (50, False)])
+        numpy.testing.assert_array_equal(dones, [False, False])
+        observations, _rewards, dones, infos = env.step([(50, False), (50, False)])
+        numpy.testing.assert_array_equal(dones, [True, True])
+        numpy.testing.assert_array_equal(observations, 0)
+        for info in infos:
+            self.assertTrue(info["truncated"])
+            self.assertGreater(info["final_observation"][0], 0)
+
+    def test_launch_waits_for_simulators(self):
+        start = time.monotonic()
+        env = self.make_env(
+            ports=free_ports(2),
+            ip_adress="localhost",
+            launch_command=[sys.executable, "-c", SLOW_SIMULATOR],
+        )
+        self.assertGreaterEqual(time.monotonic() - start, 1.0)
+        self.assertEqual(env.reset().shape, (2, 2))
+        simulators = list(env._simulators)
+        env.close()
+        for simulator in simulators:
+            self.assertIsNotNone(simulator.poll())
+
+    def test_launch_timeout(self):
+        with self.assertRaises(TimeoutError):
+            self.make_env(
+                ports=free_ports(1),
+                ip_adress="localhost",
+                launch_command=[sys.executable, "-c", SLOW_SIMULATOR],
+                launch_timeout=0.2,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()